@@ -0,0 +1,53 @@
+STATUS_NONE = 0
+STATUS_DONE = 1
+STATUS_BUG = 2
+
+
+class StatusMatrix:
+    """Матрица статусов объекты × пункты Генплана проекта
+
+    rows[i][j] — статус пункта items[j] у объекта objects[i] (0/1/2).
+    """
+
+    def __init__(self, project_name, objects, items, item_names, rows):
+        self.project_name = project_name
+        self.objects = objects
+        self.items = items
+        self.item_names = item_names
+        self.rows = rows
+
+        # Столбцы матрицы получаем одной транспозицией
+        columns = [bytes(column) for column in zip(*rows)] if rows else [b""] * len(items)
+
+        object_count = len(objects) or 1
+        item_count = len(items) or 1
+        self.item_bugs = [column.count(STATUS_BUG) for column in columns]
+        self.item_done = [column.count(STATUS_DONE) for column in columns]
+        self.object_bugs = [row.count(STATUS_BUG) for row in rows]
+        self.object_done = [row.count(STATUS_DONE) for row in rows]
+        self.item_bug_rates = [bugs / object_count for bugs in self.item_bugs]
+        self.object_bug_rates = [bugs / item_count for bugs in self.object_bugs]
+
+    def worst_items(self):
+        """Индексы пунктов по убыванию доли багов"""
+        return sorted(range(len(self.items)), key=lambda j: (-self.item_bugs[j], j))
+
+    def worst_objects(self):
+        """Индексы объектов по убыванию доли багов"""
+        return sorted(range(len(self.objects)), key=lambda i: (-self.object_bugs[i], i))
+
+
+def build_status_matrix(model, project_name, template_data):
+    """Строит матрицу статусов объектов проекта за один проход по модели"""
+    template_items = template_data.get("Генплан", [])
+    items = [item_id for item_id, _ in template_items]
+    item_names = [text for _, text in template_items]
+    objects = list(model.projects.get(project_name, {}).get("objects", {}).keys())
+
+    rows = []
+    for object_name in objects:
+        checklists = model.projects[project_name]["objects"][object_name].get("checklists", {})
+        rows.append(bytearray(checklists[item].get("status", STATUS_NONE) if item in checklists else STATUS_NONE
+                              for item in items))
+
+    return StatusMatrix(project_name, objects, items, item_names, rows)
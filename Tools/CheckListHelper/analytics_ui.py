@@ -0,0 +1,153 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from config import Config
+from analytics import build_status_matrix, STATUS_DONE, STATUS_BUG
+
+
+class AnalyticsWindow:
+    """Окно аналитики: тепловая карта статусов Генплана по объектам проекта"""
+
+    CELL_MIN = 3
+    CELL_MAX = 16
+
+    def __init__(self, app, project_name):
+        self.app = app
+        self.project_name = project_name
+
+        template_name = app.project_model.get_project_template(project_name)
+        template_data = app.template_manager.get_template_data(template_name)
+        self.matrix = build_status_matrix(app.project_model, project_name, template_data)
+
+        self.window = tk.Toplevel(app.root)
+        self.window.title(f"Аналитика Генплана: {project_name}")
+        self.window.geometry("1200x700")
+        self.window.transient(app.root)
+
+        self.sort_var = tk.BooleanVar(value=True)
+        self.canvas = None
+        self.image = None
+        self.hover_label = None
+        self.row_order = []
+        self.column_order = []
+        self.cell = self.CELL_MIN
+
+        self.setup_ui()
+        self.render()
+
+    def setup_ui(self):
+        """Создает интерфейс окна"""
+        top = ttk.Frame(self.window, padding="5")
+        top.pack(fill=tk.X)
+
+        matrix = self.matrix
+        total_bugs = sum(matrix.object_bugs)
+        ttk.Label(top, text=f"Объектов: {len(matrix.objects)}   Пунктов: {len(matrix.items)}   "
+                            f"BUG: {total_bugs}", font=('Arial', 10, 'bold')).pack(side=tk.LEFT, padx=5)
+
+        ttk.Button(top, text="📊 Экспорт в Excel", command=self.export).pack(side=tk.RIGHT, padx=5)
+        ttk.Checkbutton(top, text="Сортировать по доле багов", variable=self.sort_var,
+                        command=self.render).pack(side=tk.RIGHT, padx=10)
+
+        self.hover_label = ttk.Label(self.window, text="Наведите на ячейку", padding="5")
+        self.hover_label.pack(fill=tk.X)
+
+        paned = ttk.PanedWindow(self.window, orient=tk.HORIZONTAL)
+        paned.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        # Тепловая карта
+        map_frame = ttk.Frame(paned)
+        map_frame.rowconfigure(0, weight=1)
+        map_frame.columnconfigure(0, weight=1)
+
+        self.canvas = tk.Canvas(map_frame, bg="white", highlightthickness=0)
+        v_scroll = ttk.Scrollbar(map_frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        h_scroll = ttk.Scrollbar(map_frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
+        self.canvas.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
+        self.canvas.grid(row=0, column=0, sticky=(tk.N, tk.W, tk.E, tk.S))
+        v_scroll.grid(row=0, column=1, sticky=tk.NS)
+        h_scroll.grid(row=1, column=0, sticky=tk.EW)
+        self.canvas.bind("<Motion>", self.on_hover)
+        paned.add(map_frame, weight=3)
+
+        # Рейтинги пунктов и объектов
+        notebook = ttk.Notebook(paned)
+        self.items_tree = self._create_rating_tree(notebook, "Пункт")
+        notebook.add(self.items_tree.master, text="Пункты")
+        self.objects_tree = self._create_rating_tree(notebook, "Объект")
+        notebook.add(self.objects_tree.master, text="Объекты")
+        paned.add(notebook, weight=1)
+
+        for j in matrix.worst_items():
+            self.items_tree.insert("", "end", text=matrix.item_names[j],
+                                   values=(matrix.item_bugs[j], f"{matrix.item_bug_rates[j]:.0%}"))
+        for i in matrix.worst_objects():
+            self.objects_tree.insert("", "end", text=matrix.objects[i],
+                                     values=(matrix.object_bugs[i], f"{matrix.object_bug_rates[i]:.0%}"))
+
+    def _create_rating_tree(self, parent, title):
+        """Создает таблицу рейтинга с прокруткой"""
+        frame = ttk.Frame(parent)
+        tree = ttk.Treeview(frame, columns=("bugs", "rate"))
+        tree.heading("#0", text=title)
+        tree.heading("bugs", text="BUG")
+        tree.heading("rate", text="Доля")
+        tree.column("#0", width=220)
+        tree.column("bugs", width=50, anchor=tk.E)
+        tree.column("rate", width=60, anchor=tk.E)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        return tree
+
+    def render(self):
+        """Рисует тепловую карту одним изображением (по пикселю на ячейку с масштабированием)"""
+        matrix = self.matrix
+        self.canvas.delete("all")
+        if not matrix.objects or not matrix.items:
+            self.canvas.create_text(10, 10, anchor=tk.NW, text="Нет данных для аналитики")
+            return
+
+        if self.sort_var.get():
+            self.row_order = matrix.worst_objects()
+            self.column_order = matrix.worst_items()
+        else:
+            self.row_order = list(range(len(matrix.objects)))
+            self.column_order = list(range(len(matrix.items)))
+
+        colors = {0: "#E0E0E0", STATUS_DONE: Config.COLORS["done"], STATUS_BUG: Config.COLORS["bug"]}
+        data = " ".join("{" + " ".join(colors.get(matrix.rows[i][j], "#E0E0E0") for j in self.column_order) + "}"
+                        for i in self.row_order)
+
+        base = tk.PhotoImage(master=self.window, width=len(self.column_order), height=len(self.row_order))
+        base.put(data)
+
+        # Подбираем размер ячейки под ширину окна
+        self.window.update_idletasks()
+        width = max(self.canvas.winfo_width(), 400)
+        self.cell = max(self.CELL_MIN, min(self.CELL_MAX, width // len(self.column_order)))
+        self.image = base.zoom(self.cell)
+
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.image)
+        self.canvas.configure(scrollregion=(0, 0, self.image.width(), self.image.height()))
+
+    def on_hover(self, event):
+        """Показывает объект, пункт и статус под курсором"""
+        if not self.row_order:
+            return
+        x = int(self.canvas.canvasx(event.x)) // self.cell
+        y = int(self.canvas.canvasy(event.y)) // self.cell
+        if 0 <= y < len(self.row_order) and 0 <= x < len(self.column_order):
+            i, j = self.row_order[y], self.column_order[x]
+            status = self.matrix.rows[i][j]
+            status_text = "Done" if status == 1 else "BUG" if status == 2 else "—"
+            self.hover_label.config(text=f"{self.matrix.objects[i]}  ·  {self.matrix.item_names[j]}  ·  {status_text}")
+
+    def export(self):
+        """Экспортирует матрицу в Excel"""
+        self.app.export_manager.exports_dir = self.app.exports_dir.get()
+        success, message = self.app.export_manager.export_heatmap_to_excel(self.matrix)
+        if success:
+            messagebox.showinfo("Успех", f"Данные экспортированы:\n{message}", parent=self.window)
+        else:
+            messagebox.showerror("Ошибка", f"Не удалось экспортировать:\n{message}", parent=self.window)
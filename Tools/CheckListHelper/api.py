@@ -0,0 +1,392 @@
+"""Локальный HTTP/JSON API для автоматических тестов
+
+Запуск без интерфейса: python api.py [--host 127.0.0.1] [--port 8780]
+В программе API включается настройкой Config.API_PORT.
+
+Методы:
+    GET  /api/projects                              — проекты
+    GET  /api/projects/<проект>/objects             — объекты проекта
+    GET  /api/projects/<проект>/statuses[?object=]  — статусы общих пунктов или пунктов объекта
+         (в "item" — идентификатор пункта, в "text" — его текст в шаблоне)
+    POST /api/projects/<проект>/statuses            — пакет статусов:
+         {"changes": [{"object": "...", "tab": "...", "item": "id" | "text": "текст пункта",
+                       "status": "done" | "bug" | "none" | 0..2, "comment": "..."}]}
+         Пункты проверяются по шаблону проекта: неизвестный идентификатор или текст — 404.
+    POST /api/export                                — {"format": "csv" | "jsonl" | "html", "projects": [...]}
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from urllib.parse import urlsplit, unquote, parse_qs
+
+DEFAULT_PORT = 8780
+MAX_BODY = 32 * 1024 * 1024
+STATUS_CODES = {"none": 0, "done": 1, "bug": 2}
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ApiError(Exception):
+    """Ошибка запроса, возвращаемая клиенту с HTTP-кодом"""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class ChecklistApi:
+    """Операции API над моделью (вызываются в потоке, владеющем моделью)
+
+    Записи не сохраняют файл: владелец модели вызывает take_changes() после пачки
+    запросов и сохраняет данные один раз. В программе изменения пачки попадают в журнал
+    отмены одной операцией на проект (Ctrl+Z отменяет их, как ручные отметки).
+    """
+
+    def __init__(self, project_model, template_manager, export_manager):
+        self.project_model = project_model
+        self.template_manager = template_manager
+        self.export_manager = export_manager
+        self._changes = []
+        # Кэш шаблонов: имя -> ({(вкладка, id): текст}, {(вкладка, текст): id})
+        self._templates = {}
+
+    def take_changes(self):
+        """Возвращает и очищает накопленные изменения: список (проект, изменения apply_item_statuses)"""
+        changes, self._changes = self._changes, []
+        return changes
+
+    def invalidate_templates(self, template_names=None):
+        """Сбрасывает кэш пунктов измененных шаблонов (None — всех)"""
+        if template_names is None:
+            self._templates.clear()
+        for template_name in template_names or ():
+            self._templates.pop(template_name, None)
+
+    def _template_items(self, project_name):
+        """Возвращает (тексты по (вкладка, id), идентификаторы по (вкладка, текст)) шаблона проекта"""
+        template_name = self.project_model.get_project_template(project_name)
+        cached = self._templates.get(template_name)
+        if cached is None:
+            names = self.template_manager.get_item_names(template_name)
+            ids = {}
+            for key, text in names.items():
+                ids.setdefault((key[0], text), key[1])
+            cached = self._templates[template_name] = (names, ids)
+        return cached
+
+    def _project(self, project_name):
+        project = self.project_model.projects.get(project_name)
+        if project is None:
+            raise ApiError(404, f"Проект не найден: {project_name}")
+        return project
+
+    def list_projects(self):
+        return [{"name": name,
+                 "version": data.get("version"),
+                 "template": data.get("template"),
+                 "objects": len(data.get("objects", {}))}
+                for name, data in self.project_model.projects.items()]
+
+    def list_objects(self, project_name):
+        return list(self._project(project_name).get("objects", {}))
+
+    def get_statuses(self, project_name, object_name=None):
+        project = self._project(project_name)
+        if object_name is not None and object_name not in project.get("objects", {}):
+            raise ApiError(404, f"Объект не найден: {object_name}")
+        if object_name is None:
+            items = self.project_model.iter_items([project_name], objects=False)
+        else:
+            items = self.project_model.iter_items([project_name], object_name=object_name, common=False)
+        names, _ = self._template_items(project_name)
+        return [{"object": obj, "tab": tab, "item": item, "text": names.get((tab, item), item),
+                 "status": status, "comment": comment, "updated": updated}
+                for _, _, obj, tab, item, status, comment, updated in items]
+
+    def _item_id(self, project_name, tab_name, change):
+        """Находит идентификатор пункта по "item" или по тексту и проверяет его по шаблону проекта"""
+        names, ids = self._template_items(project_name)
+        item_id = change.get("item")
+        if item_id:
+            if not isinstance(item_id, str):
+                raise ApiError(400, f"Идентификатор пункта должен быть строкой: {item_id!r}")
+            if (tab_name, item_id) not in names:
+                raise ApiError(404, f"Пункт не найден в шаблоне: {tab_name} / {item_id}")
+            return item_id
+
+        text = change.get("text")
+        if not text:
+            raise ApiError(400, "Для пункта нужен item или text")
+        if not isinstance(text, str):
+            raise ApiError(400, f"Текст пункта должен быть строкой: {text!r}")
+        item_id = ids.get((tab_name, text))
+        if item_id is None:
+            raise ApiError(404, f"Пункт не найден в шаблоне: {tab_name} / {text}")
+        return item_id
+
+    @staticmethod
+    def _status(value):
+        """Проверяет статус: число 0..2 или название (done/bug/none)"""
+        if isinstance(value, str) and value.lower() in STATUS_CODES:
+            return STATUS_CODES[value.lower()]
+        # bool — подкласс int, но true/false статусом не считаются
+        if isinstance(value, int) and not isinstance(value, bool) and value in (0, 1, 2):
+            return value
+        raise ApiError(400, f"Неизвестный статус: {value!r}")
+
+    def set_statuses(self, project_name, changes):
+        """Применяет пакет статусов одной операцией модели; возвращает число измененных пунктов"""
+        project = self._project(project_name)
+        if not isinstance(changes, list):
+            raise ApiError(400, "changes должен быть списком изменений")
+        batch = []
+        for change in changes:
+            if not isinstance(change, dict):
+                raise ApiError(400, f"Изменение должно быть объектом: {change!r}")
+            for field in ("object", "tab", "comment"):
+                if change.get(field) is not None and not isinstance(change[field], str):
+                    raise ApiError(400, f"Поле {field} должно быть строкой")
+            object_name = change.get("object") or None
+            if object_name is not None and object_name not in project.get("objects", {}):
+                raise ApiError(404, f"Объект не найден: {object_name}")
+            tab_name = change.get("tab") or ("Генплан" if object_name else None)
+            if not tab_name:
+                raise ApiError(400, "Для пункта проекта нужна вкладка (tab)")
+
+            status = self._status(change.get("status", 0))
+            comment = change.get("comment") if status == 2 else None
+            batch.append((object_name, tab_name, self._item_id(project_name, tab_name, change), status, comment))
+
+        deltas = self.project_model.apply_item_statuses(project_name, batch)
+        if deltas:
+            self._changes.append((project_name, deltas))
+        return len(deltas)
+
+    def export(self, export_format, project_names=None):
+        if export_format not in ("csv", "jsonl", "html"):
+            raise ApiError(400, "Через API доступен экспорт в csv, jsonl и html")
+        if project_names is not None and (not isinstance(project_names, list)
+                                          or not all(isinstance(name, str) for name in project_names)):
+            raise ApiError(400, "projects должен быть списком названий проектов")
+        for project_name in project_names or ():
+            self._project(project_name)
+        items = self.template_manager.resolve_item_names(self.project_model.iter_items(project_names),
+                                                         self.project_model.get_project_template)
+        if export_format == "csv":
+            success, message = self.export_manager.export_to_csv(items)
+        elif export_format == "jsonl":
+            success, message = self.export_manager.export_to_jsonl(items)
+        else:
+            success, message = self.export_manager.export_to_html(items)
+        if not success:
+            raise ApiError(500, message)
+        return {"path": message}
+
+    def route(self, method, path, query, body):
+        """Сопоставляет запрос с операцией и выполняет ее"""
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts[:1] != ["api"]:
+            raise ApiError(404, "Неизвестный путь")
+        parts = parts[1:]
+        if not isinstance(body, dict):
+            raise ApiError(400, "Тело запроса должно быть JSON-объектом")
+
+        if parts == ["projects"] and method == "GET":
+            return self.list_projects()
+        if len(parts) == 3 and parts[0] == "projects" and parts[2] == "objects" and method == "GET":
+            return self.list_objects(parts[1])
+        if len(parts) == 3 and parts[0] == "projects" and parts[2] == "statuses":
+            if method == "GET":
+                return self.get_statuses(parts[1], query.get("object", [None])[0])
+            if method == "POST":
+                return {"changed": self.set_statuses(parts[1], body.get("changes", []))}
+        if parts == ["export"] and method == "POST":
+            return self.export(body.get("format", "csv"), body.get("projects"))
+        if parts and parts[0] in ("projects", "export"):
+            raise ApiError(405, "Метод не поддерживается")
+        raise ApiError(404, "Неизвестный путь")
+
+
+class ApiServer:
+    """Асинхронный HTTP-сервер API в фоновом потоке
+
+    Операции не выполняются в потоке сервера: submit(функция) должен вернуть
+    concurrent.futures.Future, выполненный владельцем модели (в программе — циклом Tk).
+    Поддерживаются постоянные соединения (keep-alive), чтобы не тратить время на подключение.
+    """
+
+    def __init__(self, api, submit, host="127.0.0.1", port=DEFAULT_PORT):
+        self.api = api
+        self.submit = submit
+        self.host = host
+        self.port = port
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Запускает сервер в фоновом потоке; возвращает фактический порт"""
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_thread, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait(timeout=5)
+        return self.port
+
+    def stop(self):
+        """Останавливает сервер"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run_thread(self, ready):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            print(f"Не удалось запустить API на порту {self.port}: {e}")
+            ready.set()
+            return
+        ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            # Закрываем открытые соединения перед остановкой цикла
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.close()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                code, result = await self._dispatch(method, target, headers, reader)
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version.upper() == "HTTP/1.1")
+                self._respond(writer, code, result, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            pass  # клиент отключился или сервер останавливается
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, target, headers, reader):
+        """Читает тело запроса и выполняет операцию в потоке модели"""
+        try:
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY:
+                raise ApiError(413, "Слишком большой запрос")
+            body = {}
+            if length:
+                try:
+                    body = json.loads(await reader.readexactly(length))
+                except ValueError:
+                    raise ApiError(400, "Тело запроса должно быть JSON")
+
+            url = urlsplit(target)
+            future = self.submit(lambda: self.api.route(method, url.path, parse_qs(url.query), body))
+            return 200, await asyncio.wrap_future(future)
+        except ApiError as e:
+            return e.code, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    def _respond(self, writer, code, result, keep_alive):
+        payload = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        writer.write((f"HTTP/1.1 {code} {HTTP_REASONS.get(code, '')}\r\n"
+                      "Content-Type: application/json; charset=utf-8\r\n"
+                      f"Content-Length: {len(payload)}\r\n"
+                      f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode('latin-1') + payload)
+
+
+def main(argv=None):
+    import queue
+    from concurrent.futures import Future
+    from models import ProjectModel
+    from templates import TemplateManager
+    from export import ExportManager
+    from config import Config
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    model = ProjectModel()
+    template_manager = TemplateManager()
+    try:
+        model.load_data()
+    except Exception as e:
+        # Пустую модель не обслуживаем: первое же сохранение затерло бы файл данных
+        print(f"Не удалось загрузить данные: {e}")
+        return 1
+    if model.recovered:
+        print(model.recovered)
+    # Как при загрузке в программе: данные старой схемы переводятся на идентификаторы пунктов
+    if model.migrate_item_ids(template_manager.get_template_data) or model.recovered:
+        model.save_data()
+    api = ChecklistApi(model, template_manager, ExportManager())
+    calls = queue.Queue()
+
+    def submit(func):
+        future = Future()
+        calls.put((func, future))
+        return future
+
+    server = ApiServer(api, submit, args.host, args.port)
+    print(f"API запущен на http://{args.host}:{server.start()}/api/projects")
+
+    # Главный поток владеет моделью: выполняет пачки запросов, файл сохраняется не чаще раза в паузу
+    dirty, last_save = False, 0.0
+    try:
+        while True:
+            try:
+                batch = [calls.get(timeout=0.5)]
+            except queue.Empty:
+                batch = []
+            while True:
+                try:
+                    batch.append(calls.get_nowait())
+                except queue.Empty:
+                    break
+            for func, future in batch:
+                try:
+                    future.set_result(func())
+                except Exception as e:
+                    future.set_exception(e)
+
+            dirty = bool(api.take_changes()) or dirty
+            if dirty and time.monotonic() - last_save >= Config.BACKGROUND_SAVE_DELAY / 1000:
+                model.save_data()
+                dirty, last_save = False, time.monotonic()
+    except KeyboardInterrupt:
+        server.stop()
+        if dirty:
+            model.save_data()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
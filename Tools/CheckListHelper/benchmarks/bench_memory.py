@@ -0,0 +1,70 @@
+"""Память модели после загрузки: обычные словари против компактного представления
+
+Запуск: python benchmarks/bench_memory.py [--projects 10] [--objects 1500] [--items 60] [--file data.json]
+По умолчанию генерируется файл данных около 100 МБ (формат json).
+Каждый вариант загружается в отдельном процессе, память считается через tracemalloc.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def measure(path, compact):
+    """Загружает файл и возвращает (память после загрузки, пик, время) — выполняется в дочернем процессе"""
+    import gc
+    import tracemalloc
+    from storage import read_projects
+    from compact import compact_projects
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    projects = read_projects(path)
+    if compact:
+        compact_projects(projects)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    assert projects
+    return current, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--objects", type=int, default=1500)
+    parser.add_argument("--items", type=int, default=60)
+    parser.add_argument("--file", help="готовый файл данных вместо синтетического")
+    parser.add_argument("--measure", choices=("plain", "compact"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.file, args.measure == "compact")))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if path is None:
+            from synthetic import write_fixture
+            _, path = write_fixture(tmp, args.projects, args.objects, args.items)
+
+        print(f"Файл: {os.path.getsize(path) / 1024 / 1024:.0f} МБ")
+        print(f"{'Модель':<10}{'Память, МБ':>14}{'Пик, МБ':>12}{'Загрузка, с':>14}")
+        results = {}
+        for mode in ("plain", "compact"):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", mode, "--file", path],
+                                    capture_output=True, text=True, check=True).stdout
+            current, peak, elapsed = json.loads(output)
+            results[mode] = current
+            print(f"{mode:<10}{current / 2 ** 20:>14.0f}{peak / 2 ** 20:>12.0f}{elapsed:>14.2f}")
+
+    print(f"Экономия памяти: {(1 - results['compact'] / results['plain']) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
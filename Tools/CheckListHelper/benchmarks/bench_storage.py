@@ -0,0 +1,56 @@
+"""Сравнение форматов файла данных: время сохранения/загрузки и размер
+
+Запуск: python benchmarks/bench_storage.py [--projects 5] [--objects 400] [--items 60]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import read_projects, write_projects, detect_format, MSGPACK_AVAILABLE  # noqa: E402
+from synthetic import generate_projects  # noqa: E402
+
+
+def measure(path, projects, data_format, repeat):
+    """Возвращает (время сохранения, время загрузки, размер файла)"""
+    save_times, load_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with open(path, 'wb') as f:
+            write_projects(f, projects, data_format)
+        save_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        loaded = read_projects(path)
+        load_times.append(time.perf_counter() - start)
+
+        assert loaded == projects and detect_format(path) == data_format
+    return min(save_times), min(load_times), os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--objects", type=int, default=400)
+    parser.add_argument("--items", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    projects = generate_projects(args.projects, args.objects, args.items)
+    formats = ["json", "json.gz"] + (["msgpack"] if MSGPACK_AVAILABLE else [])
+
+    print(f"{'Формат':<10}{'Сохранение, с':>16}{'Загрузка, с':>14}{'Размер, КБ':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for data_format in formats:
+            save, load, size = measure(os.path.join(tmp, "data.bin"), projects, data_format, args.repeat)
+            print(f"{data_format:<10}{save:>16.3f}{load:>14.3f}{size / 1024:>14.0f}")
+
+    if not MSGPACK_AVAILABLE:
+        print("msgpack не установлен — формат пропущен")
+
+
+if __name__ == "__main__":
+    main()
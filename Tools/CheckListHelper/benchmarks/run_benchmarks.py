@@ -0,0 +1,276 @@
+"""Набор бенчмарков горячих путей программы на синтетических данных
+
+Запуск: python benchmarks/run_benchmarks.py [--projects 5] [--objects 400] [--items 60] [--repeat 3]
+                                            [--output results.json] [--baseline old.json] [--no-ui]
+
+Сценарии: сохранение/загрузка данных, разбор шаблона, экспорт в Excel и PDF, а также
+(при наличии дисплея или Xvfb) выбор в дереве проекта/объекта и перестроение чек-листов.
+Результаты пишутся в JSON; с --baseline выводится сравнение с предыдущим запуском.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from storage import MSGPACK_AVAILABLE  # noqa: E402
+from synthetic import generate_template, write_fixture, TEMPLATE_NAME  # noqa: E402
+
+
+def timed(func, repeat):
+    """Выполняет func repeat раз; возвращает {min, median, runs} в секундах"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return {"min": min(runs), "median": statistics.median(runs), "runs": runs}
+
+
+def use_directory(directory):
+    """Направляет все файлы программы во временную директорию"""
+    Config.DATA_FILE = os.path.join(directory, "projects_data.json")
+    Config.HISTORY_FILE = os.path.join(directory, "projects_history.jsonl")
+    Config.TEMPLATES_DIR = os.path.join(directory, "checklist_templates")
+    Config.TEMPLATES_CACHE_FILE = None
+    Config.EXPORTS_DIR = os.path.join(directory, "exports")
+    Config.TEMPLATES_WATCH_MODE = None
+    Config.SYNC_SERVER = None
+    Config.API_PORT = None
+
+
+def build_export_data(model, template_data, project_name):
+    """Данные экспорта всего проекта в формате ChecklistApp.collect_export_data без интерфейса"""
+    def items(tab_name, checklist, items_list):
+        result = []
+        for item_id, text in items_list:
+            record = checklist.get(item_id, {})
+            status = record.get("status", 0)
+            result.append({"name": text, "status": status,
+                           "status_text": "Done" if status == 1 else "BUG" if status == 2 else "—",
+                           "comment": record.get("comment") or "", "attachments": []})
+        return result
+
+    project = model.projects[project_name]
+    common = {"name": "Общие чек-листы", "tabs": [
+        {"name": tab_name, "items": items(tab_name, project["checklists"].get(tab_name, {}), tab_items)}
+        for tab_name, tab_items in template_data.items() if tab_name != "Генплан"]}
+    sections = [common]
+    for object_name, object_data in project.get("objects", {}).items():
+        sections.append({"name": f"Объект: {object_name}", "tabs": [
+            {"name": "Генплан",
+             "items": items("Генплан", object_data.get("checklists", {}), template_data.get("Генплан", []))}]})
+    return {"project_name": project_name, "project_version": project.get("version"),
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "type": "full_project", "sections": sections}
+
+
+def run_storage(results, args):
+    from models import ProjectModel
+
+    model = ProjectModel()
+    model.load_data()
+    formats = ["json", "json.gz"] + (["msgpack"] if MSGPACK_AVAILABLE else [])
+    for data_format in formats:
+        Config.DATA_FORMAT = data_format
+        results[f"save_data[{data_format}]"] = timed(model.save_data, args.repeat)
+        results[f"load_data[{data_format}]"] = timed(model.load_data, args.repeat)
+        results[f"save_data[{data_format}]"]["size"] = os.path.getsize(Config.DATA_FILE)
+    if not MSGPACK_AVAILABLE:
+        results["save_data[msgpack]"] = {"skipped": "msgpack не установлен"}
+    Config.DATA_FORMAT = "json"
+    model.save_data()
+
+
+def run_templates(results, args):
+    from templates import TemplateManager
+
+    manager = TemplateManager()
+    content = generate_template(8, args.items)
+    results["parse_template"] = timed(lambda: manager.parse_template(content), args.repeat)
+    results["load_templates"] = timed(manager.load_templates, args.repeat)
+
+
+def run_export(results, args):
+    from models import ProjectModel
+    from templates import TemplateManager
+    from export import ExportManager, EXCEL_AVAILABLE, PDF_AVAILABLE
+
+    model = ProjectModel()
+    model.load_data()
+    template_data = TemplateManager().get_template_data(TEMPLATE_NAME)
+    manager = ExportManager()
+    project_name = next(iter(model.projects))
+    data = build_export_data(model, template_data, project_name)
+
+    def run_html():
+        items = TemplateManager().resolve_item_names(model.iter_items([project_name]), model.get_project_template)
+        success, message = manager.export_to_html(items)
+        if not success:
+            raise RuntimeError(message)
+    results["export_to_html"] = timed(run_html, args.repeat)
+
+    for name, available, export in (("export_to_excel", EXCEL_AVAILABLE, manager.export_to_excel),
+                                    ("export_to_pdf", PDF_AVAILABLE, manager.export_to_pdf)):
+        if not available:
+            results[name] = {"skipped": "библиотека не установлена"}
+            continue
+
+        def run():
+            success, message = export(data)
+            if not success:
+                raise RuntimeError(message)
+        results[name] = timed(run, args.repeat)
+
+
+def ensure_display():
+    """Возвращает процесс Xvfb (или None, если дисплей уже есть); False — дисплея нет"""
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        return None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        return False
+    display = ":97"
+    process = subprocess.Popen([xvfb, display, "-screen", "0", "1920x1080x24"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    os.environ["DISPLAY"] = display
+    return process
+
+
+def pump(root, condition, timeout=120):
+    """Обрабатывает события Tk, пока condition() не станет истинным"""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("интерфейс не ответил вовремя")
+        root.update()
+
+
+def run_ui(results, args):
+    xvfb = ensure_display()
+    if xvfb is False:
+        results["ui"] = {"skipped": "нет дисплея и Xvfb"}
+        return
+
+    import tkinter as tk
+    from ui import ChecklistApp
+
+    root = tk.Tk()
+    try:
+        start = time.perf_counter()
+        app = ChecklistApp(root)
+        pump(root, lambda: app.model_ready)
+        elapsed = time.perf_counter() - start
+        results["startup"] = {"min": elapsed, "median": elapsed, "runs": [elapsed]}
+
+        tree = app.projects_tree
+        project_node = tree.get_children()[0]
+        object_node = tree.get_children(project_node)[0]
+
+        def all_items_created():
+            return all(len(tab.checklist_items) == len(tab.items) for tab in app.checklist_tabs.values())
+
+        def select(node):
+            def run():
+                tree.selection_set(node)
+                root.update()
+                pump(root, all_items_created)
+                tree.selection_remove(node)
+                root.update()
+            return run
+
+        results["tree_select_project"] = timed(select(project_node), args.repeat)
+        results["tree_select_object"] = timed(select(object_node), args.repeat)
+
+        tree.selection_set(project_node)
+        pump(root, all_items_created)
+        template_data = app.template_manager.get_template_data(TEMPLATE_NAME)
+
+        def rebuild():
+            app.rebuild_checklists(template_data)
+            pump(root, all_items_created)
+        results["rebuild_checklists"] = timed(rebuild, args.repeat)
+        results["collect_export_data"] = timed(lambda: app.collect_export_data("project"), args.repeat)
+    finally:
+        root.destroy()
+        if xvfb:
+            xvfb.terminate()
+
+
+SCENARIOS = {
+    "storage": run_storage,
+    "templates": run_templates,
+    "export": run_export,
+    "ui": run_ui,
+}
+
+
+def compare(results, baseline):
+    """Печатает изменение медиан относительно предыдущего запуска"""
+    print(f"\n{'Сценарий':<28}{'Было, с':>12}{'Стало, с':>12}{'Изменение':>12}")
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name, {})
+        if "median" not in result or "median" not in old:
+            continue
+        change = (result["median"] - old["median"]) / old["median"] * 100 if old["median"] else 0.0
+        print(f"{name:<28}{old['median']:>12.4f}{result['median']:>12.4f}{change:>+11.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--objects", type=int, default=400)
+    parser.add_argument("--items", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="JSON предыдущего запуска для сравнения")
+    parser.add_argument("--only", action="append", choices=list(SCENARIOS), help="запустить только эти группы")
+    parser.add_argument("--no-ui", action="store_true", help="пропустить сценарии интерфейса")
+    args = parser.parse_args(argv)
+
+    groups = args.only or [name for name in SCENARIOS if not (args.no_ui and name == "ui")]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        use_directory(tmp)
+        write_fixture(tmp, args.projects, args.objects, args.items)
+        for group in groups:
+            try:
+                SCENARIOS[group](results, args)
+            except Exception as e:
+                results[group] = {"error": str(e)}
+
+    print(f"{'Сценарий':<28}{'Мин, с':>12}{'Медиана, с':>12}")
+    for name, result in results.items():
+        if "median" in result:
+            print(f"{name:<28}{result['min']:>12.4f}{result['median']:>12.4f}")
+        else:
+            print(f"{name:<28}  {result.get('skipped') or result.get('error')}")
+
+    report = {
+        "meta": {"date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+                 "platform": platform.platform()},
+        "params": {"projects": args.projects, "objects": args.objects, "items": args.items, "repeat": args.repeat},
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты сохранены: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Генератор синтетических данных: N проектов × M объектов × K пунктов
+
+Запуск: python benchmarks/synthetic.py OUT_DIR [--projects 5] [--objects 400] [--items 60] [--format json]
+Создает шаблон и файл данных, которые можно открыть программой (Config.DATA_FILE / TEMPLATES_DIR).
+"""
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import write_projects  # noqa: E402
+from templates import split_item  # noqa: E402
+
+TEMPLATE_NAME = "Синтетический_чеклист.txt"
+COMMENTS = ["Не открывается карточка", "Неверная стоимость", "Пропадает метка после перехода",
+            "Текстуры не прогружаются на слабом ПК", "Лифт показывает неверное число этажей",
+            "После возврата из 3д-тура сбрасывается фильтр", "Кнопка «Избранное» не реагирует на второй клик",
+            "На 4K мониторе обрезается подпись корпуса"]
+SUBJECTS = ["Квартира", "Этаж", "Корпус", "Лифт", "Холл", "Двор", "Паркинг", "Фильтр", "Карточка", "Метка"]
+ASPECTS = ["Отображение", "Переход", "Стоимость", "3д-тур", "Избранное", "Метраж", "Подсветка", "Анимация"]
+
+
+def _template_tabs(tabs, items, seed):
+    rnd = random.Random(seed)
+    return {tab: [f"{rnd.choice(SUBJECTS)} - {rnd.choice(ASPECTS)} {i + 1}" for i in range(items)]
+            for tab in [f"Раздел {t + 1}" for t in range(tabs)] + ["Генплан"]}
+
+
+def generate_template(tabs, items, seed=1):
+    """Генерирует текст шаблона: tabs общих вкладок и Генплан, по items пунктов в каждой"""
+    return "\n".join(f"{tab}\n" + "".join(f"- {text}\n" for text in texts)
+                     for tab, texts in _template_tabs(tabs, items, seed).items())
+
+
+def generate_template_data(tabs, items, seed=1):
+    """Разобранный шаблон generate_template: {вкладка: [(id, текст)]}"""
+    return {tab: [split_item(text) for text in texts] for tab, texts in _template_tabs(tabs, items, seed).items()}
+
+
+def generate_projects(projects, objects, items, seed=1, template_data=None):
+    """Генерирует синтетические данные в формате projects_data.json
+
+    Без template_data у всех чек-листов items случайных идентификаторов;
+    с template_data — идентификаторы пунктов шаблона (общие вкладки и Генплан объектов).
+    """
+    rnd = random.Random(seed)
+    if template_data is None:
+        item_ids = [f"{rnd.getrandbits(32):08x}" for _ in range(items)]
+        common_tabs = {"Общие": item_ids}
+        object_ids = item_ids
+    else:
+        common_tabs = {tab: [item_id for item_id, _ in tab_items]
+                       for tab, tab_items in template_data.items() if tab != "Генплан"}
+        object_ids = [item_id for item_id, _ in template_data.get("Генплан", [])]
+
+    def checklist(ids):
+        result = {}
+        for item_id in ids:
+            status = rnd.choice((0, 0, 1, 1, 1, 2))
+            result[item_id] = {"status": status,
+                               "comment": rnd.choice(COMMENTS) if status == 2 else None,
+                               "updated": f"2026-01-{rnd.randint(1, 28):02d} {rnd.randint(9, 19):02d}:00:00"}
+        return result
+
+    return {
+        f"Проект {p}": {
+            "version": "1.0.0",
+            "template": TEMPLATE_NAME if template_data is not None else "Основной_чеклист.txt",
+            "created": "2026-01-01 12:00:00",
+            "schema": 2,
+            "checklists": {tab: checklist(ids) for tab, ids in common_tabs.items()},
+            "objects": {f"Корпус {o}": {"created": "2026-01-01 12:00:00", "checklists": checklist(object_ids)}
+                        for o in range(objects)}
+        }
+        for p in range(projects)
+    }
+
+
+def write_fixture(directory, projects, objects, items, tabs=8, seed=1, data_format="json"):
+    """Создает в директории шаблон и файл данных; возвращает (путь шаблонов, путь данных)"""
+    templates_dir = os.path.join(directory, "checklist_templates")
+    os.makedirs(templates_dir, exist_ok=True)
+    with open(os.path.join(templates_dir, TEMPLATE_NAME), 'w', encoding='utf-8') as f:
+        f.write(generate_template(tabs, items, seed))
+
+    template_data = generate_template_data(tabs, items, seed)
+    data_path = os.path.join(directory, "projects_data.json")
+    with open(data_path, 'wb') as f:
+        write_projects(f, generate_projects(projects, objects, items, seed, template_data), data_format)
+    return templates_dir, data_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--objects", type=int, default=400)
+    parser.add_argument("--items", type=int, default=60)
+    parser.add_argument("--tabs", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--format", default="json", choices=("json", "json.gz", "msgpack"))
+    args = parser.parse_args()
+
+    templates_dir, data_path = write_fixture(args.out_dir, args.projects, args.objects, args.items,
+                                             args.tabs, args.seed, args.format)
+    print(f"Шаблон: {templates_dir}\nДанные: {data_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from config import Config
+from profiling import instrumentation
+from scheduler import PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
 
 
 class ChecklistTab:
@@ -9,10 +11,19 @@ class ChecklistTab:
     def __init__(self, parent, tab_name, items, app):
         self.parent = parent
         self.tab_name = tab_name
-        self.items = items
+        # items — пары (id, текст); внутри вкладки пункты адресуются по id
+        self.items = [item_id for item_id, _ in items]
+        self.item_texts = dict(items)
+        self.item_index = {item: index for index, item in enumerate(self.items)}
         self.app = app
         self.checklist_items = {}
-        self.selection_vars = {}
+        # Выделение: множество id; anchor — начало диапазона для Shift, cursor — пункт под клавиатурой
+        self.selected = set()
+        self.anchor = None
+        self.cursor = None
+        self._selection_job = None
+        # Текущие статусы пунктов: id -> (статус, комментарий); виджеты создаются пакетами позже
+        self.statuses = {}
 
         self.frame = ttk.Frame(parent)
         self.setup_ui()
@@ -39,8 +50,20 @@ class ChecklistTab:
         self.canvas.pack(side="left", fill="both", expand=True)
         self.v_scrollbar.pack(side="right", fill="y")
 
-        # Создаем пункты с задержкой для плавности
-        self.create_items_batch()
+        # Выделение с клавиатуры (фокус получает canvas при щелчке по пункту)
+        self.canvas.configure(takefocus=True)
+        self.canvas.bind("<Up>", lambda e: self.move_cursor(-1, extend=False))
+        self.canvas.bind("<Down>", lambda e: self.move_cursor(1, extend=False))
+        self.canvas.bind("<Shift-Up>", lambda e: self.move_cursor(-1, extend=True))
+        self.canvas.bind("<Shift-Down>", lambda e: self.move_cursor(1, extend=True))
+        self.canvas.bind("<space>", lambda e: self.cursor is not None and self.toggle_item(self.cursor))
+        self.canvas.bind("<Control-a>", lambda e: self.select_all() or "break")
+        self.canvas.bind("<Control-A>", lambda e: self.select_all() or "break")
+        self.canvas.bind("<Escape>", lambda e: self.clear_selection())
+
+        # Пункты создаются планировщиком по частям, не блокируя интерфейс
+        self.build_task = self.app.scheduler.spawn(self.create_items(), PRIORITY_LOW,
+                                                   name=f"Вкладка {self.tab_name}", owner=self)
 
     def _on_frame_configure(self, event):
         """Обновляет область прокрутки при изменении размера фрейма"""
@@ -51,16 +74,17 @@ class ChecklistTab:
         # Устанавливаем ширину внутреннего фрейма равной ширине canvas
         self.canvas.itemconfig("inner_frame", width=event.width)
 
-    def create_items_batch(self, start=0, batch_size=20):
-        """Создает пункты пакетами для плавности"""
-        end = min(start + batch_size, len(self.items))
+    def create_items(self):
+        """Генератор для планировщика: создает пункты по одному"""
+        # Замер охватывает все построение вкладки, включая паузы между тактами
+        with instrumentation.span("build_tab"):
+            for row, item in enumerate(self.items):
+                self.create_item(self.scrollable_frame, item, row)
+                yield
 
-        for i in range(start, end):
-            self.create_item(self.scrollable_frame, self.items[i], i)
-
-        if end < len(self.items):
-            # Создаем следующие пункты с небольшой задержкой
-            self.frame.after(10, lambda: self.create_items_batch(end, batch_size))
+    def set_visible(self, visible):
+        """Видимая вкладка строится раньше скрытых"""
+        self.app.scheduler.set_priority(self.build_task, PRIORITY_NORMAL if visible else PRIORITY_LOW)
 
     def create_item(self, parent, item, row):
         """Создает отдельный пункт с чекбоксом для выбора справа"""
@@ -71,19 +95,17 @@ class ChecklistTab:
 
         # Получаем стандартный цвет фона
         bg_color = frame.cget('background')
+        # Рамка отмечает пункт под курсором клавиатуры
+        frame.config(highlightthickness=1, highlightbackground=bg_color, highlightcolor=bg_color)
 
         # Переменная для статуса
         status_var = tk.IntVar()
 
-        # Переменная для выбора пункта
-        select_var = tk.BooleanVar()
-        self.selection_vars[item] = select_var
-
         self.checklist_items[item] = {
             "var": status_var,
             "comment": None,
             "frame": frame,
-            "select_var": select_var
+            "bg": bg_color
         }
 
         # Кнопка для отметки статуса
@@ -92,7 +114,7 @@ class ChecklistTab:
         status_btn.grid(row=0, column=0, padx=(0, 2))
 
         # Текст пункта
-        text_label = tk.Label(frame, text=item, anchor=tk.W, bg=bg_color)
+        text_label = tk.Label(frame, text=self.item_texts[item], anchor=tk.W, bg=bg_color)
         text_label.grid(row=0, column=1, sticky=tk.W, padx=2)
 
         # Метка для комментария
@@ -100,24 +122,162 @@ class ChecklistTab:
                                  font=('Arial', 9, 'italic'), bg=bg_color)
         comment_label.grid(row=0, column=2, sticky=tk.W, padx=2)
 
-        # Чекбокс для выбора пункта (ttk.Checkbutton для единообразия)
-        select_cb = ttk.Checkbutton(frame, variable=select_var,
-                                    command=self.on_selection_change)
-        select_cb.grid(row=0, column=3, padx=(2, 0))
+        # Метка вложений (скриншоты, логи)
+        attachments_label = tk.Label(frame, text="", cursor="hand2", bg=bg_color)
+        attachments_label.grid(row=0, column=3, sticky=tk.W, padx=2)
+        attachments_label.bind("<Button-1>", lambda e, i=item: self.app.show_attachments(self.tab_name, i))
+
+        # Флажок выбора пункта: состояние хранится в self.selected, Shift+щелчок выделяет диапазон
+        select_cb = tk.Label(frame, text="☐", cursor="hand2", bg=bg_color)
+        select_cb.grid(row=0, column=4, padx=(2, 0))
+        select_cb.bind("<Button-1>", lambda e, i=item: self.on_select_click(i, extend=False))
+        select_cb.bind("<Shift-Button-1>", lambda e, i=item: self.on_select_click(i, extend=True))
+        text_label.bind("<Button-1>", lambda e, i=item: self.on_select_click(i, extend=False))
+        text_label.bind("<Shift-Button-1>", lambda e, i=item: self.on_select_click(i, extend=True))
 
         self.checklist_items[item]["btn"] = status_btn
+        # Цвет кнопки по умолчанию зависит от платформы (SystemButtonFace есть только в Windows)
+        self.checklist_items[item]["default_bg"] = status_btn.cget("background")
         self.checklist_items[item]["text_label"] = text_label
         self.checklist_items[item]["comment_label"] = comment_label
+        self.checklist_items[item]["attachments_label"] = attachments_label
         self.checklist_items[item]["select_cb"] = select_cb
 
+        self.update_attachments_label(item)
+
+        # Применяем статус и выделение, полученные до создания виджета
+        if item in self.statuses:
+            self.render_item_status(item)
+        if item in self.selected or item == self.cursor:
+            self.render_item_selection(item)
+
+    def update_attachments_label(self, item):
+        """Обновляет индикатор количества вложений пункта"""
+        if item in self.checklist_items:
+            count = len(self.app.get_item_attachments(self.tab_name, item))
+            self.checklist_items[item]["attachments_label"].config(text=f"📎 {count}" if count else "")
+
+    def on_select_click(self, item, extend):
+        """Щелчок по флажку или тексту: переключает пункт, с Shift — выделяет диапазон от предыдущего"""
+        self.canvas.focus_set()
+        if extend and self.anchor is not None:
+            self.select_range(self.anchor, item)
+            self.set_cursor(item)
+        else:
+            self.toggle_item(item)
+
+    def toggle_item(self, item):
+        """Переключает выделение пункта и делает его началом следующего диапазона"""
+        self.anchor = item
+        self.set_cursor(item)
+        self.set_selected([item], item not in self.selected)
+
+    def select_range(self, start_item, end_item):
+        """Выделяет пункты между двумя пунктами включительно"""
+        start, end = sorted((self.item_index[start_item], self.item_index[end_item]))
+        self.set_selected(self.items[start:end + 1], True)
+
+    def select_all(self):
+        """Выделяет все пункты вкладки"""
+        self.set_selected(self.items, True)
+
+    def select_by_status(self, status):
+        """Выделяет пункты с указанным статусом (например, все BUG или все без отметки)"""
+        self.clear_selection()
+        self.set_selected([item for item in self.items if self.get_item_status(item) == status], True)
+
+    def clear_selection(self):
+        """Снимает выделение со всех пунктов"""
+        self.set_selected(list(self.selected), False)
+
+    def set_selected(self, items, selected):
+        """Меняет выделение пунктов; кнопки обновляются один раз после пачки изменений"""
+        changed = [item for item in items if (item in self.selected) != selected]
+        if not changed:
+            return
+        if selected:
+            self.selected.update(changed)
+        else:
+            self.selected.difference_update(changed)
+
+        if len(changed) == 1:
+            self.render_item_selection(changed[0])
+        else:
+            self.app.scheduler.spawn(self.render_selection(changed), PRIORITY_HIGH,
+                                     name="Выделение", owner=self)
+        self.on_selection_change()
+
+    def move_cursor(self, step, extend):
+        """Перемещает курсор клавиатуры; с Shift расширяет выделение до нового пункта"""
+        if not self.items:
+            return "break"
+        if self.cursor is None:
+            index = 0
+        else:
+            index = max(0, min(len(self.items) - 1, self.item_index[self.cursor] + step))
+        item = self.items[index]
+        if extend:
+            if self.anchor is None:
+                self.anchor = self.cursor if self.cursor is not None else item
+            self.select_range(self.anchor, item)
+        else:
+            self.anchor = item
+        self.set_cursor(item)
+        self.see_item(item)
+        return "break"
+
+    def set_cursor(self, item):
+        previous, self.cursor = self.cursor, item
+        if previous is not None and previous != item:
+            self.render_item_selection(previous)
+        self.render_item_selection(item)
+
+    def see_item(self, item):
+        """Прокручивает вкладку так, чтобы пункт был виден"""
+        data = self.checklist_items.get(item)
+        height = self.scrollable_frame.winfo_height()
+        if data is None or height <= 1:
+            return
+        top, bottom = self.canvas.yview()
+        y = data["frame"].winfo_y() / height
+        row = data["frame"].winfo_height() / height
+        if y < top:
+            self.canvas.yview_moveto(y)
+        elif y + row > bottom:
+            self.canvas.yview_moveto(y + row - (bottom - top))
+
+    def render_item_selection(self, item):
+        """Отображает выделение и курсор пункта"""
+        data = self.checklist_items.get(item)
+        if data is None:
+            return
+        selected = item in self.selected
+        bg = Config.COLORS["selected"] if selected else data["bg"]
+        data["select_cb"].config(text="☑" if selected else "☐", bg=bg)
+        for name in ("frame", "text_label", "comment_label", "attachments_label"):
+            data[name].config(bg=bg)
+        cursor_color = "#1E88E5" if item == self.cursor else bg
+        data["frame"].config(highlightbackground=cursor_color, highlightcolor=cursor_color)
+
+    def render_selection(self, items):
+        """Генератор для планировщика: перерисовывает выделение пунктов по одному"""
+        for item in items:
+            self.render_item_selection(item)
+            yield
+
     def on_selection_change(self):
         """Обработчик изменения выделения"""
-        # Используем after для отложенного вызова, чтобы не тормозить интерфейс
-        self.frame.after(10, self.app.update_bulk_buttons)
+        # Все изменения до ближайшего простоя цикла событий дают одно обновление кнопок
+        if self._selection_job is None:
+            self._selection_job = self.frame.after_idle(self._notify_selection_change)
+
+    def _notify_selection_change(self):
+        self._selection_job = None
+        self.app.update_bulk_buttons()
 
     def get_selected_items(self):
-        """Возвращает список выбранных пунктов"""
-        return [item for item, var in self.selection_vars.items() if var.get()]
+        """Возвращает список выбранных пунктов в порядке вкладки"""
+        return sorted(self.selected, key=self.item_index.__getitem__)
 
     def center_window(self, window):
         """Центрирует окно относительно главного окна"""
@@ -153,13 +313,13 @@ class ChecklistTab:
         """Показывает диалог выбора статуса"""
         dialog = tk.Toplevel(self.app.root)
         dialog.title("Выберите статус")
-        dialog.geometry("300x150")
+        dialog.geometry("300x180")
         dialog.resizable(False, False)
 
         # Центрируем окно
         self.center_window(dialog)
 
-        ttk.Label(dialog, text=f"Пункт: {item}", wraplength=280).pack(pady=10)
+        ttk.Label(dialog, text=f"Пункт: {self.item_texts[item]}", wraplength=280).pack(pady=10)
 
         btn_frame = ttk.Frame(dialog)
         btn_frame.pack(pady=10)
@@ -184,6 +344,9 @@ class ChecklistTab:
         tk.Button(btn_frame, text="✕ Сброс", bg="gray",
                   fg="white", width=10, command=set_none).pack(side=tk.LEFT, padx=5)
 
+        ttk.Button(dialog, text="🕘 История",
+                   command=lambda: (dialog.destroy(), self.app.show_item_history(self.tab_name, item))).pack()
+
     def show_comment_dialog(self, item):
         """Показывает диалог ввода комментария"""
         dialog = tk.Toplevel(self.app.root)
@@ -194,7 +357,7 @@ class ChecklistTab:
         # Центрируем окно
         self.center_window(dialog)
 
-        ttk.Label(dialog, text=f"Опишите баг для: {item}", wraplength=380).pack(pady=10)
+        ttk.Label(dialog, text=f"Опишите баг для: {self.item_texts[item]}", wraplength=380).pack(pady=10)
 
         # Создаем текстовое поле с поддержкой Ctrl+V
         comment_entry = tk.Text(dialog, width=40, height=3, wrap=tk.WORD)
@@ -269,20 +432,27 @@ class ChecklistTab:
         btn_frame.pack(pady=10)
 
         ttk.Button(btn_frame, text="Сохранить", command=save_comment).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="📎 Прикрепить",
+                   command=lambda: self.app.attach_files(self.tab_name, item, dialog)).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Отмена", command=cancel).pack(side=tk.LEFT, padx=5)
 
         # Привязываем Enter к сохранению
         comment_entry.bind('<Control-Return>', lambda e: save_comment())
         comment_entry.bind('<Escape>', lambda e: cancel())
 
-    def set_item_status(self, item, status, comment):
-        """Устанавливает статус пункта"""
-        # Проверяем, существует ли такой пункт в текущей вкладке
-        if item not in self.checklist_items:
-            print(f"Предупреждение: Пункт '{item}' не найден в вкладке '{self.tab_name}'")
+    def show_item_status(self, item, status, comment):
+        """Отображает статус пункта без сохранения в модель"""
+        self.statuses[item] = (status, comment)
+        self.render_item_status(item)
+
+    def render_item_status(self, item):
+        """Приводит виджет пункта к текущему статусу"""
+        # Виджет пункта может быть еще не создан — статус применится при создании
+        data = self.checklist_items.get(item)
+        if data is None:
             return
 
-        data = self.checklist_items[item]
+        status, comment = self.statuses.get(item, (0, None))
         data["var"].set(status)
         data["comment"] = comment
 
@@ -299,28 +469,52 @@ class ChecklistTab:
                 short_comment = comment[:30] + "..." if len(comment) > 30 else comment
                 comment_label.config(text=f"💬 {short_comment}")
         else:  # None
-            btn.config(text="⚪", bg="SystemButtonFace")
+            btn.config(text="⚪", bg=data["default_bg"])
             comment_label.config(text="")
 
-        # Сохраняем в модель с задержкой для производительности
-        self.frame.after(50, lambda: self.app.save_item_status(
-            self.tab_name, item, status, comment))
+    def set_item_status(self, item, status, comment):
+        """Устанавливает статус пункта"""
+        # Проверяем, существует ли такой пункт в текущей вкладке
+        if item not in self.item_texts:
+            print(f"Предупреждение: Пункт '{item}' не найден в вкладке '{self.tab_name}'")
+            return
+
+        self.apply_statuses([(item, status, comment)], "Изменение статуса")
+
+    def apply_statuses(self, changes, description):
+        """Применяет статусы к нескольким пунктам одной операцией (одно сохранение, один шаг отмены)
+
+        Модель обновляется сразу, а виджеты большого пакета перерисовываются планировщиком по частям.
+        """
+        for item, status, comment in changes:
+            self.statuses[item] = (status, comment)
+        if len(changes) == 1:
+            self.render_item_status(changes[0][0])
+        else:
+            self.app.scheduler.spawn(self.render_items([item for item, _, _ in changes]), PRIORITY_HIGH,
+                                     name=description, owner=self)
+        self.app.save_item_statuses(self.tab_name, changes, description)
+
+    def render_items(self, items):
+        """Генератор для планировщика: перерисовывает пункты по одному"""
+        for item in items:
+            self.render_item_status(item)
+            yield
 
     def get_item_status(self, item):
         """Возвращает статус пункта"""
-        if item in self.checklist_items:
-            return self.checklist_items[item]["var"].get()
-        return 0  # Возвращаем 0 если пункт не найден
+        return self.statuses.get(item, (0, None))[0]
+
+    def get_item_comment(self, item):
+        """Возвращает комментарий пункта"""
+        return self.statuses.get(item, (0, None))[1]
 
     def mark_selected_done(self):
         """Помечает выбранные пункты как Done"""
         selected = self.get_selected_items()
         if selected:
-            # Обновляем с задержкой для плавности
-            for item in selected:
-                self.frame.after(10, lambda i=item: self.set_item_status(i, 1, None))
-                self.selection_vars[item].set(False)
-            self.frame.after(100, self.app.update_bulk_buttons)
+            self.clear_selection()
+            self.apply_statuses([(item, 1, None) for item in selected], "Done для выбранных")
 
     def mark_selected_bug(self):
         """Помечает выбранные пункты как BUG"""
@@ -368,11 +562,9 @@ class ChecklistTab:
 
             def save_comment():
                 comment = comment_entry.get(1.0, tk.END).strip()
-                for item in selected:
-                    self.frame.after(10, lambda i=item: self.set_item_status(i, 2, comment))
-                    self.selection_vars[item].set(False)
+                self.clear_selection()
                 dialog.destroy()
-                self.frame.after(100, self.app.update_bulk_buttons)
+                self.apply_statuses([(item, 2, comment) for item in selected], "BUG для выбранных")
 
             def cancel():
                 dialog.destroy()
@@ -390,17 +582,14 @@ class ChecklistTab:
         """Сбрасывает выбранные пункты"""
         selected = self.get_selected_items()
         if selected:
-            for item in selected:
-                self.frame.after(10, lambda i=item: self.set_item_status(i, 0, None))
-                self.selection_vars[item].set(False)
-            self.frame.after(100, self.app.update_bulk_buttons)
+            self.clear_selection()
+            self.apply_statuses([(item, 0, None) for item in selected], "Сброс выбранных")
 
     def mark_all_done(self):
         """Помечает все пункты как Done"""
         if messagebox.askyesno("Подтверждение",
                                f"Пометить все пункты вкладки '{self.tab_name}' как Done?"):
-            for item in self.items:
-                self.frame.after(10, lambda i=item: self.set_item_status(i, 1, None))
+            self.apply_statuses([(item, 1, None) for item in self.items], "Done для всех")
 
     def mark_all_bug(self):
         """Помечает все пункты как BUG"""
@@ -450,8 +639,7 @@ class ChecklistTab:
 
             if messagebox.askyesno("Подтверждение",
                                    f"Пометить все пункты вкладки '{self.tab_name}' как BUG?"):
-                for item in self.items:
-                    self.frame.after(10, lambda i=item: self.set_item_status(i, 2, comment))
+                self.apply_statuses([(item, 2, comment) for item in self.items], "BUG для всех")
 
         def cancel():
             dialog.destroy()
@@ -469,8 +657,7 @@ class ChecklistTab:
         """Сбрасывает все пункты"""
         if messagebox.askyesno("Подтверждение",
                                f"Сбросить все пункты вкладки '{self.tab_name}'?"):
-            for item in self.items:
-                self.frame.after(10, lambda i=item: self.set_item_status(i, 0, None))
+            self.apply_statuses([(item, 0, None) for item in self.items], "Сброс всех")
 
 
 class BulkOperationsPanel:
@@ -485,6 +672,8 @@ class BulkOperationsPanel:
         self.done_btn = None
         self.bug_btn = None
         self.reset_btn = None
+        self.undo_btn = None
+        self.redo_btn = None
         self.info_label = None
 
         self.setup_ui()
@@ -511,29 +700,54 @@ class BulkOperationsPanel:
 
         ttk.Separator(button_frame, orient=tk.HORIZONTAL).pack(pady=10, fill=tk.X)
 
+        undo_frame = ttk.Frame(button_frame)
+        undo_frame.pack(fill=tk.X)
+        self.undo_btn = ttk.Button(undo_frame, text="↶ Отменить", command=self.app.undo, state=tk.DISABLED)
+        self.undo_btn.pack(side=tk.LEFT, expand=True, fill=tk.X)
+        self.redo_btn = ttk.Button(undo_frame, text="↷ Повторить", command=self.app.redo, state=tk.DISABLED)
+        self.redo_btn.pack(side=tk.LEFT, expand=True, fill=tk.X)
+
         self.info_label = ttk.Label(button_frame, text="Применяется к\nтекущей вкладке",
                                     justify=tk.CENTER, font=('Arial', 9, 'italic'))
         self.info_label.pack(pady=5)
 
+        ttk.Separator(button_frame, orient=tk.HORIZONTAL).pack(pady=10, fill=tk.X)
+
+        # Выделение по фильтру (также Shift+щелчок, стрелки, пробел, Ctrl+A, Esc)
+        ttk.Label(button_frame, text="Выделить:").pack(anchor=tk.W)
+        select_frame = ttk.Frame(button_frame)
+        select_frame.pack(fill=tk.X)
+        for column, (text, kind) in enumerate((("Все", "all"), ("BUG", "bug"),
+                                               ("Без отметки", "none"), ("Снять", "clear"))):
+            ttk.Button(select_frame, text=text, width=6,
+                       command=lambda k=kind: self.app.select_items(k)).grid(row=column // 2, column=column % 2,
+                                                                             sticky=tk.EW)
+        select_frame.columnconfigure((0, 1), weight=1)
+
         # Стили для кнопок
         style = ttk.Style()
         style.configure("Success.TButton", foreground="green")
         style.configure("Warning.TButton", foreground="orange")
         style.configure("Danger.TButton", foreground="red")
 
-    def update_buttons(self, has_selection):
+    def update_buttons(self, selected_count):
         """Обновляет текст кнопок в зависимости от наличия выделения"""
-        if has_selection:
+        if selected_count:
             self.done_btn.config(text="✅ Пометить выбранное\nкак Done")
             self.bug_btn.config(text="⚠ Пометить выбранное\nкак BUG")
             self.reset_btn.config(text="🔄 Сбросить выбранное")
-            self.info_label.config(text="Применяется к\nвыбранным пунктам")
+            self.info_label.config(text=f"Применяется к\nвыбранным пунктам: {selected_count}")
         else:
             self.done_btn.config(text="✅ Пометить всё\nкак Done")
             self.bug_btn.config(text="⚠ Пометить всё\nкак BUG")
             self.reset_btn.config(text="🔄 Сбросить всё")
             self.info_label.config(text="Применяется к\nтекущей вкладке")
 
+    def update_undo_buttons(self, undo_description, redo_description):
+        """Включает кнопки отмены/повтора, если есть операция для них"""
+        self.undo_btn.config(state=tk.NORMAL if undo_description else tk.DISABLED)
+        self.redo_btn.config(state=tk.NORMAL if redo_description else tk.DISABLED)
+
 
 class StatsPanel:
     """Панель статистики и прогресса"""
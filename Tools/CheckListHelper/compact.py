@@ -0,0 +1,144 @@
+import sys
+from collections.abc import MutableMapping
+from config import Config
+
+_FIELDS = ("status", "comment", "updated", "attachments")
+
+
+class ItemState(MutableMapping):
+    """Компактная запись пункта в памяти
+
+    Ведет себя как словарь {"status", "comment"[, "updated"][, "attachments"]}, поэтому код,
+    работающий с записями через get/[]/update, не меняется, но хранит поля в слотах:
+    без словаря на каждый пункт запись занимает в несколько раз меньше памяти.
+    Отсутствующие "updated" и "attachments" хранятся как None.
+    """
+
+    __slots__ = _FIELDS
+
+    def __init__(self, status=0, comment=None, updated=None, attachments=None):
+        self.status = status
+        self.comment = comment
+        self.updated = updated
+        self.attachments = attachments
+
+    @classmethod
+    def from_dict(cls, state, strings=None):
+        """Создает запись из словаря; strings — общий словарь для схлопывания одинаковых строк"""
+        dedup = (strings if strings is not None else {}).setdefault
+        comment, updated, attachments = state.get("comment"), state.get("updated"), state.get("attachments")
+        return cls(state.get("status", 0),
+                   dedup(comment, comment) if comment.__class__ is str else comment,
+                   dedup(updated, updated) if updated.__class__ is str else updated,
+                   [dedup(digest, digest) for digest in attachments] if attachments else None)
+
+    def to_dict(self):
+        state = {"status": self.status, "comment": self.comment}
+        if self.updated is not None:
+            state["updated"] = self.updated
+        if self.attachments is not None:
+            state["attachments"] = self.attachments
+        return state
+
+    def get(self, key, default=None):
+        if key == "status":
+            return self.status
+        if key == "comment":
+            return self.comment
+        if key in _FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return default
+
+    def __getitem__(self, key):
+        if key in ("status", "comment"):
+            return getattr(self, key)
+        if key in _FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in _FIELDS:
+            raise KeyError(f"Недопустимое поле записи пункта: {key}")
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        setattr(self, key, 0 if key == "status" else None)
+
+    def __contains__(self, key):
+        return key in ("status", "comment") or (key in _FIELDS and getattr(self, key) is not None)
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self):
+        return 2 + (self.updated is not None) + (self.attachments is not None)
+
+    def update(self, other=(), **kwargs):
+        if other.__class__ is dict:
+            # Быстрый путь для state.update({"status": ..., "comment": ..., "updated": ...})
+            for key, value in other.items():
+                self[key] = value
+        else:
+            super().update(other)
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def __eq__(self, other):
+        if isinstance(other, ItemState):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"ItemState({self.to_dict()!r})"
+
+
+def new_item_state():
+    """Запись нового непроверенного пункта"""
+    if Config.COMPACT_MODEL:
+        return ItemState()
+    return {"status": 0, "comment": None}
+
+
+def compact_checklist(checklist, strings=None):
+    """Чек-лист {пункт: dict} -> {интернированный пункт: ItemState}"""
+    if strings is None:
+        strings = {}
+    intern = sys.intern
+    return {intern(item): state if state.__class__ is ItemState else ItemState.from_dict(state, strings)
+            for item, state in checklist.items()}
+
+
+def compact_projects(projects):
+    """Переводит загруженные данные в компактное представление на месте
+
+    Названия вкладок, объектов и идентификаторы пунктов интернируются (одна строка на все
+    проекты, объекты и шаблоны). Повторяющиеся комментарии и даты изменения схлопываются
+    через общий словарь загрузки, а не sys.intern, чтобы не жить дольше самих данных.
+    Возвращает projects.
+    """
+    intern = sys.intern
+    strings = {}
+    for project_data in projects.values():
+        project_data["checklists"] = {intern(tab_name): compact_checklist(checklist, strings)
+                                      for tab_name, checklist in project_data.get("checklists", {}).items()}
+        project_data["objects"] = {intern(object_name): object_data
+                                   for object_name, object_data in project_data.get("objects", {}).items()}
+        for object_data in project_data["objects"].values():
+            object_data["checklists"] = compact_checklist(object_data.get("checklists", {}), strings)
+    return projects
+
+
+def encode_state(value):
+    """Хук сериализации (json default / msgpack default) для записей ItemState"""
+    if isinstance(value, ItemState):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
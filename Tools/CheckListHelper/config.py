@@ -6,8 +6,29 @@ class Config:
     APP_TITLE = "Тестирование проектов - Чек-лист"
     APP_GEOMETRY = "1600x900"
     DATA_FILE = "projects_data.json"
+    HISTORY_FILE = "projects_history.jsonl"
+    # Компактное представление данных в памяти (записи пунктов на слотах, общие строки) для больших файлов
+    COMPACT_MODEL = True
+    # Формат файла данных: "json" (читаемый), "json.gz" или "msgpack" (компактные, с заголовком версии).
+    # Чтение определяет формат автоматически, поэтому его можно менять в любой момент
+    DATA_FORMAT = "json"
+    # Резервные копии файла данных (.bak1 — самая новая) и минимальный интервал между ними, с
+    DATA_BACKUPS = 3
+    DATA_BACKUP_INTERVAL = 600
     TEMPLATES_DIR = "checklist_templates"
     EXPORTS_DIR = "exports"
+    # Хранилище вложений к багам (создается рядом с файлом данных)
+    EVIDENCE_DIR = "evidence"
+    # Кэш разобранных шаблонов на диске (None — хранить только в памяти)
+    TEMPLATES_CACHE_FILE = "templates_cache.json"
+
+    # Отслеживание изменений шаблонов: "auto" (inotify, если доступен), "poll" или None.
+    # В режиме "auto" папка на сетевой файловой системе (SMB/NFS) все равно опрашивается раз в
+    # TEMPLATES_POLL_INTERVAL: inotify не сообщает о правках, сделанных с других машин.
+    # При работе через inotify раз в TEMPLATES_BACKSTOP_INTERVAL с файлы дополнительно сверяются
+    TEMPLATES_WATCH_MODE = "auto"
+    TEMPLATES_POLL_INTERVAL = 2.0
+    TEMPLATES_BACKSTOP_INTERVAL = 30.0
 
     # Цвета для статусов
     COLORS = {
@@ -20,6 +41,25 @@ class Config:
     # Настройки интерфейса
     CHECKLIST_ITEM_WIDTH = 40
     CANVAS_HEIGHT = 400
+    # Бюджет одного такта длительных операций (построение вкладок, дерева, массовые отметки), мс
+    SCHEDULER_BUDGET_MS = 8
+    # Сколько последних операций со статусами можно отменить (Ctrl+Z)
+    UNDO_LIMIT = 100
+    # Сколько изменений показывать в предпросмотре импорта из Excel (применяются все)
+    IMPORT_PREVIEW_LIMIT = 2000
+
+    # Сервер синхронизации отметок между тестировщиками ("host:port", запуск: python sync.py); None — выключено
+    SYNC_SERVER = None
+    # Локальный HTTP API для автотестов (порт, запуск вместе с программой); None — выключено
+    API_PORT = None
+    # Как часто интерфейс забирает запросы API из очереди, мс (задержка ответа на каждый запрос)
+    API_POLL_INTERVAL = 5
+    # Изменения коллег и API сохраняются в файл не чаще одного раза за этот интервал, мс
+    BACKGROUND_SAVE_DELAY = 2000
+    # Замеры длительности операций для панели разработчика (можно включить в настройках)
+    INSTRUMENTATION = False
+    # Сколько последних замеров хранить
+    SPAN_HISTORY = 200
     TREE_COLUMN_WIDTHS = {
         "name": 150,
         "version": 70,
@@ -33,11 +73,26 @@ def get_template_path(filename):
     return os.path.join(Config.TEMPLATES_DIR, filename)
 
 
+def get_templates_cache_path():
+    """Возвращает путь к файлу кэша шаблонов или None, если кэш на диске отключен"""
+    return Config.TEMPLATES_CACHE_FILE
+
+
 def get_data_path():
     """Возвращает полный путь к файлу данных"""
     return Config.DATA_FILE
 
 
+def get_history_path():
+    """Возвращает путь к журналу изменений статусов"""
+    return Config.HISTORY_FILE
+
+
+def get_evidence_dir():
+    """Возвращает путь к хранилищу вложений рядом с файлом данных"""
+    return os.path.join(os.path.dirname(os.path.abspath(get_data_path())), Config.EVIDENCE_DIR)
+
+
 def get_exports_dir():
     """Возвращает путь к директории экспорта"""
     exports_dir = Config.EXPORTS_DIR
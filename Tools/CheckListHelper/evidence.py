@@ -0,0 +1,110 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+try:
+    from PIL import Image
+
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp"}
+
+
+class EvidenceStore:
+    """Хранилище вложений (скриншоты, логи) с адресацией по содержимому
+
+    Файл сохраняется один раз под своим SHA-256: blobs/ab/abcdef...
+    В данных проектов хранятся только хэши; исходные имена — в index.json хранилища.
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.blobs_dir = os.path.join(root_dir, "blobs")
+        self.thumbs_dir = os.path.join(root_dir, "thumbs")
+        self.index_path = os.path.join(root_dir, "index.json")
+        self._index = None
+
+    def _load_index(self):
+        """Лениво загружает индекс имен файлов"""
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self.index_path):
+                try:
+                    with open(self.index_path, 'r', encoding='utf-8') as f:
+                        self._index = json.load(f)
+                except Exception as e:
+                    print(f"Ошибка загрузки индекса вложений: {e}")
+        return self._index
+
+    def _save_index(self):
+        """Сохраняет индекс имен файлов"""
+        os.makedirs(self.root_dir, exist_ok=True)
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False)
+
+    def blob_path(self, digest):
+        """Возвращает путь к файлу вложения по хэшу"""
+        return os.path.join(self.blobs_dir, digest[:2], digest)
+
+    def add_file(self, filepath):
+        """Добавляет файл в хранилище, возвращает его хэш (повторный файл не копируется)"""
+        sha = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        target = self.blob_path(digest)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Копируем во временный файл и переименовываем, чтобы не оставить обрезанный blob
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target))
+            os.close(fd)
+            shutil.copyfile(filepath, tmp_path)
+            os.replace(tmp_path, target)
+
+        index = self._load_index()
+        if digest not in index:
+            index[digest] = os.path.basename(filepath)
+            self._save_index()
+        return digest
+
+    def add_files(self, filepaths):
+        """Добавляет несколько файлов, возвращает список хэшей"""
+        return [self.add_file(filepath) for filepath in filepaths]
+
+    def get_name(self, digest):
+        """Возвращает исходное имя файла вложения"""
+        return self._load_index().get(digest, digest[:12])
+
+    def is_image(self, digest):
+        """Проверяет, является ли вложение изображением (по исходному имени)"""
+        return os.path.splitext(self.get_name(digest))[1].lower() in IMAGE_EXTENSIONS
+
+    def exists(self, digest):
+        """Проверяет наличие вложения в хранилище"""
+        return os.path.exists(self.blob_path(digest))
+
+    def thumbnail(self, digest, size=160):
+        """Возвращает путь к PNG-миниатюре изображения (создается при первом запросе)
+
+        Возвращает None, если вложение не изображение или Pillow не установлен.
+        """
+        if not PIL_AVAILABLE or not self.is_image(digest) or not self.exists(digest):
+            return None
+
+        thumb_path = os.path.join(self.thumbs_dir, f"{digest}_{size}.png")
+        if not os.path.exists(thumb_path):
+            try:
+                os.makedirs(self.thumbs_dir, exist_ok=True)
+                with Image.open(self.blob_path(digest)) as image:
+                    image.thumbnail((size, size))
+                    image.save(thumb_path, "PNG")
+            except Exception as e:
+                print(f"Ошибка создания миниатюры {digest}: {e}")
+                return None
+        return thumb_path
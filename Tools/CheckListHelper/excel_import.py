@@ -0,0 +1,205 @@
+import os
+import csv
+
+try:
+    import openpyxl
+
+    EXCEL_AVAILABLE = True
+except ImportError:
+    EXCEL_AVAILABLE = False
+
+# Текст статуса в отчете -> статус пункта
+STATUS_TEXTS = {
+    "": 0, "—": 0, "-": 0, "none": 0,
+    "done": 1, "✓": 1,
+    "bug": 2, "⚠": 2,
+}
+# Заголовки таблицы пунктов на листах, созданных ExportManager.export_to_excel
+EXPORT_HEADER = ("Пункт", "Статус")
+COMMON_SECTION = "Общие чек-листы"
+OBJECT_SECTION_PREFIX = "Объект: "
+
+
+def parse_status(value):
+    """Переводит значение ячейки статуса в 0/1/2, None если значение не распознано"""
+    if isinstance(value, (int, float)) and value in (0, 1, 2):
+        return int(value)
+    return STATUS_TEXTS.get(str(value if value is not None else "").strip().lower())
+
+
+def iter_export_sheet(rows, project_name):
+    """Разбирает строки листа отчета Excel: (проект, объект, вкладка, текст пункта, статус, комментарий)
+
+    Структура листа: заголовок секции ("Общие чек-листы" или "Объект: имя"), затем для каждой
+    вкладки — строка с ее названием, строка заголовков и строки пунктов до пустой строки.
+    """
+    object_name = None
+    tab_name = None
+    last_label = None
+    in_table = False
+
+    for row in rows:
+        cells = list(row[:3]) + [None] * (3 - len(row[:3]))
+        first = cells[0]
+        if object_name is None:
+            if first is None:
+                continue
+            title = str(first)
+            if title.startswith(OBJECT_SECTION_PREFIX):
+                object_name = title[len(OBJECT_SECTION_PREFIX):]
+            elif title == COMMON_SECTION:
+                object_name = ""
+            else:
+                return  # лист не из отчета программы
+            continue
+
+        if tuple(cells[:2]) == EXPORT_HEADER:
+            tab_name, in_table = last_label, True
+            continue
+        if first is None or str(first).strip() == "":
+            in_table = False
+            continue
+        if in_table and tab_name:
+            yield project_name, object_name, tab_name, str(first), cells[1], cells[2]
+        else:
+            last_label = str(first)
+
+
+def iter_long_rows(rows):
+    """Разбирает длинный формат (одна строка на пункт, колонки как у CSV-экспорта)"""
+    rows = iter(rows)
+    header = next(rows, None)
+    if not header:
+        return
+    columns = {str(name).strip().lower(): index for index, name in enumerate(header) if name is not None}
+    status_column = columns.get("status_text", columns.get("status"))
+
+    def cell(row, name):
+        index = columns.get(name)
+        return row[index] if index is not None and index < len(row) else None
+
+    for row in rows:
+        if not row or cell(row, "project") in (None, "") or cell(row, "item") in (None, ""):
+            continue
+        status = row[status_column] if status_column is not None and status_column < len(row) else None
+        yield (str(cell(row, "project")), str(cell(row, "object") or ""), str(cell(row, "tab") or ""),
+               str(cell(row, "item")), status, cell(row, "comment"))
+
+
+def _is_long_header(row):
+    names = {str(value).strip().lower() for value in row or () if value is not None}
+    return {"project", "tab", "item"} <= names
+
+
+def iter_status_rows(filepath, default_project=None):
+    """Потоково читает строки статусов из xlsx (отчет программы или длинный формат) или CSV
+
+    Книга открывается в режиме только для чтения, поэтому листы не загружаются в память целиком.
+    """
+    if os.path.splitext(filepath)[1].lower() == ".csv":
+        with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from iter_long_rows(csv.reader(f))
+        return
+
+    if not EXCEL_AVAILABLE:
+        raise RuntimeError("Библиотека openpyxl не установлена. Установите: pip install openpyxl")
+
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        first_sheet = workbook.worksheets[0]
+        first_row = next(first_sheet.iter_rows(max_row=1, values_only=True), None)
+        if _is_long_header(first_row):
+            yield from iter_long_rows(first_sheet.iter_rows(values_only=True))
+            return
+
+        project_name = default_project
+        if "Информация" in workbook.sheetnames:
+            for row in workbook["Информация"].iter_rows(values_only=True):
+                if row and row[0] == "Проект" and len(row) > 1 and row[1] not in (None, "—"):
+                    project_name = str(row[1])
+        for sheet in workbook.worksheets:
+            if sheet.title != "Информация":
+                yield from iter_export_sheet(sheet.iter_rows(values_only=True), project_name)
+    finally:
+        workbook.close()
+
+
+class ImportChange:
+    """Изменение пункта, найденное при импорте"""
+
+    __slots__ = ("project", "object_name", "tab", "item", "text", "old_status", "old_comment", "status", "comment")
+
+    def __init__(self, project, object_name, tab, item, text, old_status, old_comment, status, comment):
+        self.project = project
+        self.object_name = object_name
+        self.tab = tab
+        self.item = item
+        self.text = text
+        self.old_status = old_status
+        self.old_comment = old_comment
+        self.status = status
+        self.comment = comment
+
+
+def build_import_diff(model, template_manager, rows):
+    """Сопоставляет строки с пунктами модели и возвращает только отличающиеся
+
+    Пункты ищутся по тексту в шаблоне проекта; повторяющиеся тексты одной вкладки
+    сопоставляются по порядку. Возвращает (список ImportChange, статистика).
+    """
+    ids_by_template = {}
+    occurrences = {}
+    changes = []
+    stats = {"rows": 0, "unmatched": 0, "bad_status": 0}
+
+    for project_name, object_name, tab_name, text, status_value, comment in rows:
+        stats["rows"] += 1
+        project = model.projects.get(project_name)
+        if project is None or (object_name and object_name not in project.get("objects", {})):
+            stats["unmatched"] += 1
+            continue
+
+        template_name = model.get_project_template(project_name)
+        ids = ids_by_template.get(template_name)
+        if ids is None:
+            ids = ids_by_template[template_name] = {}
+            for (tab, item_id), item_text in template_manager.get_item_names(template_name).items():
+                ids.setdefault((tab, item_text), []).append(item_id)
+                # В длинном формате пункт может быть указан идентификатором
+                ids.setdefault((tab, "#" + item_id), [item_id])
+
+        candidates = ids.get((tab_name, text)) or ids.get((tab_name, "#" + text))
+        if not candidates:
+            stats["unmatched"] += 1
+            continue
+        item_id = candidates[0]
+        if len(candidates) > 1:
+            occurrence_key = (project_name, object_name, tab_name, text)
+            index = occurrences.get(occurrence_key, 0)
+            occurrences[occurrence_key] = index + 1
+            item_id = candidates[min(index, len(candidates) - 1)]
+
+        status = parse_status(status_value)
+        if status is None:
+            stats["bad_status"] += 1
+            continue
+        comment = (str(comment) if comment is not None else "") if status == 2 else None
+
+        old_status, old_comment = (model.get_object_item_status(project_name, object_name, item_id) if object_name
+                                   else model.get_project_item_status(project_name, tab_name, item_id))
+        if old_status == status and (status != 2 or (old_comment or "") == comment):
+            continue
+        changes.append(ImportChange(project_name, object_name or None, tab_name, item_id, text,
+                                    old_status, old_comment, status, comment))
+
+    return changes, stats
+
+
+def apply_import_diff(model, changes):
+    """Применяет изменения импорта пакетом на каждый проект; возвращает [(проект, изменения модели)]"""
+    by_project = {}
+    for change in changes:
+        by_project.setdefault(change.project, []).append(
+            (change.object_name, change.tab, change.item, change.status, change.comment))
+    return [(project_name, model.apply_item_statuses(project_name, batch))
+            for project_name, batch in by_project.items()]
@@ -1,10 +1,16 @@
 import os
+import csv
+import html
+import json
 from datetime import datetime
 from config import get_exports_dir
 
 try:
     import openpyxl
     from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    from openpyxl.drawing.image import Image as ExcelImage
 
     EXCEL_AVAILABLE = True
 except ImportError:
@@ -21,6 +27,7 @@ try:
     from reportlab.lib.fonts import addMapping
     from reportlab.lib.enums import TA_LEFT, TA_CENTER
     from reportlab.platypus import KeepTogether
+    from reportlab.platypus import Image as PdfImage
     import os
 
     PDF_AVAILABLE = True
@@ -61,11 +68,385 @@ except ImportError:
     DEFAULT_FONT = 'Helvetica'
 
 
+# Колонки построчного экспорта (CSV / JSON Lines)
+ROW_FIELDS = ["project", "version", "object", "tab", "item", "status", "status_text", "comment", "timestamp"]
+
+# Интерактивный HTML-отчет: страница без внешних зависимостей, данные встраиваются в виде
+# компактного JSON (строки — индексы в общую таблицу), отрисовка и фильтрация — в браузере
+HTML_REPORT_HEAD = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: Arial, sans-serif; margin: 0; color: #212121; background: #FAFAFA; }}
+header {{ position: sticky; top: 0; z-index: 1; background: #fff; border-bottom: 1px solid #ddd; padding: 8px 16px; }}
+header h1 {{ font-size: 18px; margin: 0 0 6px; }}
+header .bar {{ display: flex; flex-wrap: wrap; gap: 8px; align-items: center; }}
+header input[type=search] {{ width: 280px; }}
+main {{ padding: 8px 16px; }}
+details {{ margin: 2px 0; }}
+details details {{ margin-left: 18px; }}
+summary {{ cursor: pointer; padding: 3px 0; }}
+.project > summary {{ font-weight: bold; font-size: 16px; }}
+.counts {{ color: #757575; font-size: 12px; margin-left: 8px; }}
+.progress {{ display: inline-block; vertical-align: middle; width: 120px; height: 8px; margin-left: 8px;
+             background: #EEE; position: relative; }}
+.progress span {{ position: absolute; top: 0; bottom: 0; }}
+.progress .done {{ background: #4CAF50; left: 0; }}
+.progress .bug {{ background: #F44336; }}
+table {{ border-collapse: collapse; margin: 4px 0 8px 18px; font-size: 13px; background: #fff; }}
+th, td {{ border: 1px solid #E0E0E0; padding: 3px 6px; text-align: left; vertical-align: top; }}
+th {{ background: #F5F5F5; cursor: pointer; user-select: none; }}
+tr.s1 td.status {{ background: #C8E6C9; }}
+tr.s2 td.status {{ background: #FFCDD2; }}
+td.status {{ white-space: nowrap; }}
+.empty {{ color: #9E9E9E; margin: 12px 0; }}
+</style>
+</head>
+<body>
+<header>
+<h1>{title}</h1>
+<div class="bar">
+<input type="search" id="search" placeholder="Поиск по объектам, пунктам и комментариям">
+<label>Вкладка: <select id="tab"><option value="">Все</option></select></label>
+<label>Статус: <select id="status">
+<option value="">Все</option><option value="0">Не проверено</option>
+<option value="1">Done</option><option value="2">BUG</option></select></label>
+<label>Сортировка: <select id="sort">
+<option value="name">По имени</option><option value="bugs">Больше BUG</option>
+<option value="progress">Меньше выполнено</option></select></label>
+<button id="expand">Развернуть все</button>
+<button id="collapse">Свернуть все</button>
+<span id="total" class="counts"></span>
+</div>
+</header>
+<main id="report"></main>
+<script type="application/json" id="rows">["""
+
+HTML_REPORT_SCRIPT = r"""
+<script>
+(function () {
+  var rows = JSON.parse(document.getElementById("rows").textContent);
+  var meta = JSON.parse(document.getElementById("meta").textContent);
+  var S = meta.strings, STATUS = ["—", "Done", "BUG"];
+  var COMMON = "Общие чек-листы";
+  // Строка: [проект, объект, вкладка, пункт, статус, комментарий, обновлено] — индексы в S
+  // (-1 бывает только у комментария и даты обновления)
+  var projects = [], byProject = {};
+  rows.forEach(function (row, index) {
+    var project = byProject[row[0]];
+    if (!project) {
+      project = byProject[row[0]] = {name: S[row[0]], version: meta.versions[row[0]], objects: [], byObject: {}};
+      projects.push(project);
+    }
+    var object = project.byObject[row[1]];
+    if (!object) {
+      object = project.byObject[row[1]] = {name: S[row[1]] || COMMON, rows: []};
+      project.objects.push(object);
+    }
+    object.rows.push(index);
+  });
+  var tabs = {};
+  rows.forEach(function (row) { tabs[row[2]] = true; });
+  var tabSelect = document.getElementById("tab");
+  Object.keys(tabs).map(function (key) { return S[key]; }).sort().forEach(function (name) {
+    tabSelect.appendChild(new Option(name, name));
+  });
+
+  var filter = {text: "", tab: "", status: ""};
+
+  function matches(row, objectName) {
+    if (filter.status !== "" && row[4] !== +filter.status) return false;
+    if (filter.tab && S[row[2]] !== filter.tab) return false;
+    if (!filter.text) return true;
+    return objectName.toLowerCase().indexOf(filter.text) >= 0 ||
+      S[row[3]].toLowerCase().indexOf(filter.text) >= 0 ||
+      (row[5] >= 0 && S[row[5]].toLowerCase().indexOf(filter.text) >= 0);
+  }
+
+  function counts(indexes) {
+    var result = [0, 0, 0];
+    indexes.forEach(function (index) { result[rows[index][4]]++; });
+    return result;
+  }
+
+  function element(tag, className, text) {
+    var node = document.createElement(tag);
+    if (className) node.className = className;
+    if (text !== undefined) node.textContent = text;
+    return node;
+  }
+
+  function summaryLine(title, counted, total) {
+    var summary = element("summary", null, title);
+    var done = counted[1], bugs = counted[2], all = counted[0] + done + bugs;
+    var text = "Done: " + done + " · BUG: " + bugs + " · всего: " + all;
+    if (total !== undefined && total !== all) text += " из " + total;
+    summary.appendChild(element("span", "counts", text));
+    var bar = element("span", "progress");
+    var doneBar = element("span", "done"), bugBar = element("span", "bug");
+    doneBar.style.width = (all ? done / all * 100 : 0) + "%";
+    bugBar.style.left = doneBar.style.width;
+    bugBar.style.width = (all ? bugs / all * 100 : 0) + "%";
+    bar.appendChild(doneBar);
+    bar.appendChild(bugBar);
+    summary.appendChild(bar);
+    return summary;
+  }
+
+  var COLUMNS = [["Пункт", 3], ["Статус", 4], ["Комментарий", 5], ["Обновлено", 6]];
+
+  function value(row, column) {
+    if (column === 4) return row[4];
+    return row[column] >= 0 ? S[row[column]] : "";
+  }
+
+  function renderTable(container, indexes) {
+    var table = element("table"), head = element("tr"), body = element("tbody");
+    var sortColumn = null, ascending = true;
+    COLUMNS.forEach(function (column) {
+      var th = element("th", null, column[0]);
+      th.onclick = function () {
+        ascending = sortColumn === column[1] ? !ascending : true;
+        sortColumn = column[1];
+        indexes.sort(function (a, b) {
+          var x = value(rows[a], sortColumn), y = value(rows[b], sortColumn);
+          return (x < y ? -1 : x > y ? 1 : a - b) * (ascending ? 1 : -1);
+        });
+        fill();
+      };
+      head.appendChild(th);
+    });
+    function fill() {
+      body.textContent = "";
+      indexes.forEach(function (index) {
+        var row = rows[index], tr = element("tr", "s" + row[4]);
+        tr.appendChild(element("td", null, S[row[3]]));
+        tr.appendChild(element("td", "status", STATUS[row[4]]));
+        tr.appendChild(element("td", null, value(row, 5)));
+        tr.appendChild(element("td", null, value(row, 6)));
+        body.appendChild(tr);
+      });
+    }
+    var thead = element("thead");
+    thead.appendChild(head);
+    table.appendChild(thead);
+    table.appendChild(body);
+    fill();
+    container.appendChild(table);
+  }
+
+  function renderObject(details, indexes) {
+    // Пункты объекта отрисовываются только при первом раскрытии
+    var byTab = {}, order = [];
+    indexes.forEach(function (index) {
+      var tab = rows[index][2];
+      if (!byTab[tab]) { byTab[tab] = []; order.push(tab); }
+      byTab[tab].push(index);
+    });
+    order.forEach(function (tab) {
+      var tabDetails = element("details");
+      tabDetails.open = order.length === 1;
+      tabDetails.appendChild(summaryLine(S[tab], counts(byTab[tab])));
+      renderTable(tabDetails, byTab[tab]);
+      details.appendChild(tabDetails);
+    });
+  }
+
+  function sortObjects(list) {
+    var sort = document.getElementById("sort").value;
+    list.sort(function (a, b) {
+      if (sort === "bugs" && a.counted[2] !== b.counted[2]) return b.counted[2] - a.counted[2];
+      if (sort === "progress") {
+        var x = a.counted[1] / (a.indexes.length || 1), y = b.counted[1] / (b.indexes.length || 1);
+        if (x !== y) return x - y;
+      }
+      if (a.object.name === COMMON) return -1;
+      if (b.object.name === COMMON) return 1;
+      return a.object.name.localeCompare(b.object.name, "ru", {numeric: true});
+    });
+  }
+
+  function render() {
+    var report = document.getElementById("report"), shown = [0, 0, 0];
+    report.textContent = "";
+    projects.forEach(function (project) {
+      var list = [];
+      project.objects.forEach(function (object) {
+        var indexes = object.rows.filter(function (index) { return matches(rows[index], object.name); });
+        if (indexes.length) list.push({object: object, indexes: indexes, counted: counts(indexes)});
+      });
+      if (!list.length) return;
+      sortObjects(list);
+      var projectCounts = [0, 0, 0];
+      list.forEach(function (entry) {
+        [0, 1, 2].forEach(function (status) { projectCounts[status] += entry.counted[status]; });
+      });
+      [0, 1, 2].forEach(function (status) { shown[status] += projectCounts[status]; });
+      var details = element("details", "project");
+      details.open = true;
+      details.appendChild(summaryLine(project.name + " (версия " + project.version + ")", projectCounts));
+      list.forEach(function (entry) {
+        var objectDetails = element("details", "object");
+        objectDetails.appendChild(summaryLine(entry.object.name, entry.counted, entry.object.rows.length));
+        objectDetails.addEventListener("toggle", function () {
+          if (objectDetails.open && !objectDetails.rendered) {
+            objectDetails.rendered = true;
+            renderObject(objectDetails, entry.indexes);
+          }
+        });
+        details.appendChild(objectDetails);
+      });
+      report.appendChild(details);
+    });
+    if (!report.firstChild) report.appendChild(element("div", "empty", "Нет пунктов, подходящих под фильтр"));
+    document.getElementById("total").textContent = "Показано: " + (shown[0] + shown[1] + shown[2]) +
+      " из " + rows.length + " · Done: " + shown[1] + " · BUG: " + shown[2] + " · Сформировано: " + meta.generated;
+  }
+
+  var timer = null;
+  document.getElementById("search").addEventListener("input", function (event) {
+    clearTimeout(timer);
+    timer = setTimeout(function () { filter.text = event.target.value.trim().toLowerCase(); render(); }, 200);
+  });
+  tabSelect.addEventListener("change", function (event) { filter.tab = event.target.value; render(); });
+  document.getElementById("status").addEventListener("change", function (event) {
+    filter.status = event.target.value;
+    render();
+  });
+  document.getElementById("sort").addEventListener("change", render);
+  document.getElementById("expand").onclick = function () {
+    document.querySelectorAll("details").forEach(function (node) { node.open = true; });
+  };
+  document.getElementById("collapse").onclick = function () {
+    document.querySelectorAll("details.object").forEach(function (node) { node.open = false; });
+  };
+  render();
+})();
+</script>
+</body>
+</html>
+"""
+
+
 class ExportManager:
     """Менеджер экспорта данных"""
 
     def __init__(self):
         self.exports_dir = get_exports_dir()
+        # Хранилище вложений (EvidenceStore) для встраивания скриншотов в отчеты
+        self.evidence_store = None
+
+    def _attachment_thumbnails(self, item, size=120):
+        """Возвращает пути миниатюр изображений и имена остальных вложений пункта"""
+        thumbnails, names = [], []
+        if self.evidence_store:
+            for digest in item.get("attachments", []):
+                thumb_path = self.evidence_store.thumbnail(digest, size)
+                if thumb_path:
+                    thumbnails.append(thumb_path)
+                else:
+                    names.append(self.evidence_store.get_name(digest))
+        return thumbnails, names
+
+    def _iter_rows(self, items):
+        """Преобразует кортежи пунктов модели в строки экспорта"""
+        for project, version, object_name, tab, item, status, comment, updated in items:
+            yield [project, version, object_name, tab, item, status,
+                   "Done" if status == 1 else "BUG" if status == 2 else "—",
+                   comment or "", updated or ""]
+
+    def export_to_csv(self, items):
+        """Потоково экспортирует пункты в CSV (одна строка на пункт)
+
+        items — итератор кортежей из ProjectModel.iter_items()
+        """
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"checklist_export_{timestamp}.csv"
+            filepath = os.path.join(self.exports_dir, filename)
+
+            with open(filepath, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(ROW_FIELDS)
+                writer.writerows(self._iter_rows(items))
+
+            return True, filepath
+
+        except Exception as e:
+            return False, str(e)
+
+    def export_to_jsonl(self, items):
+        """Потоково экспортирует пункты в JSON Lines (один объект на строку)
+
+        items — итератор кортежей из ProjectModel.iter_items()
+        """
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"checklist_export_{timestamp}.jsonl"
+            filepath = os.path.join(self.exports_dir, filename)
+
+            with open(filepath, 'w', encoding='utf-8') as f:
+                for row in self._iter_rows(items):
+                    f.write(json.dumps(dict(zip(ROW_FIELDS, row)), ensure_ascii=False))
+                    f.write('\n')
+
+            return True, filepath
+
+        except Exception as e:
+            return False, str(e)
+
+    def export_to_html(self, items, title="Отчет по чек-листам"):
+        """Потоково экспортирует пункты в интерактивный HTML-отчет (один самодостаточный файл)
+
+        items — итератор кортежей из ProjectModel.iter_items(). Пункты пишутся в файл по мере
+        перебора массивами индексов в общую таблицу строк, которая дописывается после них;
+        группировка по проектам, объектам и вкладкам, фильтры и сортировка выполняются в браузере.
+        """
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"checklist_export_{timestamp}.html"
+            filepath = os.path.join(self.exports_dir, filename)
+
+            strings = {}
+            versions = {}
+
+            def index(value):
+                """Индекс строки в общей таблице (пустая строка — тоже запись таблицы)"""
+                position = strings.get(value)
+                if position is None:
+                    position = strings[value] = len(strings)
+                return position
+
+            def optional(value):
+                """Индекс необязательного поля (комментарий, дата) или -1, если его нет"""
+                return index(value) if value else -1
+
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(HTML_REPORT_HEAD.format(title=html.escape(title)))
+                separator = ""
+                for project, version, object_name, tab, item, status, comment, updated in items:
+                    project_index = index(project)
+                    if project_index not in versions:
+                        versions[project_index] = version
+                    # Проект, объект, вкладка и пункт всегда ссылаются на таблицу строк (даже пустые):
+                    # скрипт отчета обращается к ним без проверки на -1
+                    f.write(f"{separator}[{project_index},{index(object_name)},{index(tab)},{index(item or '')},"
+                            f"{status},{optional(comment)},{optional(updated)}]")
+                    separator = ","
+                f.write(']</script>\n<script type="application/json" id="meta">')
+                meta = {"strings": list(strings), "versions": versions,
+                        "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+                # "<" экранируется, чтобы текст пунктов не мог закрыть тег script
+                f.write(json.dumps(meta, ensure_ascii=False, separators=(',', ':')).replace("<", "\\u003c"))
+                f.write('</script>')
+                f.write(HTML_REPORT_SCRIPT)
+
+            return True, filepath
+
+        except Exception as e:
+            return False, str(e)
 
     def export_to_excel(self, data):
         """Экспортирует данные в Excel"""
@@ -121,6 +502,11 @@ class ExportManager:
             info_ws.column_dimensions['A'].width = 20
             info_ws.column_dimensions['B'].width = 40
 
+            # Колонка вложений нужна, только если вложения есть хотя бы у одного пункта
+            with_attachments = self.evidence_store is not None and any(
+                item.get("attachments") for section in data.get("sections", [])
+                for tab in section.get("tabs", []) for item in tab.get("items", []))
+
             # Создаем листы для каждой секции
             for section in data.get("sections", []):
                 ws = wb.create_sheet(section["name"][:30])  # Ограничиваем длину имени листа
@@ -140,7 +526,7 @@ class ExportManager:
                     row_idx += 1
 
                     # Заголовки таблицы
-                    headers = ["Пункт", "Статус", "Комментарий"]
+                    headers = ["Пункт", "Статус", "Комментарий"] + (["Вложения"] if with_attachments else [])
                     for col, header in enumerate(headers, 1):
                         cell = ws.cell(row=row_idx, column=col, value=header)
                         cell.font = header_font
@@ -166,6 +552,16 @@ class ExportManager:
                         comment_cell.border = border
                         comment_cell.alignment = Alignment(wrap_text=True)  # Включаем перенос текста
 
+                        # Вложения: миниатюры скриншотов и имена прочих файлов
+                        if with_attachments:
+                            thumbnails, names = self._attachment_thumbnails(item)
+                            ws.cell(row=row_idx, column=4, value=", ".join(names)).border = border
+                            for k, thumb_path in enumerate(thumbnails):
+                                image = ExcelImage(thumb_path)
+                                ws.add_image(image, f"{get_column_letter(5 + k)}{row_idx}")
+                                ws.row_dimensions[row_idx].height = max(ws.row_dimensions[row_idx].height or 15,
+                                                                        image.height * 0.75)
+
                         row_idx += 1
 
                     row_idx += 1
@@ -174,6 +570,8 @@ class ExportManager:
                 ws.column_dimensions['A'].width = 50
                 ws.column_dimensions['B'].width = 15
                 ws.column_dimensions['C'].width = 60  # Увеличиваем ширину колонки для комментариев
+                if with_attachments:
+                    ws.column_dimensions['D'].width = 25
 
                 # Включаем автоматический перенос для всех ячеек
                 for row in ws.iter_rows():
@@ -188,6 +586,67 @@ class ExportManager:
         except Exception as e:
             return False, str(e)
 
+    def export_heatmap_to_excel(self, matrix):
+        """Экспортирует матрицу статусов объекты × пункты (аналитика Генплана) в Excel"""
+        if not EXCEL_AVAILABLE:
+            return False, "Библиотека openpyxl не установлена. Установите: pip install openpyxl"
+
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"heatmap_export_{timestamp}.xlsx"
+            filepath = os.path.join(self.exports_dir, filename)
+
+            # write_only режим пишет строки сразу, не держа всю книгу в памяти
+            wb = openpyxl.Workbook(write_only=True)
+
+            header_font = Font(bold=True)
+            fills = {
+                1: PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"),
+                2: PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+            }
+            labels = {0: "", 1: "Done", 2: "BUG"}
+
+            def styled(ws, value, fill=None, font=None):
+                cell = WriteOnlyCell(ws, value=value)
+                if fill:
+                    cell.fill = fill
+                if font:
+                    cell.font = font
+                return cell
+
+            # Матрица
+            ws = wb.create_sheet("Матрица")
+            ws.append([styled(ws, "Объект", font=header_font)] +
+                      [styled(ws, name, font=header_font) for name in matrix.item_names] +
+                      [styled(ws, "Доля багов", font=header_font)])
+            for object_name, row, rate in zip(matrix.objects, matrix.rows, matrix.object_bug_rates):
+                ws.append([object_name] +
+                          [styled(ws, labels.get(status, ""), fills.get(status)) for status in row] +
+                          [round(rate, 4)])
+            ws.append(["Доля багов"] + [round(rate, 4) for rate in matrix.item_bug_rates])
+
+            # Рейтинг пунктов
+            ws = wb.create_sheet("Пункты")
+            ws.append([styled(ws, header, font=header_font)
+                       for header in ["Пункт", "BUG", "Done", "Доля багов"]])
+            for j in matrix.worst_items():
+                ws.append([matrix.item_names[j], matrix.item_bugs[j], matrix.item_done[j],
+                           round(matrix.item_bug_rates[j], 4)])
+
+            # Рейтинг объектов
+            ws = wb.create_sheet("Объекты")
+            ws.append([styled(ws, header, font=header_font)
+                       for header in ["Объект", "BUG", "Done", "Доля багов"]])
+            for i in matrix.worst_objects():
+                ws.append([matrix.objects[i], matrix.object_bugs[i], matrix.object_done[i],
+                           round(matrix.object_bug_rates[i], 4)])
+
+            wb.save(filepath)
+            return True, filepath
+
+        except Exception as e:
+            return False, str(e)
+
     def export_to_pdf(self, data):
         """Экспортирует данные в PDF с поддержкой русского языка и длинных комментариев"""
         if not PDF_AVAILABLE:
@@ -294,11 +753,23 @@ class ExportManager:
                         # Обрабатываем длинные комментарии
                         comment_text = item["comment"] if item["comment"] else ""
 
+                        # Вложения встраиваем в ячейку комментария под текстом
+                        comment_cell = [Paragraph(comment_text, cell_style)]
+                        thumbnails, names = self._attachment_thumbnails(item)
+                        for thumb_path in thumbnails:
+                            image = PdfImage(thumb_path)
+                            scale = min(1.0, 2.3 * inch / image.drawWidth)
+                            image.drawWidth *= scale
+                            image.drawHeight *= scale
+                            comment_cell.append(image)
+                        if names:
+                            comment_cell.append(Paragraph("📎 " + ", ".join(names), cell_style))
+
                         # Разбиваем длинный комментарий на строки с переносом
                         table_data.append([
                             Paragraph(item["name"], cell_style),
                             Paragraph(item["status_text"], cell_style),
-                            Paragraph(comment_text, cell_style)
+                            comment_cell
                         ])
 
                     # Создаем таблицу с оптимальной шириной колонок
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+from bisect import bisect_left, bisect_right
+
+
+class StatusHistory:
+    """Журнал изменений статусов пунктов (только дозапись)
+
+    Каждая строка файла — компактный JSON-массив:
+        [время, проект, объект, вкладка, пункт, старый статус, новый статус, комментарий]
+    Переименования проектов/объектов пишутся как ["R", время, проект, объект, новый проект, новый объект].
+    Для пунктов проекта объект — пустая строка, для пунктов объекта вкладка — "Генплан".
+
+    В памяти журнал индексируется по ключу (проект, объект, вкладка, пункт) и по времени,
+    поэтому запросы не перебирают всю историю. Файл читается при первом обращении.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._by_key = None
+        self._keys_by_project = None
+        self._timeline = None
+
+    def _ensure_loaded(self):
+        """Лениво читает журнал и строит индексы"""
+        if self._by_key is not None:
+            return
+        self._by_key = {}
+        self._keys_by_project = {}
+        self._timeline = []
+
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # недописанная строка после сбоя
+                if record and record[0] == "R":
+                    self._apply_rename(*record[2:])
+                else:
+                    self._index(record)
+
+        # Записи дописываются по времени, поэтому сортировка почти упорядоченных списков линейна
+        self._timeline.sort(key=lambda entry: entry[0])
+        for entries in self._by_key.values():
+            entries.sort(key=lambda entry: entry[0])
+
+    def _index(self, record):
+        """Добавляет запись в индексы"""
+        timestamp, project, object_name, tab, item, old, new, comment = record
+        key = (project, object_name, tab, item)
+        entries = self._by_key.get(key)
+        if entries is None:
+            entries = self._by_key[key] = []
+            self._keys_by_project.setdefault(project, set()).add(key)
+        entries.append((timestamp, old, new, comment))
+        self._timeline.append((timestamp, key))
+
+    def _apply_rename(self, project, object_name, new_project, new_object):
+        """Переносит историю на новое имя проекта или объекта"""
+        keys = [key for key in self._keys_by_project.get(project, ())
+                if object_name is None or key[1] == object_name]
+        for key in keys:
+            new_key = (new_project, key[1] if object_name is None else new_object, key[2], key[3])
+            self._by_key[new_key] = self._by_key.pop(key)
+            self._keys_by_project[project].discard(key)
+            self._keys_by_project.setdefault(new_project, set()).add(new_key)
+        if keys:
+            # Переименование редкое, поэтому временную шкалу просто перестраиваем
+            renamed = {key: (new_project, key[1] if object_name is None else new_object, key[2], key[3])
+                       for key in keys}
+            self._timeline = [(timestamp, renamed.get(key, key)) for timestamp, key in self._timeline]
+
+    def _append(self, records):
+        """Дописывает записи в файл журнала"""
+        if not self.path or not records:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+                f.write('\n')
+
+    def record(self, changes, timestamp=None):
+        """Записывает изменения статусов
+
+        changes — итерируемое (проект, объект, вкладка, пункт, старый, новый, комментарий).
+        """
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        if self._timeline and timestamp < self._timeline[-1][0]:
+            timestamp = self._timeline[-1][0]  # часы перевели назад — сохраняем порядок шкалы
+        records = [[timestamp, *change] for change in changes]
+        # Пока журнал не прочитан, только дописываем файл — индексы построятся при первом запросе
+        if self._by_key is not None:
+            for record in records:
+                self._index(record)
+        self._append(records)
+
+    def rename(self, project, object_name, new_project, new_object=None):
+        """Фиксирует переименование проекта (object_name=None) или объекта"""
+        if self._by_key is not None:
+            self._apply_rename(project, object_name, new_project, new_object)
+        self._append([["R", int(time.time()), project, object_name, new_project, new_object]])
+
+    def iter_records(self, since=0):
+        """Перебирает записи файла журнала (изменения и переименования) начиная с момента времени
+
+        Используется как журнал восстановления: записи читаются из файла, индексы не строятся.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record and (record[1] if record[0] == "R" else record[0]) >= since:
+                    yield record
+
+    def get_item_history(self, project, object_name, tab, item):
+        """Возвращает историю пункта: список (время, старый, новый, комментарий)"""
+        self._ensure_loaded()
+        return list(self._by_key.get((project, object_name, tab, item), []))
+
+    def first_time(self, project, object_name, tab, item, status):
+        """Возвращает время, когда пункт впервые получил статус, или None"""
+        for timestamp, _, new, _ in self.get_item_history(project, object_name, tab, item):
+            if new == status:
+                return timestamp
+        return None
+
+    def state_as_of(self, project, timestamp):
+        """Возвращает статусы пунктов проекта на момент времени: ключ -> (статус, комментарий)"""
+        self._ensure_loaded()
+        state = {}
+        for key in self._keys_by_project.get(project, ()):
+            entries = self._by_key[key]
+            # Записи пункта упорядочены по времени — ищем последнюю не позже момента
+            index = bisect_right(entries, timestamp, key=lambda entry: entry[0])
+            if index:
+                _, _, new, comment = entries[index - 1]
+                state[key] = (new, comment)
+        return state
+
+    def changed_since(self, timestamp):
+        """Возвращает ключи пунктов, менявших статус начиная с момента времени"""
+        self._ensure_loaded()
+        start = bisect_left(self._timeline, timestamp, key=lambda entry: entry[0])
+        return {key for _, key in self._timeline[start:]}
+
+    def flipped_since(self, timestamp):
+        """Возвращает пункты, чей итоговый статус отличается от статуса на момент времени"""
+        result = {}
+        for key in self.changed_since(timestamp):
+            entries = self._by_key[key]
+            index = bisect_left(entries, timestamp, key=lambda entry: entry[0])
+            before = entries[index][1]
+            after = entries[-1][2]
+            if before != after:
+                result[key] = (before, after)
+        return result
@@ -0,0 +1,272 @@
+"""Трехстороннее слияние файлов данных нескольких тестировщиков
+
+Запуск: python merge.py base.json theirs.json ours.json -o merged.json [--rule bug|latest|interactive]
+"""
+import sys
+import argparse
+from config import Config
+from storage import read_projects, write_projects
+
+# Правила разрешения конфликтов: BUG побеждает / побеждает более позднее изменение / выбор пользователя
+MERGE_RULES = ("bug", "latest", "interactive")
+
+# Вложенные данные проекта/объекта; остальные поля (версия, шаблон, даты) сливаются как скаляры
+NESTED_FIELDS = {"checklists", "objects"}
+
+
+def flatten(projects):
+    """Раскладывает данные проектов в словарь (проект, объект, вкладка, пункт) -> запись пункта
+
+    Для пунктов проекта объект — пустая строка, для пунктов объекта вкладка — "Генплан".
+    """
+    items = {}
+    for project_name, project_data in projects.items():
+        for tab_name, checklist in project_data.get("checklists", {}).items():
+            for item, state in checklist.items():
+                items[(project_name, "", tab_name, item)] = state
+        for object_name, object_data in project_data.get("objects", {}).items():
+            for item, state in object_data.get("checklists", {}).items():
+                items[(project_name, object_name, "Генплан", item)] = state
+    return items
+
+
+def _value(state):
+    """Значимая часть записи пункта (время обновления не учитывается)"""
+    if state is None:
+        return None
+    return state.get("status", 0), state.get("comment"), tuple(state.get("attachments", ()))
+
+
+def _merge_value(base, theirs, ours):
+    """Трехстороннее слияние скаляра: при изменении с обеих сторон побеждает ours"""
+    if theirs == ours or theirs == base:
+        return ours
+    return theirs
+
+
+def _with_attachments(state, *others):
+    """Возвращает копию записи с объединением вложений всех сторон (порядок сохраняется)"""
+    digests = list(state.get("attachments", ()))
+    for other in others:
+        if other:
+            digests.extend(d for d in other.get("attachments", ()) if d not in digests)
+    merged = dict(state)
+    if digests:
+        merged["attachments"] = digests
+    return merged
+
+
+def resolve_by_rule(rule, theirs, ours):
+    """Выбирает сторону конфликта по правилу: "theirs" или "ours" """
+    if theirs is None or ours is None:
+        # Удаление против изменения — изменение сохраняется
+        return "ours" if theirs is None else "theirs"
+    if rule == "bug":
+        theirs_bug, ours_bug = theirs.get("status") == 2, ours.get("status") == 2
+        if theirs_bug != ours_bug:
+            return "theirs" if theirs_bug else "ours"
+    # Время в формате "%Y-%m-%d %H:%M:%S" сравнивается как строка; при равенстве остается ours
+    return "theirs" if (theirs.get("updated") or "") > (ours.get("updated") or "") else "ours"
+
+
+class MergeConflict:
+    """Конфликт пункта, измененного по-разному в обеих копиях"""
+
+    __slots__ = ("key", "base", "theirs", "ours", "choice")
+
+    def __init__(self, key, base, theirs, ours, choice):
+        self.key = key
+        self.base = base
+        self.theirs = theirs
+        self.ours = ours
+        self.choice = choice
+
+
+def merge_items(base, theirs, ours, rule="bug", resolver=None):
+    """Сливает плоские словари пунктов за один проход по объединению ключей
+
+    resolver(key, base, theirs, ours) -> "theirs" | "ours" используется для правила "interactive";
+    без него конфликты разрешаются в пользу более позднего изменения.
+    Возвращает (слитые пункты, список MergeConflict, ключи пунктов, отличающихся от base).
+    """
+    merged = {}
+    conflicts = []
+    changed = set()
+
+    for key in theirs.keys() | ours.keys():
+        base_state, theirs_state, ours_state = base.get(key), theirs.get(key), ours.get(key)
+        base_value, theirs_value, ours_value = _value(base_state), _value(theirs_state), _value(ours_state)
+
+        if theirs_value == ours_value or theirs_value == base_value:
+            state = ours_state
+            if ours_value == base_value:
+                if state is not None:
+                    merged[key] = state
+                continue
+        elif ours_value == base_value:
+            state = theirs_state
+        elif (theirs_state is not None and ours_state is not None
+              and theirs_value[:2] == ours_value[:2]):
+            # Отличаются только вложения — объединяем без конфликта
+            state = _with_attachments(ours_state, theirs_state)
+        else:
+            if rule == "interactive" and resolver is not None:
+                choice = resolver(key, base_state, theirs_state, ours_state)
+            else:
+                choice = resolve_by_rule("latest" if rule == "interactive" else rule, theirs_state, ours_state)
+            conflicts.append(MergeConflict(key, base_state, theirs_state, ours_state, choice))
+            state = theirs_state if choice == "theirs" else ours_state
+            if state is not None:
+                state = _with_attachments(state, theirs_state, ours_state)
+
+        changed.add(key)
+        if state is not None:
+            merged[key] = state
+
+    return merged, conflicts, changed
+
+
+def _merge_containers(base, theirs, ours, touched):
+    """Сливает словари проектов или объектов: метаданные по полям, удаление — если копия его не меняла"""
+    result = {}
+    for name in theirs.keys() | ours.keys():
+        base_data, theirs_data, ours_data = base.get(name), theirs.get(name), ours.get(name)
+        if (theirs_data is None or ours_data is None) and base_data is not None and name not in touched:
+            continue  # удален в одной копии и не менялся в другой
+        theirs_data = theirs_data or ours_data
+        ours_data = ours_data or theirs_data
+        base_data = base_data or {}
+        result[name] = {field: _merge_value(base_data.get(field), theirs_data.get(field), ours_data.get(field))
+                        for field in theirs_data.keys() | ours_data.keys() if field not in NESTED_FIELDS}
+    return result
+
+
+def merge_projects(base, theirs, ours, rule="bug", resolver=None):
+    """Трехстороннее слияние данных проектов
+
+    Возвращает (слитые проекты, список MergeConflict).
+    """
+    if rule not in MERGE_RULES:
+        raise ValueError(f"Неизвестное правило слияния: {rule}")
+
+    base_items = flatten(base)
+    merged_items, conflicts, changed = merge_items(base_items, flatten(theirs), flatten(ours), rule, resolver)
+
+    # Проекты и объекты, в которых изменился и сохранился хотя бы один пункт, не удаляются
+    touched = [key for key in changed if key in merged_items]
+    touched_projects = {key[0] for key in touched}
+    touched_objects = {key[:2] for key in touched}
+
+    projects = _merge_containers(base, theirs, ours, touched_projects)
+    for project_name, project_data in projects.items():
+        project_data["checklists"] = {}
+        objects = _merge_containers(*(data.get(project_name, {}).get("objects", {}) for data in (base, theirs, ours)),
+                                    {o for p, o in touched_objects if p == project_name})
+        for object_data in objects.values():
+            object_data["checklists"] = {}
+        project_data["objects"] = objects
+
+    for (project_name, object_name, tab_name, item), state in merged_items.items():
+        project_data = projects.get(project_name)
+        if project_data is None:
+            continue
+        if not object_name:
+            project_data["checklists"].setdefault(tab_name, {})[item] = state
+        elif object_name in project_data["objects"]:
+            project_data["objects"][object_name]["checklists"][item] = state
+
+    return projects, conflicts
+
+
+def set_conflict_choice(projects, conflict, choice):
+    """Меняет сторону, выбранную для конфликта, прямо в слитых данных"""
+    conflict.choice = choice
+    project_name, object_name, tab_name, item = conflict.key
+    project_data = projects.get(project_name)
+    if project_data is None:
+        return
+    if object_name:
+        if object_name not in project_data["objects"]:
+            return
+        checklist = project_data["objects"][object_name]["checklists"]
+    else:
+        checklist = project_data["checklists"].setdefault(tab_name, {})
+
+    state = conflict.theirs if choice == "theirs" else conflict.ours
+    if state is None:
+        checklist.pop(item, None)
+    else:
+        checklist[item] = _with_attachments(state, conflict.theirs, conflict.ours)
+
+
+def diff_items(old, new):
+    """Возвращает изменения статусов между двумя версиями данных в формате StatusHistory.record"""
+    old_items = flatten(old)
+    changes = []
+    for key, state in flatten(new).items():
+        previous = old_items.get(key) or {}
+        old_status, status, comment = previous.get("status", 0), state.get("status", 0), state.get("comment")
+        if old_status != status or previous.get("comment") != comment:
+            changes.append((*key, old_status, status, comment))
+    return changes
+
+
+def describe_state(state):
+    """Короткое описание записи пункта для вывода конфликтов"""
+    if state is None:
+        return "удален"
+    status = {1: "Done", 2: "BUG"}.get(state.get("status", 0), "—")
+    comment = f" «{state['comment']}»" if state.get("comment") else ""
+    return f"{status}{comment} ({state.get('updated') or 'без даты'})"
+
+
+def ask_in_console(key, base, theirs, ours):
+    """Запрашивает выбор стороны конфликта в консоли"""
+    print(f"\nКонфликт: {' / '.join(part for part in key if part)}")
+    print(f"  база:   {describe_state(base)}")
+    print(f"  theirs: {describe_state(theirs)}")
+    print(f"  ours:   {describe_state(ours)}")
+    while True:
+        answer = input("Взять [t]heirs или [o]urs? ").strip().lower()
+        if answer in ("t", "theirs"):
+            return "theirs"
+        if answer in ("o", "ours"):
+            return "ours"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base", help="общий исходный файл")
+    parser.add_argument("theirs", help="копия другого тестировщика")
+    parser.add_argument("ours", help="своя копия")
+    parser.add_argument("-o", "--output", required=True, help="файл результата")
+    parser.add_argument("--rule", choices=MERGE_RULES, default="bug")
+    parser.add_argument("--format", choices=("json", "json.gz", "msgpack"), default=Config.DATA_FORMAT)
+    args = parser.parse_args(argv)
+
+    from models import ProjectModel
+    from templates import TemplateManager
+
+    base, theirs, ours = (read_projects(path) for path in (args.base, args.theirs, args.ours))
+    # Как при слиянии в программе: копии старой схемы (ключи — тексты) переводятся на идентификаторы,
+    # иначе один и тот же пункт с текстовым и с id-ключом попал бы в результат дважды
+    template_manager = TemplateManager()
+    for projects in (base, theirs, ours):
+        ProjectModel().migrate_item_ids(template_manager.get_template_data, projects)
+    resolver = ask_in_console if args.rule == "interactive" else None
+    projects, conflicts = merge_projects(base, theirs, ours, args.rule, resolver)
+
+    with open(args.output, 'wb') as f:
+        write_projects(f, projects, args.format)
+
+    print(f"Слияние завершено: {args.output}. Конфликтов: {len(conflicts)}")
+    if args.rule != "interactive":
+        for conflict in conflicts[:20]:
+            print(f"  {' / '.join(part for part in conflict.key if part)}: взято {conflict.choice}")
+        if len(conflicts) > 20:
+            print(f"  ... и еще {len(conflicts) - 20}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
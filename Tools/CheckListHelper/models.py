@@ -1,7 +1,20 @@
-import json
 import os
 from datetime import datetime
-from config import get_data_path
+from config import Config, get_data_path, get_history_path
+from history import StatusHistory
+from sync import SyncClient
+from storage import read_projects, save_projects, verify_file, backup_paths
+from templates import make_item_id, closest_text
+from profiling import instrumentation
+from compact import compact_projects, new_item_state
+
+
+class RecoveryError(Exception):
+    """Файл данных поврежден, и ни одна резервная копия не прошла проверку"""
+
+
+# Версия схемы данных проекта: 2 — статусы хранятся по идентификаторам пунктов
+DATA_SCHEMA_VERSION = 2
 
 
 class ProjectModel:
@@ -12,22 +25,124 @@ class ProjectModel:
         self.current_project = None
         self.current_object = None
         self.data_file = get_data_path()
+        self.history = StatusHistory(get_history_path())
+        # Клиент синхронизации с коллегами (включается start_sync)
+        self.sync = None
+        # Сообщение о восстановлении данных из резервной копии при последней загрузке
+        self.recovered = None
+        # Данные не загружены из-за ошибки: сохранение запрещено, чтобы не затереть файл пустой моделью
+        self.read_only = False
+        # Отметки пунктов, не найденных в шаблоне при последней миграции: (проект, вкладка, текст, похожий текст)
+        self.migration_orphans = []
 
-    def load_data(self):
-        """Загружает данные из файла"""
-        if os.path.exists(self.data_file):
+    def read_data(self):
+        """Читает данные из файла, не изменяя состояние модели (безопасно вызывать из фонового потока)
+
+        Если файл поврежден или отсутствует при наличии резервных копий, данные восстанавливаются
+        из последней целой копии с дозаписью изменений из журнала статусов (см. recover_data).
+        """
+        self.recovered = None
+        with instrumentation.span("load_data"):
+            if os.path.exists(self.data_file):
+                try:
+                    projects = read_projects(self.data_file)
+                except Exception as e:
+                    projects = self.recover_data(e)
+            elif any(os.path.exists(path) for path in backup_paths(self.data_file, Config.DATA_BACKUPS)):
+                projects = self.recover_data(FileNotFoundError(self.data_file))
+            else:
+                return {}
+            return compact_projects(projects) if Config.COMPACT_MODEL else projects
+
+    def recover_data(self, error):
+        """Восстанавливает данные из последней целой резервной копии и журнала статусов
+
+        Копии проверяются по контрольной сумме без разбора; к выбранной применяются изменения
+        статусов и переименования из журнала, записанные после ее сохранения. Поврежденный файл
+        данных переименовывается в .corrupt-<время>, чтобы его не перезаписало следующее сохранение.
+        Если целой копии нет, бросает RecoveryError и не трогает ни файл данных, ни копии.
+        """
+        for path in backup_paths(self.data_file, Config.DATA_BACKUPS):
+            if not os.path.exists(path):
+                continue
             try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.projects = json.load(f)
+                saved = verify_file(path)
+                projects = read_projects(path)
             except Exception:
-                self.projects = {}
+                continue
+            if saved is None:
+                saved = os.path.getmtime(path)
+            break
+        else:
+            raise RecoveryError(f"Файл данных не прочитан: {error}.\n"
+                                "Целых резервных копий не найдено; файл данных и копии оставлены без изменений.")
+
+        message = f"Файл данных не прочитан: {error}."
+        if os.path.exists(self.data_file):
+            corrupt_path = f"{self.data_file}.corrupt-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            os.replace(self.data_file, corrupt_path)
+            message += f"\nПоврежденный файл сохранен как {os.path.basename(corrupt_path)}."
+
+        replayed = self.replay_history(projects, int(saved))
+        message += (f"\nДанные восстановлены из копии {os.path.basename(path)} от "
+                    f"{datetime.fromtimestamp(saved).strftime('%Y-%m-%d %H:%M:%S')}, "
+                    f"из журнала применено изменений: {replayed}.")
+        self.recovered = message
+        return projects
+
+    def replay_history(self, projects, since):
+        """Применяет к данным записи журнала статусов начиная с момента времени; возвращает их число
+
+        Запись с тем же временем, что и копия, могла в нее уже попасть — повторное применение безвредно.
+        """
+        replayed = 0
+        for record in self.history.iter_records(since):
+            if record[0] == "R":
+                _, _, project_name, object_name, new_project, new_object = record
+                if project_name not in projects:
+                    continue
+                if object_name is None:
+                    if new_project not in projects:
+                        projects[new_project] = projects.pop(project_name)
+                else:
+                    objects = projects[project_name].get("objects", {})
+                    if object_name in objects and new_object not in objects:
+                        objects[new_object] = objects.pop(object_name)
+                replayed += 1
+                continue
+
+            timestamp, project_name, object_name, tab_name, item, _, status, comment = record
+            project = projects.get(project_name)
+            if project is None:
+                continue
+            if object_name:
+                object_data = project.get("objects", {}).get(object_name)
+                if object_data is None:
+                    continue
+                checklist = object_data.setdefault("checklists", {})
+            else:
+                checklist = project.setdefault("checklists", {}).setdefault(tab_name, {})
+            state = checklist.get(item)
+            if state is None:
+                state = checklist[item] = new_item_state()
+            state.update({"status": status, "comment": comment,
+                          "updated": datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")})
+            replayed += 1
+        return replayed
+
+    def load_data(self):
+        """Загружает данные из файла"""
+        self.projects = self.read_data()
         return self.projects
 
     def save_data(self):
-        """Сохраняет данные в файл"""
+        """Сохраняет данные в файл (в режиме только для чтения файл не трогается)"""
+        if self.read_only:
+            return False
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.projects, f, ensure_ascii=False, indent=2)
+            with instrumentation.span("save_data"):
+                save_projects(self.data_file, self.projects, Config.DATA_FORMAT,
+                              Config.DATA_BACKUPS, Config.DATA_BACKUP_INTERVAL)
             return True
         except Exception as e:
             print(f"Ошибка сохранения: {e}")
@@ -40,6 +155,7 @@ class ProjectModel:
                 "version": version,
                 "template": template,
                 "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "schema": DATA_SCHEMA_VERSION,
                 "objects": {},
                 "checklists": {}
             }
@@ -56,6 +172,30 @@ class ProjectModel:
             return True
         return False
 
+    def add_objects(self, project_name, object_names, template_data):
+        """Добавляет к проекту сразу несколько объектов с инициализированными чек-листами
+
+        Возвращает список фактически добавленных объектов (существующие пропускаются).
+        """
+        if project_name not in self.projects:
+            return []
+
+        objects = self.projects[project_name]["objects"]
+        created = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        item_ids = [item for item, _ in template_data.get("Генплан", [])]
+        added = []
+
+        for object_name in object_names:
+            if object_name in objects:
+                continue
+            objects[object_name] = {
+                "created": created,
+                "checklists": {item: new_item_state() for item in item_ids}
+            }
+            added.append(object_name)
+
+        return added
+
     def delete_project(self, project_name):
         """Удаляет проект"""
         if project_name in self.projects:
@@ -74,6 +214,7 @@ class ProjectModel:
         """Переименовывает проект"""
         if old_name in self.projects and new_name not in self.projects:
             self.projects[new_name] = self.projects.pop(old_name)
+            self.history.rename(old_name, None, new_name)
             return True
         return False
 
@@ -84,6 +225,7 @@ class ProjectModel:
                 new_name not in self.projects[project_name]["objects"]):
             self.projects[project_name]["objects"][new_name] = \
                 self.projects[project_name]["objects"].pop(old_name)
+            self.history.rename(project_name, old_name, project_name, new_name)
             return True
         return False
 
@@ -109,11 +251,8 @@ class ProjectModel:
             for tab_name, items in template_data.items():
                 if tab_name != "Генплан":
                     self.projects[project_name]["checklists"][tab_name] = {}
-                    for item in items:
-                        self.projects[project_name]["checklists"][tab_name][item] = {
-                            "status": 0,
-                            "comment": None
-                        }
+                    for item, _ in items:
+                        self.projects[project_name]["checklists"][tab_name][item] = new_item_state()
             return True
         return False
 
@@ -123,40 +262,98 @@ class ProjectModel:
                 object_name in self.projects[project_name]["objects"] and
                 "Генплан" in template_data):
             self.projects[project_name]["objects"][object_name]["checklists"] = {}
-            for item in template_data["Генплан"]:
-                self.projects[project_name]["objects"][object_name]["checklists"][item] = {
-                    "status": 0,
-                    "comment": None
-                }
+            for item, _ in template_data["Генплан"]:
+                self.projects[project_name]["objects"][object_name]["checklists"][item] = new_item_state()
             return True
         return False
 
-    def save_project_item_status(self, project_name, tab_name, item, status, comment):
-        """Сохраняет статус пункта проекта"""
-        if project_name in self.projects:
-            if tab_name not in self.projects[project_name]["checklists"]:
-                self.projects[project_name]["checklists"][tab_name] = {}
-            if item not in self.projects[project_name]["checklists"][tab_name]:
-                self.projects[project_name]["checklists"][tab_name][item] = {}
-            self.projects[project_name]["checklists"][tab_name][item] = {
-                "status": status,
-                "comment": comment
-            }
-            return True
-        return False
+    def apply_item_statuses(self, project_name, changes):
+        """Применяет пакет статусов одной операцией
 
-    def save_object_item_status(self, project_name, object_name, item, status, comment):
-        """Сохраняет статус пункта объекта"""
-        if (project_name in self.projects and
-                object_name in self.projects[project_name]["objects"]):
-            if item not in self.projects[project_name]["objects"][object_name]["checklists"]:
-                self.projects[project_name]["objects"][object_name]["checklists"][item] = {}
-            self.projects[project_name]["objects"][object_name]["checklists"][item] = {
-                "status": status,
-                "comment": comment
-            }
-            return True
-        return False
+        changes — итерируемое (объект или None для пунктов проекта, вкладка, пункт, статус, комментарий).
+        Возвращает обратимые изменения: список (объект, вкладка, пункт, старый статус,
+        старый комментарий, статус, комментарий) только для реально изменившихся пунктов.
+        """
+        project = self.projects.get(project_name)
+        if project is None:
+            return []
+
+        updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        deltas = []
+        for object_name, tab_name, item, status, comment in changes:
+            if object_name is None:
+                checklist = project["checklists"].setdefault(tab_name, {})
+            elif object_name in project["objects"]:
+                checklist = project["objects"][object_name]["checklists"]
+            else:
+                continue
+            state = checklist.get(item)
+            if state is None:
+                state = checklist[item] = new_item_state()
+            old_status, old_comment = state.get("status", 0), state.get("comment")
+            if old_status == status and old_comment == comment:
+                continue
+            # Обновляем на месте, чтобы сохранить вложения пункта
+            state.update({"status": status, "comment": comment, "updated": updated})
+            deltas.append((object_name, tab_name, item, old_status, old_comment, status, comment))
+
+        self.history.record([(project_name, "" if object_name is None else object_name, tab_name, item,
+                              old_status, status, comment)
+                             for object_name, tab_name, item, old_status, _, status, comment in deltas])
+        if self.sync is not None:
+            self.sync.push(((project_name, object_name or "", tab_name, item),
+                            {"status": status, "comment": comment, "updated": updated})
+                           for object_name, tab_name, item, _, _, status, comment in deltas)
+        return deltas
+
+    def start_sync(self, host, port, on_changes, on_rejected=None):
+        """Подключает модель к серверу синхронизации
+
+        on_changes вызывается из фонового потока со списком (ключ, запись) изменений коллег;
+        применять их к модели нужно в потоке интерфейса через apply_remote_changes.
+        on_rejected получает (ключ, наша запись, запись сервера) отклоненных сервером изменений.
+        """
+        self.stop_sync()
+        self.sync = SyncClient(host, port, on_changes, on_rejected=on_rejected)
+        self.sync.start()
+
+    def stop_sync(self):
+        """Отключает синхронизацию"""
+        if self.sync is not None:
+            self.sync.stop()
+            self.sync = None
+
+    def apply_remote_changes(self, changes):
+        """Применяет изменения коллег без повторной отправки на сервер
+
+        changes — список (ключ [проект, объект, вкладка, пункт], запись).
+        Пункты несуществующих у нас проектов и объектов пропускаются.
+        Возвращает примененные изменения: (проект, объект или None, вкладка, пункт, статус, комментарий).
+        """
+        applied, records = [], []
+        for (project_name, object_name, tab_name, item), remote in changes:
+            project = self.projects.get(project_name)
+            if project is None:
+                continue
+            if not object_name:
+                checklist = project["checklists"].setdefault(tab_name, {})
+            elif object_name in project["objects"]:
+                checklist = project["objects"][object_name]["checklists"]
+            else:
+                continue
+            state = checklist.get(item)
+            if state is None:
+                state = checklist[item] = new_item_state()
+            old_status = state.get("status", 0)
+            status, comment = remote.get("status", 0), remote.get("comment")
+            if old_status == status and state.get("comment") == comment:
+                continue
+            state.update({"status": status, "comment": comment, "updated": remote.get("updated")})
+            records.append((project_name, object_name, tab_name, item, old_status, status, comment))
+            applied.append((project_name, object_name or None, tab_name, item, status, comment))
+
+        self.history.record(records)
+        return applied
 
     def get_project_item_status(self, project_name, tab_name, item):
         """Возвращает статус пункта проекта"""
@@ -172,4 +369,173 @@ class ProjectModel:
             return (self.projects[project_name]["objects"][object_name]["checklists"][item]["status"],
                     self.projects[project_name]["objects"][object_name]["checklists"][item]["comment"])
         except:
-            return (0, None)
\ No newline at end of file
+            return (0, None)
+
+    def _item_state(self, project_name, object_name, tab_name, item):
+        """Возвращает запись пункта проекта (object_name=None) или объекта, None если ее нет"""
+        try:
+            if object_name is None:
+                return self.projects[project_name]["checklists"][tab_name][item]
+            return self.projects[project_name]["objects"][object_name]["checklists"][item]
+        except KeyError:
+            return None
+
+    def get_item_attachments(self, project_name, object_name, tab_name, item):
+        """Возвращает хэши вложений пункта"""
+        state = self._item_state(project_name, object_name, tab_name, item)
+        return list(state.get("attachments", [])) if state else []
+
+    def add_item_attachments(self, project_name, object_name, tab_name, item, digests):
+        """Добавляет хэши вложений к пункту (повторы игнорируются)"""
+        state = self._item_state(project_name, object_name, tab_name, item)
+        if state is None:
+            return False
+        attachments = state.setdefault("attachments", [])
+        attachments.extend(digest for digest in dict.fromkeys(digests) if digest not in attachments)
+        return True
+
+    def remove_item_attachment(self, project_name, object_name, tab_name, item, digest):
+        """Удаляет вложение из пункта (файл остается в хранилище)"""
+        state = self._item_state(project_name, object_name, tab_name, item)
+        if state is None or digest not in state.get("attachments", []):
+            return False
+        state["attachments"].remove(digest)
+        if not state["attachments"]:
+            del state["attachments"]
+        return True
+
+    def copy_object_statuses(self, project_name, source_object, target_objects, only_unchecked=False):
+        """Копирует статусы и комментарии объекта на несколько других объектов
+
+        При only_unchecked перезаписываются только непроверенные пункты целевых объектов.
+        Непроверенные пункты источника не копируются. Возвращает список изменений
+        в формате apply_item_statuses (пригоден для отмены).
+        """
+        objects = self.projects.get(project_name, {}).get("objects", {})
+        if source_object not in objects:
+            return []
+
+        source = {item: (state.get("status", 0), state.get("comment"))
+                  for item, state in objects[source_object]["checklists"].items()
+                  if state.get("status", 0)}
+        changes = []
+
+        for object_name in target_objects:
+            if object_name == source_object or object_name not in objects:
+                continue
+            checklists = objects[object_name]["checklists"]
+            for item, (status, comment) in source.items():
+                if only_unchecked and checklists.get(item, {}).get("status", 0) != 0:
+                    continue
+                changes.append((object_name, "Генплан", item, status, comment))
+
+        return self.apply_item_statuses(project_name, changes)
+
+    def migrate_item_ids(self, get_template_data, projects=None):
+        """Переводит проекты старого формата (ключи — тексты пунктов) на идентификаторы
+
+        get_template_data — функция, возвращающая данные шаблона по имени.
+        Тексты, отсутствующие в шаблоне, получают идентификатор по содержимому; отмеченные
+        из них (с похожим текстом в шаблоне, если он есть) попадают в migration_orphans.
+        projects — данные для миграции (по умолчанию данные модели).
+        Возвращает True, если данные были изменены.
+        """
+        if projects is None:
+            projects = self.projects
+
+        self.migration_orphans = []
+        migrated = False
+        for project_name, project_data in projects.items():
+            if project_data.get("schema", 1) >= DATA_SCHEMA_VERSION:
+                continue
+
+            template_data = get_template_data(project_data.get("template", "Основной_чеклист.txt"))
+            ids_by_tab = {tab_name: {text: item_id for item_id, text in reversed(items)}
+                          for tab_name, items in template_data.items()}
+
+            def convert(tab_name, items):
+                ids = ids_by_tab.get(tab_name, {})
+                for text, state in items.items():
+                    if text not in ids and (state.get("status", 0) or state.get("comment")):
+                        self.migration_orphans.append(
+                            (project_name, tab_name, text, closest_text(text, list(ids)) if ids else None))
+                return {ids.get(text) or make_item_id(text): state for text, state in items.items()}
+
+            project_data["checklists"] = {tab_name: convert(tab_name, items)
+                                          for tab_name, items in project_data.get("checklists", {}).items()}
+            for object_data in project_data.get("objects", {}).values():
+                object_data["checklists"] = convert("Генплан", object_data.get("checklists", {}))
+
+            project_data["schema"] = DATA_SCHEMA_VERSION
+            migrated = True
+
+        return migrated
+
+    def _template_checklists(self, template_name, tab_name):
+        """Перебирает чек-листы вкладки во всех проектах шаблона (Генплан — в объектах)"""
+        for project_data in self.projects.values():
+            if project_data.get("template", "Основной_чеклист.txt") != template_name:
+                continue
+            if tab_name == "Генплан":
+                for object_data in project_data.get("objects", {}).values():
+                    yield object_data.setdefault("checklists", {})
+            elif tab_name in project_data.get("checklists", {}):
+                yield project_data["checklists"][tab_name]
+
+    def count_marked_items(self, template_name, renames):
+        """Число отмеченных пунктов со старыми id из find_renamed_items во всех проектах шаблона"""
+        count = 0
+        for tab_name, old_id, _, _, _ in renames:
+            for checklist in self._template_checklists(template_name, tab_name):
+                state = checklist.get(old_id)
+                if state is not None and (state.get("status", 0) or state.get("comment")):
+                    count += 1
+        return count
+
+    def remap_item_ids(self, template_name, renames):
+        """Переносит отметки со старых id пунктов на новые (после исправления текста в шаблоне)
+
+        renames — список из find_renamed_items. Отметка переносится, только если у нового
+        пункта своей отметки еще нет. Возвращает число перенесенных отметок.
+        """
+        moved = 0
+        for tab_name, old_id, _, new_id, _ in renames:
+            for checklist in self._template_checklists(template_name, tab_name):
+                state = checklist.get(old_id)
+                if state is None or not (state.get("status", 0) or state.get("comment")):
+                    continue
+                current = checklist.get(new_id)
+                if current is not None and (current.get("status", 0) or current.get("comment")):
+                    continue
+                checklist[new_id] = checklist.pop(old_id)
+                moved += 1
+        return moved
+
+    def iter_items(self, project_names=None, object_name=None, common=True, objects=True):
+        """Последовательно перебирает пункты проектов без построения промежуточных структур.
+
+        Возвращает кортежи (проект, версия, объект, вкладка, id пункта, статус, комментарий, обновлено).
+        Для общих чек-листов проекта объект — пустая строка.
+        """
+        if project_names is None:
+            project_names = list(self.projects.keys())
+
+        for project_name in project_names:
+            project_data = self.projects.get(project_name)
+            if project_data is None:
+                continue
+            version = project_data.get("version", "—")
+
+            if common:
+                for tab_name, items in project_data.get("checklists", {}).items():
+                    for item, state in items.items():
+                        yield (project_name, version, "", tab_name, item,
+                               state.get("status", 0), state.get("comment"), state.get("updated"))
+
+            if objects:
+                for obj_name, obj_data in project_data.get("objects", {}).items():
+                    if object_name is not None and obj_name != object_name:
+                        continue
+                    for item, state in obj_data.get("checklists", {}).items():
+                        yield (project_name, version, obj_name, "Генплан", item,
+                               state.get("status", 0), state.get("comment"), state.get("updated"))
@@ -0,0 +1,62 @@
+import os
+import csv
+
+try:
+    import openpyxl
+
+    EXCEL_AVAILABLE = True
+except ImportError:
+    EXCEL_AVAILABLE = False
+
+# Заголовки первой колонки, которые не считаются названиями объектов
+HEADER_NAMES = {"название", "объект", "name", "object"}
+
+
+def _unique_names(values):
+    """Убирает пустые значения, заголовок и повторы, сохраняя порядок"""
+    names = []
+    seen = set()
+    for index, value in enumerate(values):
+        if value is None:
+            continue
+        name = str(value).strip()
+        if not name or (index == 0 and name.lower() in HEADER_NAMES):
+            continue
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def parse_object_names(text):
+    """Возвращает список названий объектов из текста (по одному в строке)"""
+    return _unique_names(text.splitlines())
+
+
+def read_object_names(filepath):
+    """Читает названия объектов из первой колонки CSV/XLSX или из текстового файла"""
+    extension = os.path.splitext(filepath)[1].lower()
+    try:
+        if extension == '.xlsx':
+            if not EXCEL_AVAILABLE:
+                return False, "Библиотека openpyxl не установлена. Установите: pip install openpyxl"
+            wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+            try:
+                rows = wb.active.iter_rows(min_col=1, max_col=1, values_only=True)
+                return True, _unique_names(row[0] for row in rows)
+            finally:
+                wb.close()
+
+        with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+            if extension == '.csv':
+                sample = f.read(4096)
+                f.seek(0)
+                try:
+                    dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+                except csv.Error:
+                    dialect = csv.excel
+                return True, _unique_names(row[0] if row else None for row in csv.reader(f, dialect))
+            return True, parse_object_names(f.read())
+
+    except Exception as e:
+        return False, str(e)
@@ -0,0 +1,142 @@
+import os
+import io
+import time
+import pstats
+import cProfile
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+from config import Config
+
+# Пустой контекст, возвращаемый при выключенных замерах (без создания объектов)
+_DISABLED = nullcontext()
+
+
+class _Span:
+    """Замер одного участка кода"""
+
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Прерванные операции (ошибка, отмена задачи) не искажают статистику
+        if exc_type is None:
+            self.recorder.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Instrumentation:
+    """Замеры длительности операций (сохранение, загрузка, отрисовка, экспорт)
+
+    Пока замеры выключены, span() возвращает общий пустой контекст, поэтому
+    в рабочем режиме стоимость замера — один вызов метода и проверка флага.
+    """
+
+    def __init__(self, history=200, enabled=False):
+        self.enabled = enabled
+        self.spans = deque(maxlen=history)  # (время окончания, название, длительность в секундах)
+        self.lags = deque(maxlen=history)  # задержки цикла событий Tk в секундах
+
+    def span(self, name):
+        """Контекст замера: with instrumentation.span("save_data"): ..."""
+        if not self.enabled:
+            return _DISABLED
+        return _Span(self, name)
+
+    def add(self, name, duration):
+        self.spans.append((datetime.now().strftime("%H:%M:%S"), name, duration))
+
+    def clear(self):
+        self.spans.clear()
+        self.lags.clear()
+
+    def summary(self):
+        """Сводка по названиям: {название: (количество, среднее, максимум)} в секундах"""
+        totals = {}
+        for _, name, duration in self.spans:
+            count, total, maximum = totals.get(name, (0, 0.0, 0.0))
+            totals[name] = (count + 1, total + duration, max(maximum, duration))
+        return {name: (count, total / count, maximum) for name, (count, total, maximum) in totals.items()}
+
+
+instrumentation = Instrumentation(Config.SPAN_HISTORY, Config.INSTRUMENTATION)
+
+
+class LagMonitor:
+    """Измеряет задержку цикла событий Tk: насколько позже запланированного срабатывает after()"""
+
+    def __init__(self, root, recorder, interval=100):
+        self.root = root
+        self.recorder = recorder
+        self.interval = interval
+        self._job = None
+        self._expected = 0.0
+
+    def start(self):
+        if self._job is None:
+            self._schedule()
+
+    def stop(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _schedule(self):
+        self._expected = time.perf_counter() + self.interval / 1000
+        self._job = self.root.after(self.interval, self._tick)
+
+    def _tick(self):
+        self.recorder.lags.append(max(0.0, time.perf_counter() - self._expected))
+        self._schedule()
+
+
+class ProfileCapture:
+    """Запись профиля cProfile и снимка памяти tracemalloc по запросу"""
+
+    def __init__(self):
+        self.profile = None
+
+    @property
+    def running(self):
+        return self.profile is not None
+
+    def start(self):
+        self.profile = cProfile.Profile()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.profile.enable()
+
+    def stop(self, exports_dir, top=40):
+        """Останавливает запись и сохраняет .prof и текстовую сводку; возвращает (успех, сообщение)"""
+        if self.profile is None:
+            return False, "Запись профиля не запущена"
+        profile, self.profile = self.profile, None
+        profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        try:
+            os.makedirs(exports_dir, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            prof_path = os.path.join(exports_dir, f"profile_{timestamp}.prof")
+            profile.dump_stats(prof_path)
+
+            report = io.StringIO()
+            pstats.Stats(profile, stream=report).sort_stats("cumulative").print_stats(top)
+            report.write("\nПамять (tracemalloc), крупнейшие места выделения:\n")
+            for stat in snapshot.statistics("lineno")[:top]:
+                report.write(f"{stat}\n")
+            txt_path = os.path.join(exports_dir, f"profile_{timestamp}.txt")
+            with open(txt_path, 'w', encoding='utf-8') as f:
+                f.write(report.getvalue())
+            return True, prof_path
+        except Exception as e:
+            return False, str(e)
@@ -0,0 +1,185 @@
+import os
+import re
+import json
+import fnmatch
+from xml.etree.ElementTree import iterparse
+
+# Исход теста -> статус пункта (пропущенные тесты не влияют на пункт)
+OUTCOMES = {
+    "passed": 1,
+    "failed": 2,
+    "error": 2,
+}
+# Длина сообщения об ошибке, попадающего в комментарий бага
+MESSAGE_LIMIT = 200
+
+
+def iter_junit_cases(filepath):
+    """Потоково читает JUnit XML: (имя теста, исход, сообщение) без загрузки всего файла
+
+    Обработанные элементы удаляются из дерева, поэтому память не зависит от размера отчета.
+    """
+    parents = []
+    for event, elem in iterparse(filepath, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag != "testcase":
+            continue
+        classname, name = elem.get("classname", ""), elem.get("name", "")
+        outcome, message = "passed", ""
+        for child in elem:
+            if child.tag in ("failure", "error"):
+                outcome = "failed" if child.tag == "failure" else "error"
+                message = child.get("message") or (child.text or "").strip()
+                break
+            if child.tag == "skipped":
+                outcome = "skipped"
+        yield (f"{classname}.{name}" if classname else name), outcome, message
+        if parents:
+            parents[-1].remove(elem)
+
+
+def _json_case(case):
+    """Нормализует запись теста из JSON (pytest-json-report, JSON Lines или простой список)"""
+    name = case.get("nodeid") or case.get("name", "")
+    if case.get("classname"):
+        name = f"{case['classname']}.{name}"
+    outcome = str(case.get("outcome") or case.get("status") or "passed").lower()
+    message = case.get("message") or ""
+    if not message and isinstance(case.get("call"), dict):
+        message = str(case["call"].get("longrepr") or "")
+    return name, outcome, message
+
+
+def iter_json_cases(filepath):
+    """Читает тесты из JSON-отчета
+
+    JSON Lines (.jsonl, один тест на строку) читается потоково. Обычный JSON — список тестов
+    или объект с ключом "tests" (pytest-json-report) — загружается целиком.
+    """
+    with open(filepath, 'r', encoding='utf-8-sig') as f:
+        if filepath.lower().endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield _json_case(json.loads(line))
+            return
+        data = json.load(f)
+    for case in data.get("tests", []) if isinstance(data, dict) else data:
+        yield _json_case(case)
+
+
+def iter_test_cases(filepath):
+    """Выбирает парсер отчета по расширению файла"""
+    if os.path.splitext(filepath)[1].lower() in (".json", ".jsonl"):
+        return iter_json_cases(filepath)
+    return iter_junit_cases(filepath)
+
+
+class TestMapping:
+    """Сопоставление тестов пунктам шаблона
+
+    Формат файла (по строке на правило, # — комментарий):
+        шаблон имени теста = Вкладка: текст пункта
+        шаблон имени теста = Вкладка: #id
+    Шаблон — точное имя или маска с * и ?; точные имена проверяются первыми.
+    """
+
+    def __init__(self, rules=()):
+        self.exact = {}
+        self.patterns = []
+        for pattern, target in rules:
+            if any(char in pattern for char in "*?["):
+                self.patterns.append((re.compile(fnmatch.translate(pattern)), target))
+            else:
+                self.exact.setdefault(pattern, []).append(target)
+
+    @classmethod
+    def load(cls, filepath):
+        """Читает файл сопоставления"""
+        rules = []
+        with open(filepath, 'r', encoding='utf-8-sig') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                pattern, sep, target = line.partition("=")
+                tab_name, sep2, item = target.partition(":")
+                if not sep or not sep2 or not pattern.strip() or not item.strip():
+                    raise ValueError(f"Строка {line_number}: ожидается 'тест = Вкладка: пункт'")
+                rules.append((pattern.strip(), (tab_name.strip(), item.strip())))
+        return cls(rules)
+
+    def match(self, test_name):
+        """Возвращает список (вкладка, пункт) для теста"""
+        targets = list(self.exact.get(test_name, ()))
+        targets.extend(target for regex, target in self.patterns if regex.match(test_name))
+        return targets
+
+
+def resolve_targets(template_data):
+    """Переводит цели сопоставления (текст или #id) в идентификаторы пунктов шаблона"""
+    ids = {}
+    for tab_name, items in template_data.items():
+        for item_id, text in items:
+            ids.setdefault((tab_name, text), item_id)
+            ids.setdefault((tab_name, "#" + item_id), item_id)
+    return lambda target: ids.get(target)
+
+
+def collect_test_results(cases, mapping, template_data, tabs=None):
+    """Сводит исходы тестов к статусам пунктов
+
+    Пункт получает BUG, если хотя бы один его тест упал (в комментарии — упавшие тесты),
+    и Done, если все его тесты прошли. tabs ограничивает вкладки (например, только Генплан).
+    Возвращает (статусы {(вкладка, id): (статус, комментарий)}, статистика).
+    """
+    resolve = resolve_targets(template_data)
+    failures = {}
+    passed = set()
+    stats = {"cases": 0, "unmapped": 0, "skipped": 0, "unknown_items": set()}
+
+    for test_name, outcome, message in cases:
+        stats["cases"] += 1
+        status = OUTCOMES.get(outcome)
+        if status is None:
+            stats["skipped"] += 1
+            continue
+        targets = mapping.match(test_name)
+        if not targets:
+            stats["unmapped"] += 1
+            continue
+        for target in targets:
+            if tabs is not None and target[0] not in tabs:
+                continue
+            item_id = resolve(target)
+            if item_id is None:
+                stats["unknown_items"].add(target)
+                continue
+            key = (target[0], item_id)
+            if status == 2:
+                names = failures.setdefault(key, [])
+                if len(names) < 5:
+                    names.append(f"{test_name}: {message[:MESSAGE_LIMIT]}" if message else test_name)
+            else:
+                passed.add(key)
+
+    results = {key: (1, None) for key in passed}
+    for key, names in failures.items():
+        results[key] = (2, "Автотесты: " + "; ".join(names))
+    return results, stats
+
+
+def import_test_results(model, project_name, object_name, template_data, report_path, mapping_path):
+    """Импортирует отчет автотестов в проект (object_name=None) или объект одним пакетом
+
+    Возвращает (изменения apply_item_statuses, статистика).
+    """
+    mapping = TestMapping.load(mapping_path)
+    tabs = {"Генплан"} if object_name else {tab for tab in template_data if tab != "Генплан"}
+    results, stats = collect_test_results(iter_test_cases(report_path), mapping, template_data, tabs)
+    deltas = model.apply_item_statuses(project_name, [(object_name, tab_name, item, status, comment)
+                                                      for (tab_name, item), (status, comment) in results.items()])
+    stats["items"] = len(results)
+    return deltas, stats
@@ -0,0 +1,109 @@
+import time
+import itertools
+import traceback
+from config import Config
+
+# Приоритеты задач: меньше — важнее
+PRIORITY_HIGH = 0  # отклик на действие пользователя (массовая отметка)
+PRIORITY_NORMAL = 1  # видимая работа (текущая вкладка, дерево, применение шаблона)
+PRIORITY_LOW = 2  # фоновая работа (скрытые вкладки)
+
+
+class Task:
+    """Задача планировщика: генератор, выполняемый по шагам между событиями Tk"""
+
+    __slots__ = ("generator", "priority", "name", "owner", "on_done", "turn", "cancelled", "finished")
+
+    def __init__(self, generator, priority, name, owner, on_done):
+        self.generator = generator
+        self.priority = priority
+        self.name = name
+        self.owner = owner
+        self.on_done = on_done
+        self.turn = 0
+        self.cancelled = False
+        self.finished = False
+
+    @property
+    def active(self):
+        return not (self.cancelled or self.finished)
+
+
+class TaskScheduler:
+    """Кооперативный планировщик длительных операций в цикле событий Tk
+
+    Задача — генератор, который делает небольшой шаг работы и уступает управление (yield).
+    За один такт выполняются шаги задач, пока не исчерпан бюджет времени кадра
+    (Config.SCHEDULER_BUDGET_MS), после чего цикл Tk обрабатывает ввод и перерисовку.
+    Размер порции работы подстраивается под скорость машины, а не задается числом пунктов.
+    Из задач одного приоритета шаги выполняются по очереди; более важные идут первыми.
+    """
+
+    def __init__(self, root, budget_ms=None):
+        self.root = root
+        self.budget = (budget_ms or Config.SCHEDULER_BUDGET_MS) / 1000
+        self.tasks = []
+        self._job = None
+        self._turns = itertools.count()
+
+    def spawn(self, generator, priority=PRIORITY_NORMAL, name="", owner=None, on_done=None):
+        """Ставит генератор в очередь; on_done(результат) вызывается после завершения"""
+        task = Task(generator, priority, name, owner, on_done)
+        task.turn = next(self._turns)
+        self.tasks.append(task)
+        self._wake()
+        return task
+
+    def cancel(self, task):
+        """Отменяет задачу; on_done не вызывается"""
+        if task is not None and task.active:
+            task.cancelled = True
+            task.generator.close()
+
+    def cancel_owner(self, owner):
+        """Отменяет все задачи владельца (например, закрываемой вкладки)"""
+        for task in self.tasks:
+            if task.owner is owner:
+                self.cancel(task)
+
+    def set_priority(self, task, priority):
+        if task is not None:
+            task.priority = priority
+
+    def run_until_complete(self, task):
+        """Выполняет задачу до конца без разбиения на такты (для фоновых сценариев и замеров)"""
+        while task.active:
+            self._step(task)
+
+    def pending(self, owner=None):
+        return any(task.active and (owner is None or task.owner is owner) for task in self.tasks)
+
+    def _wake(self):
+        if self._job is None:
+            self._job = self.root.after(1, self._tick)
+
+    def _tick(self):
+        self._job = None
+        deadline = time.perf_counter() + self.budget
+        while True:
+            self.tasks = [task for task in self.tasks if task.active]
+            if not self.tasks:
+                return
+            task = min(self.tasks, key=lambda t: (t.priority, t.turn))
+            task.turn = next(self._turns)
+            self._step(task)
+            if time.perf_counter() >= deadline:
+                break
+        self._wake()
+
+    def _step(self, task):
+        try:
+            next(task.generator)
+        except StopIteration as stop:
+            task.finished = True
+            if task.on_done:
+                task.on_done(stop.value)
+        except Exception:
+            task.finished = True
+            print(f"Ошибка фоновой задачи {task.name}:")
+            traceback.print_exc()
@@ -0,0 +1,232 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import tempfile
+from compact import encode_state
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# Заголовок компактного формата: сигнатура, версия формата и кодек
+MAGIC = b"CLHD"
+FORMAT_VERSION = 1
+CODECS = {
+    "json.gz": b"j",
+    "msgpack": b"m",
+}
+HEADER_SIZE = len(MAGIC) + 2
+# Подпись в конце файла: контрольная сумма данных и время сохранения
+FOOTER_MARK = b"\n#CLH-CHECKSUM "
+FOOTER_MAX_SIZE = 160
+CHUNK_SIZE = 1024 * 1024
+
+
+def detect_format(path):
+    """Определяет формат файла данных по заголовку"""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if header.startswith(MAGIC) and len(header) == HEADER_SIZE:
+        for name, codec in CODECS.items():
+            if header[-1:] == codec:
+                return name
+        raise ValueError(f"Неизвестный кодек файла данных: {header[-1:]!r}")
+    return "json"
+
+
+class ChecksumError(ValueError):
+    """Содержимое файла данных не совпадает с контрольной суммой (файл поврежден)"""
+
+
+class _HashingReader:
+    """Читает не больше limit байт файла и считает их контрольную сумму"""
+
+    def __init__(self, f, limit=None):
+        self.f = f
+        self.remaining = limit
+        self.sha = hashlib.sha256()
+
+    def read(self, size=-1):
+        if self.remaining is not None:
+            size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.f.read(size)
+        if self.remaining is not None:
+            self.remaining -= len(data)
+        self.sha.update(data)
+        return data
+
+    def drain(self):
+        """Дочитывает остаток, чтобы сумма покрывала все данные"""
+        while self.read(CHUNK_SIZE):
+            pass
+        return self.sha.hexdigest()
+
+
+class _HashingWriter:
+    """Пишет в файл и считает контрольную сумму записанного"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha = hashlib.sha256()
+
+    def write(self, data):
+        self.sha.update(data)
+        return self.f.write(data)
+
+    def flush(self):
+        self.f.flush()
+
+
+def read_footer(f):
+    """Возвращает (размер данных, sha256, время сохранения) из подписи в конце файла или None"""
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    tail_size = min(size, FOOTER_MAX_SIZE)
+    f.seek(size - tail_size)
+    tail = f.read(tail_size)
+    position = tail.rfind(FOOTER_MARK)
+    if position < 0 or not tail.endswith(b"\n"):
+        return None
+    try:
+        fields = dict(field.split(b"=", 1) for field in tail[position + len(FOOTER_MARK):].split())
+        return size - tail_size + position, fields[b"sha256"].decode('ascii'), float(fields[b"saved"])
+    except (ValueError, KeyError):
+        return None
+
+
+def verify_file(path):
+    """Быстрая проверка файла без разбора: хэширует данные и сверяет с подписью
+
+    Возвращает время сохранения из подписи или None для файлов без подписи (старые версии);
+    при несовпадении суммы бросает ChecksumError.
+    """
+    with open(path, 'rb') as f:
+        footer = read_footer(f)
+        if footer is None:
+            return None
+        f.seek(0)
+        if _HashingReader(f, footer[0]).drain() != footer[1]:
+            raise ChecksumError(f"Контрольная сумма не совпадает: {path}")
+        return footer[2]
+
+
+def read_projects(path):
+    """Читает данные проектов в любом поддерживаемом формате (с потоковой распаковкой)
+
+    Если в конце файла есть подпись, контрольная сумма считается в том же проходе, что и разбор.
+    """
+    with open(path, 'rb') as f:
+        footer = read_footer(f)
+        f.seek(0)
+        reader = _HashingReader(f, footer[0] if footer else None)
+        projects = _parse(reader)
+        if footer is not None and reader.drain() != footer[1]:
+            raise ChecksumError(f"Контрольная сумма не совпадает: {path}")
+        return projects
+
+
+def _parse(f):
+    header = f.read(HEADER_SIZE)
+    if not (header.startswith(MAGIC) and len(header) == HEADER_SIZE):
+        return json.loads((header + f.read()).decode('utf-8-sig'))
+
+    version, codec = header[len(MAGIC)], header[-1:]
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Файл данных создан более новой версией программы (формат {version})")
+
+    with gzip.GzipFile(fileobj=f, mode='rb') as stream:
+        if codec == CODECS["json.gz"]:
+            return json.load(stream)
+        if codec == CODECS["msgpack"]:
+            if not MSGPACK_AVAILABLE:
+                raise RuntimeError("Библиотека msgpack не установлена. Установите: pip install msgpack")
+            unpacker = msgpack.Unpacker(stream, raw=False, strict_map_key=False)
+            return next(unpacker)
+    raise ValueError(f"Неизвестный кодек файла данных: {codec!r}")
+
+
+def write_projects(f, projects, data_format="json"):
+    """Записывает данные проектов в открытый бинарный файл в выбранном формате
+
+    В конце добавляется подпись с контрольной суммой данных и временем сохранения.
+    """
+    if data_format != "json" and data_format not in CODECS:
+        raise ValueError(f"Неизвестный формат файла данных: {data_format}")
+    if data_format == "msgpack" and not MSGPACK_AVAILABLE:
+        raise RuntimeError("Библиотека msgpack не установлена. Установите: pip install msgpack")
+
+    out = _HashingWriter(f)
+    if data_format == "json":
+        out.write(json.dumps(projects, ensure_ascii=False, indent=2, default=encode_state).encode('utf-8'))
+    else:
+        out.write(MAGIC + bytes([FORMAT_VERSION]) + CODECS[data_format])
+        # Быстрый уровень сжатия: размер почти как у 9, а сохранение в разы быстрее
+        with gzip.GzipFile(fileobj=out, mode='wb', compresslevel=3, mtime=0) as stream:
+            if data_format == "json.gz":
+                stream.write(json.dumps(projects, ensure_ascii=False, separators=(',', ':'),
+                                        default=encode_state).encode('utf-8'))
+            else:
+                stream.write(msgpack.packb(projects, use_bin_type=True, default=encode_state))
+    f.write(FOOTER_MARK + f"sha256={out.sha.hexdigest()} saved={time.time():.3f}\n".encode('ascii'))
+
+
+def backup_paths(path, count):
+    """Пути резервных копий файла данных, от новой к старой"""
+    return [f"{path}.bak{index}" for index in range(1, count + 1)]
+
+
+def save_projects(path, projects, data_format="json", backups=0, backup_interval=0):
+    """Атомарно сохраняет данные: запись во временный файл, fsync и замена файла переименованием
+
+    Сбой во время записи оставляет прежний файл нетронутым. Перед заменой текущий файл
+    становится резервной копией .bak1 (старые сдвигаются), но не чаще раза в backup_interval секунд.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write_projects(f, projects, data_format)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp создает файл с правами 0600: сохраняем права прежнего файла (для нового — по umask)
+        os.chmod(tmp_path, _file_mode(path))
+
+        paths = backup_paths(path, backups)
+        if paths and os.path.exists(path) and (
+                not os.path.exists(paths[0]) or time.time() - os.path.getmtime(paths[0]) >= backup_interval):
+            for older, newer in zip(reversed(paths[1:]), reversed(paths[:-1])):
+                if os.path.exists(newer):
+                    os.replace(newer, older)
+            os.replace(path, paths[0])
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_directory(directory)
+
+
+def _file_mode(path):
+    """Права существующего файла или права нового файла с учетом umask"""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _fsync_directory(directory):
+    """Сбрасывает на диск запись каталога, чтобы переименование пережило сбой питания"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return  # на Windows каталог нельзя открыть для fsync
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
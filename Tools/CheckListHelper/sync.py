@@ -0,0 +1,370 @@
+"""Синхронизация отметок между тестировщиками через локальный сервер
+
+Запуск сервера: python sync.py [--host 0.0.0.0] [--port 8765]
+
+Протокол — JSON-сообщения по строкам поверх TCP. Пункт адресуется ключом
+[проект, объект, вкладка, пункт] (для пунктов проекта объект — пустая строка).
+У каждого пункта на сервере есть версия — номер последнего принятого изменения.
+Клиент отправляет изменение с версией, которую видел; если на сервере пункт уже
+изменил кто-то другой, изменение отклоняется, и клиент получает актуальное состояние
+(оптимистичная блокировка).
+
+Версии сервер хранит в файле состояния (--state), поэтому перезапуск их не сбрасывает.
+Каждый запуск сервера с новым состоянием получает свою эпоху: если клиент подключается
+с чужой эпохой (сервер потерял состояние), сервер присылает все пункты с флагом reset,
+и клиент заменяет известные ему версии серверными, а не отправляет изменения со старыми.
+Клиент не отправляет изменения, пока не применил ответ на hello.
+
+Сообщения клиента:
+    {"op": "hello", "since": N, "epoch": "..."}          — получить изменения после версии N
+    {"op": "push", "changes": [[ключ, версия, запись]]}  — отправить изменения
+Сообщения сервера:
+    {"op": "changes", "seq": N, "changes": [[ключ, версия, запись]]}   — изменения других клиентов
+        (ответ на hello дополнительно содержит "epoch" и "reset")
+    {"op": "ack", "seq": N, "accepted": [[ключ, версия]], "rejected": [[ключ, версия, запись]]}
+"""
+import os
+import sys
+import json
+import uuid
+import asyncio
+import argparse
+import threading
+
+DEFAULT_PORT = 8765
+# Максимальная длина строки протокола (пакет из тысяч изменений)
+LINE_LIMIT = 16 * 1024 * 1024
+# Задержка записи файла состояния сервера после принятых изменений, с
+STATE_SAVE_DELAY = 1.0
+
+
+def _encode(message):
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+class SyncServer:
+    """Сервер синхронизации: хранит последние версии пунктов и рассылает изменения клиентам"""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, state_path=None):
+        self.host = host
+        self.port = port
+        self.state_path = state_path
+        self.seq = 0
+        self.items = {}  # ключ -> (версия, запись)
+        self.epoch = uuid.uuid4().hex
+        self.clients = set()
+        self._server = None
+        self._save_handle = None
+        self.load_state()
+
+    def load_state(self):
+        """Восстанавливает версии пунктов из файла состояния"""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.items = {tuple(key): (version, record) for key, version, record in state["items"]}
+            self.seq = state["seq"]
+            self.epoch = state["epoch"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Не удалось прочитать состояние сервера синхронизации: {e}")
+
+    def save_state(self):
+        """Атомарно записывает версии пунктов в файл состояния"""
+        self._save_handle = None
+        if not self.state_path:
+            return
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"epoch": self.epoch, "seq": self.seq,
+                       "items": [[list(key), version, record] for key, (version, record) in self.items.items()]},
+                      f, ensure_ascii=False, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    def _schedule_save(self):
+        if self.state_path and self._save_handle is None:
+            self._save_handle = asyncio.get_running_loop().call_later(STATE_SAVE_DELAY, self.save_state)
+
+    async def start(self):
+        """Начинает принимать подключения; возвращает фактический порт (если port=0)"""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port, limit=LINE_LIMIT)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Останавливает сервер и отключает клиентов"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self.clients):
+            writer.close()
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self.save_state()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message.get("op") == "hello":
+                    self._send(writer, self._hello(message))
+                    # Рассылка начинается после ответа на hello, чтобы он пришел клиенту первым
+                    self.clients.add(writer)
+                elif message.get("op") == "push":
+                    self._push(writer, message.get("changes", []))
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            print(f"Клиент синхронизации отключен: {e}")
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    def _send(self, writer, message):
+        if not writer.is_closing():
+            writer.write(_encode(message))
+
+    def _hello(self, message):
+        """Ответ подключившемуся клиенту: изменения после его версии или все пункты при смене эпохи"""
+        reset = message.get("epoch") != self.epoch
+        since = 0 if reset else message.get("since", 0)
+        changes = [[list(key), version, state] for key, (version, state) in self.items.items() if version > since]
+        return {"op": "changes", "seq": self.seq, "changes": changes, "epoch": self.epoch, "reset": reset}
+
+    def _push(self, writer, changes):
+        """Принимает изменения, у которых версия совпадает с серверной, и рассылает их остальным"""
+        accepted, rejected, broadcast = [], [], []
+        for key, base_version, state in changes:
+            key = tuple(key)
+            version, current = self.items.get(key, (0, None))
+            if base_version != version:
+                rejected.append([list(key), version, current])
+                continue
+            self.seq += 1
+            self.items[key] = (self.seq, state)
+            accepted.append([list(key), self.seq])
+            broadcast.append([list(key), self.seq, state])
+
+        self._send(writer, {"op": "ack", "seq": self.seq, "accepted": accepted, "rejected": rejected})
+        if broadcast:
+            self._schedule_save()
+            message = {"op": "changes", "seq": self.seq, "changes": broadcast}
+            for client in self.clients:
+                if client is not writer:
+                    self._send(client, message)
+
+
+class SyncClient:
+    """Клиент синхронизации: работает в фоновом потоке со своим циклом asyncio
+
+    push() можно вызывать из потока интерфейса: изменения одного пункта схлопываются,
+    и одновременно в пути находится не более одного пакета. Изменения других клиентов
+    (а также актуальные состояния отклоненных изменений) передаются в on_changes
+    из фонового потока списком (ключ, запись). Об отклоненных сервером собственных
+    изменениях сообщает on_rejected списком (ключ, наша запись, запись сервера).
+    """
+
+    def __init__(self, host, port, on_changes, reconnect_delay=3.0, on_rejected=None):
+        self.host = host
+        self.port = port
+        self.on_changes = on_changes
+        self.on_rejected = on_rejected
+        self.reconnect_delay = reconnect_delay
+        self.versions = {}  # ключ -> последняя известная версия
+        self.seq = 0
+        self.epoch = None
+        self.connected = False
+        self._outbox = {}
+        self._loop = None
+        self._wakeup = None
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        """Запускает клиент в фоновом потоке"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_thread, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait(timeout=2)
+
+    def stop(self):
+        """Останавливает клиент"""
+        self._stopping = True
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def push(self, changes):
+        """Ставит в очередь изменения: итерируемое (ключ, запись)"""
+        changes = [(tuple(key), state) for key, state in changes]
+        if changes and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._enqueue, changes)
+
+    def _enqueue(self, changes):
+        for key, state in changes:
+            self._outbox[key] = state
+        self._wakeup.set()
+
+    def _run_thread(self, ready):
+        self._loop = asyncio.new_event_loop()
+        self._wakeup = asyncio.Event()
+        ready.set()
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+
+    async def _run(self):
+        """Подключается к серверу и переподключается при обрыве"""
+        while not self._stopping:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port, limit=LINE_LIMIT)
+            except OSError:
+                await self._sleep(self.reconnect_delay)
+                continue
+
+            self.connected = True
+            try:
+                writer.write(_encode({"op": "hello", "since": self.seq, "epoch": self.epoch}))
+                await self._session(reader, writer)
+            except (ConnectionError, ValueError) as e:
+                print(f"Синхронизация прервана: {e}")
+            finally:
+                self.connected = False
+                writer.close()
+            if not self._stopping:
+                await self._sleep(self.reconnect_delay)
+
+    async def _sleep(self, delay):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _session(self, reader, writer):
+        """Отправляет накопленные изменения и обрабатывает сообщения сервера
+
+        До ответа на hello изменения только копятся: версии пунктов еще могут быть устаревшими.
+        """
+        in_flight = None
+        synced = False
+        read_task = asyncio.ensure_future(reader.readline())
+        try:
+            while not self._stopping:
+                if synced and in_flight is None and self._outbox:
+                    in_flight, self._outbox = self._outbox, {}
+                    writer.write(_encode({"op": "push", "changes": [
+                        [list(key), self.versions.get(key, 0), state] for key, state in in_flight.items()]}))
+                    await writer.drain()
+
+                self._wakeup.clear()
+                wakeup_task = asyncio.ensure_future(self._wakeup.wait())
+                done, _ = await asyncio.wait({read_task, wakeup_task}, return_when=asyncio.FIRST_COMPLETED)
+                wakeup_task.cancel()
+                if read_task not in done:
+                    continue
+
+                line = read_task.result()
+                if not line:
+                    raise ConnectionError("сервер закрыл соединение")
+                message = json.loads(line)
+                read_task = asyncio.ensure_future(reader.readline())
+
+                if message.get("op") == "ack":
+                    self._handle_ack(message, in_flight or {})
+                    in_flight = None
+                elif message.get("op") == "changes":
+                    self._handle_changes(message)
+                    synced = True
+        finally:
+            read_task.cancel()
+            if in_flight:
+                # Неподтвержденный пакет будет отправлен заново после переподключения
+                for key, state in in_flight.items():
+                    self._outbox.setdefault(key, state)
+
+    def _handle_ack(self, message, sent):
+        # Сервер рассылает изменения по порядку, поэтому все версии до seq подтверждения уже получены
+        self.seq = max(self.seq, message.get("seq", 0))
+        for key, version in message.get("accepted", []):
+            self.versions[tuple(key)] = version
+        remote, rejected = [], []
+        for key, version, state in message.get("rejected", []):
+            key = tuple(key)
+            self.versions[key] = version
+            if key not in self._outbox and state is not None:
+                remote.append((key, state))  # пункт изменил коллега — принимаем его состояние
+                rejected.append((key, sent.get(key), state))
+        self._deliver(remote)
+        if rejected and self.on_rejected is not None:
+            try:
+                self.on_rejected(rejected)
+            except Exception as e:
+                print(f"Ошибка обработки отклоненных изменений: {e}")
+
+    def _handle_changes(self, message):
+        if "epoch" in message:
+            if message.get("reset"):
+                # Сервер потерял состояние или сменился: известные версии больше не действуют
+                self.versions = {}
+                self.seq = 0
+            self.epoch = message["epoch"]
+        remote = []
+        for key, version, state in message.get("changes", []):
+            key = tuple(key)
+            if version > self.versions.get(key, 0):
+                self.versions[key] = version
+                if key not in self._outbox:
+                    remote.append((key, state))
+        self.seq = max(self.seq, message.get("seq", 0))
+        self._deliver(remote)
+
+    def _deliver(self, remote):
+        if remote:
+            try:
+                self.on_changes(remote)
+            except Exception as e:
+                print(f"Ошибка применения изменений синхронизации: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--state", default="sync_state.json", help="файл состояния сервера (версии пунктов)")
+    args = parser.parse_args(argv)
+
+    server = SyncServer(args.host, args.port, args.state)
+
+    async def run():
+        port = await server.start()
+        print(f"Сервер синхронизации запущен на {args.host}:{port}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.save_state()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import os
+import sys
+import time
+import select
+import struct
+import threading
+
+try:
+    import ctypes
+    import ctypes.util
+
+    INOTIFY_AVAILABLE = sys.platform.startswith('linux')
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+# Флаги inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct('iIII')
+
+# Сетевые файловые системы: inotify не видит изменений, сделанных с других машин
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "afs", "ceph", "glusterfs", "lustre",
+                       "fuse.sshfs", "fuse.glusterfs", "fuse.davfs2", "davfs", "fuse.rclone"}
+
+
+def filesystem_type(path, mounts_path="/proc/mounts"):
+    """Тип файловой системы, на которой лежит путь (по /proc/mounts), или None"""
+    try:
+        with open(mounts_path, 'r', encoding='utf-8', errors='replace') as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) >= 3]
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    best, fs_type = "", None
+    for mount_point, mount_type in mounts:
+        # Пробелы в точках монтирования записаны как \040
+        mount_point = mount_point.replace("\\040", " ")
+        if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > len(best):
+            best, fs_type = mount_point, mount_type
+    return fs_type
+
+
+def is_network_filesystem(path):
+    """True, если директория лежит на сетевой файловой системе (SMB/NFS и т.п.)"""
+    return filesystem_type(path) in NETWORK_FILESYSTEMS
+
+
+class TemplateWatcher:
+    """Следит за директорией шаблонов и сообщает об изменившихся файлах
+
+    На Linux используется inotify, в остальных случаях — периодический опрос mtime/размера
+    файлов. Общая папка на сетевой файловой системе (SMB/NFS) всегда опрашивается: inotify
+    не получает событий о правках с других машин. При работе через inotify раз в
+    backstop_interval секунд дополнительно сверяется состояние файлов (None — не сверять).
+    Callback вызывается из фонового потока со множеством имен файлов.
+    """
+
+    def __init__(self, directory, on_change, mode="auto", poll_interval=2.0, debounce=0.3, backstop_interval=30.0):
+        self.directory = directory
+        self.on_change = on_change
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.backstop_interval = backstop_interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Запускает наблюдение в фоновом потоке"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+
+        use_inotify = self.mode == "auto" and not is_network_filesystem(self.directory)
+        fd = self._init_inotify() if use_inotify else None
+        if fd is not None:
+            target, args = self._run_inotify, (fd,)
+        else:
+            target, args = self._run_polling, ()
+
+        self._thread = threading.Thread(target=target, args=args, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает наблюдение"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _notify(self, names):
+        """Передает изменения подписчику, отфильтровав не-шаблоны"""
+        names = {name for name in names if name.endswith('.txt')}
+        if names:
+            try:
+                self.on_change(names)
+            except Exception as e:
+                print(f"Ошибка обработки изменений шаблонов: {e}")
+
+    def _init_inotify(self):
+        """Создает inotify-дескриптор для директории, None если недоступно"""
+        if not INOTIFY_AVAILABLE:
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                return None
+            mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+            if libc.inotify_add_watch(fd, os.fsencode(self.directory), mask) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except Exception:
+            return None
+
+    def _read_inotify(self, fd):
+        """Читает накопившиеся события и возвращает имена файлов"""
+        names = set()
+        try:
+            buffer = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            _, _, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def _run_inotify(self, fd):
+        """Цикл наблюдения через inotify (с редкой сверкой состояния файлов на случай пропуска событий)"""
+        previous = self._snapshot() if self.backstop_interval else None
+        next_check = time.monotonic() + (self.backstop_interval or 0)
+        try:
+            while not self._stop_event.is_set():
+                ready, _, _ = select.select([fd], [], [], 0.5)
+                if ready:
+                    names = self._read_inotify(fd)
+                    # Собираем серию событий (редакторы часто пишут файл в несколько шагов)
+                    while select.select([fd], [], [], self.debounce)[0]:
+                        names |= self._read_inotify(fd)
+                    self._notify(names)
+                    if previous is not None:
+                        previous = self._snapshot()
+
+                if previous is not None and time.monotonic() >= next_check:
+                    next_check = time.monotonic() + self.backstop_interval
+                    previous = self._check_snapshot(previous)
+        finally:
+            os.close(fd)
+
+    def _snapshot(self):
+        """Возвращает состояние файлов директории: имя -> (mtime, размер)"""
+        state = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.txt'):
+                        stat = entry.stat()
+                        state[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+        return state
+
+    def _run_polling(self):
+        """Цикл наблюдения периодическим опросом"""
+        previous = self._snapshot()
+        while not self._stop_event.wait(self.poll_interval):
+            previous = self._check_snapshot(previous)
+
+    def _check_snapshot(self, previous):
+        """Сравнивает состояние файлов с предыдущим, сообщает об изменениях и возвращает новое"""
+        current = self._snapshot()
+        if current != previous:
+            self._notify({name for name in previous.keys() | current.keys()
+                          if previous.get(name) != current.get(name)})
+        return current
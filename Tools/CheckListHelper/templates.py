@@ -1,6 +1,59 @@
 import os
+import re
+import sys
+import json
 import shutil
-from config import Config, get_template_path
+import difflib
+import hashlib
+from config import Config, get_template_path, get_templates_cache_path
+
+# Версия формата кэша шаблонов (увеличивается при изменении структуры данных шаблона)
+CACHE_VERSION = 4
+
+# Явный идентификатор пункта в конце строки: "- Текст пункта {#lift-floors}".
+# Фигурные скобки нужны, чтобы обычный текст вида "Квартира #5" не принимался за идентификатор
+ITEM_ID_PATTERN = re.compile(r'\s*\{#([\w.\-]+)\}$')
+
+
+def make_item_id(text):
+    """Возвращает идентификатор пункта по его тексту (для пунктов без явного {#id})"""
+    return sys.intern(hashlib.sha1(text.encode('utf-8')).hexdigest()[:8])
+
+
+def split_item(line):
+    """Разделяет строку пункта на (id, текст)"""
+    match = ITEM_ID_PATTERN.search(line)
+    if match:
+        return sys.intern(match.group(1)), line[:match.start()].strip()
+    return make_item_id(line), line
+
+
+def closest_text(text, candidates, cutoff=0.8):
+    """Самый похожий текст из candidates (вероятное исправление опечатки) или None"""
+    matches = difflib.get_close_matches(text, candidates, n=1, cutoff=cutoff)
+    return matches[0] if matches else None
+
+
+def find_renamed_items(old_data, new_data, cutoff=0.8):
+    """Находит пункты, исчезнувшие из шаблона, у которых появился пункт с похожим текстом
+
+    Без явного {#id} идентификатор вычисляется по тексту, поэтому исправление текста
+    меняет id, и отметки старого пункта остаются без пункта в шаблоне.
+    Возвращает список (вкладка, старый id, старый текст, новый id, новый текст).
+    """
+    renames = []
+    for tab_name, new_items in new_data.items():
+        old_items = old_data.get(tab_name, [])
+        old_ids = {item_id for item_id, _ in old_items}
+        new_ids = {item_id for item_id, _ in new_items}
+        added = {text: item_id for item_id, text in new_items if item_id not in old_ids}
+        for item_id, text in old_items:
+            if item_id in new_ids or not added:
+                continue
+            match = closest_text(text, list(added), cutoff)
+            if match is not None:
+                renames.append((tab_name, item_id, text, added.pop(match), match))
+    return renames
 
 
 class TemplateManager:
@@ -9,7 +62,15 @@ class TemplateManager:
     def __init__(self):
         self.available_templates = {}
         self.templates_dir = Config.TEMPLATES_DIR
+        # Разобранные блоки шаблонов и граф подключений между ними
+        self._sources = {}
+        self._dependents = {}
+        # Кэш разобранных шаблонов: путь -> (mtime, размер, данные шаблона)
+        self._cache = {}
+        self._cache_path = get_templates_cache_path()
+        self._cache_dirty = False
         self._ensure_templates_dir()
+        self._load_cache()
         self.load_templates()
 
     def _ensure_templates_dir(self):
@@ -140,39 +201,217 @@ class TemplateManager:
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(content)
 
+    def _load_cache(self):
+        """Загружает сохраненный на диске кэш разобранных шаблонов"""
+        if not self._cache_path or not os.path.exists(self._cache_path):
+            return
+        try:
+            with open(self._cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("version") != CACHE_VERSION:
+                return
+            self._cache = {path: (entry["mtime"], entry["size"], entry["blocks"])
+                           for path, entry in cached["templates"].items()}
+        except Exception as e:
+            print(f"Ошибка загрузки кэша шаблонов: {e}")
+            self._cache = {}
+
+    def _save_cache(self):
+        """Сохраняет кэш разобранных шаблонов на диск"""
+        if not self._cache_path or not self._cache_dirty:
+            return
+        try:
+            with open(self._cache_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": CACHE_VERSION,
+                           "templates": {path: {"mtime": mtime, "size": size, "blocks": blocks}
+                                         for path, (mtime, size, blocks) in self._cache.items()}},
+                          f, ensure_ascii=False)
+            self._cache_dirty = False
+        except Exception as e:
+            print(f"Ошибка сохранения кэша шаблонов: {e}")
+
+    def _load_template_file(self, filename, stat=None):
+        """Возвращает разобранные блоки шаблона, перечитывая файл только при изменении mtime/размера"""
+        filepath = get_template_path(filename)
+        if stat is None:
+            stat = os.stat(filepath)
+
+        cached = self._cache.get(filepath)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+        blocks = self.parse_blocks(content)
+        self._cache[filepath] = (stat.st_mtime_ns, stat.st_size, blocks)
+        self._cache_dirty = True
+        return blocks
+
+    def _update_dependents(self):
+        """Перестраивает граф зависимостей: шаблон -> шаблоны, которые его подключают"""
+        self._dependents = {}
+        for filename, blocks in self._sources.items():
+            for block in blocks:
+                if block[0] == "include":
+                    self._dependents.setdefault(block[1], set()).add(filename)
+
     def load_templates(self):
-        """Загружает доступные шаблоны из txt файлов"""
+        """Загружает доступные шаблоны из txt файлов (изменившиеся файлы перечитываются)"""
+        self._sources = {}
+        seen = set()
+        with os.scandir(self.templates_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.txt'):
+                    continue
+                seen.add(get_template_path(entry.name))
+                try:
+                    self._sources[entry.name] = self._load_template_file(entry.name, entry.stat())
+                except Exception as e:
+                    print(f"Ошибка загрузки шаблона {entry.name}: {e}")
+
+        # Убираем из кэша удаленные файлы
+        for filepath in [path for path in self._cache if path not in seen]:
+            del self._cache[filepath]
+            self._cache_dirty = True
+
+        self._save_cache()
+        self._update_dependents()
+
+        # Компилируем все шаблоны (подключаемые блоки разрешаются один раз)
         self.available_templates = {}
-        for filename in os.listdir(self.templates_dir):
-            if filename.endswith('.txt'):
-                filepath = get_template_path(filename)
+        for filename in sorted(self._sources):
+            self._compile(filename)
+        return self.available_templates
+
+    def reload_template(self, filename):
+        """Перечитывает один шаблон (и зависящие от него) без обхода всей директории"""
+        self.apply_changes({filename})
+        return filename in self.available_templates
+
+    def apply_changes(self, filenames):
+        """Применяет изменения файлов шаблонов, возвращает имена шаблонов, чьи данные изменились"""
+        for filename in filenames:
+            filepath = get_template_path(filename)
+            if os.path.exists(filepath):
                 try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    self.available_templates[filename] = self.parse_template(content)
+                    self._sources[filename] = self._load_template_file(filename)
                 except Exception as e:
                     print(f"Ошибка загрузки шаблона {filename}: {e}")
-        return self.available_templates
+            else:
+                self._sources.pop(filename, None)
+                if self._cache.pop(filepath, None) is not None:
+                    self._cache_dirty = True
 
-    def parse_template(self, content):
-        """Парсит содержимое шаблона в структуру чек-листов"""
+        self._save_cache()
+        self._update_dependents()
+
+        # Все шаблоны, которые прямо или транзитивно подключают измененные файлы
+        affected = set()
+        pending = list(filenames)
+        while pending:
+            filename = pending.pop()
+            if filename not in affected:
+                affected.add(filename)
+                pending.extend(self._dependents.get(filename, ()))
+
+        old_data = {filename: self.available_templates.pop(filename, None) for filename in affected}
+        for filename in affected:
+            if filename in self._sources:
+                self._compile(filename)
+
+        return {filename for filename in affected
+                if self.available_templates.get(filename) != old_data[filename]}
+
+    def _compile(self, filename, stack=()):
+        """Возвращает скомпилированный шаблон, разрешая подключения рекурсивно"""
+        if filename in self.available_templates:
+            return self.available_templates[filename]
+        if filename in stack:
+            print(f"Циклическое подключение шаблона {filename}: {' -> '.join(stack)}")
+            return {}
+        if filename not in self._sources:
+            print(f"Подключаемый шаблон {filename} не найден")
+            return {}
+
+        data = self._compile_blocks(self._sources[filename], stack + (filename,))
+        self.available_templates[filename] = data
+        return data
+
+    def _compile_blocks(self, blocks, stack=()):
+        """Собирает вкладки шаблона из блоков с учетом подключений и переопределений"""
         checklists = {}
-        current_tab = None
+        for block in blocks:
+            if block[0] == "include":
+                _, include_name, tab_name = block
+                included = self._compile(include_name, stack)
+                for name, items in included.items():
+                    if tab_name is None or name == tab_name:
+                        checklists[name] = list(items)
+            else:
+                _, tab_name, extend, items = block
+                items = [(sys.intern(item_id), text) for item_id, text in items]
+                if extend and tab_name in checklists:
+                    checklists[tab_name] = checklists[tab_name] + items
+                else:
+                    checklists[tab_name] = items
+
+        for tab_name, items in checklists.items():
+            checklists[tab_name] = self._unique_ids(items)
+        return checklists
+
+    def _unique_ids(self, items):
+        """Делает id пунктов вкладки уникальными, повторы получают суффикс ~N"""
+        used_ids = set()
+        result = []
+        for item_id, text in items:
+            if item_id in used_ids:
+                n = 2
+                while f"{item_id}~{n}" in used_ids:
+                    n += 1
+                item_id = sys.intern(f"{item_id}~{n}")
+            used_ids.add(item_id)
+            result.append((item_id, text))
+        return result
+
+    def parse_blocks(self, content):
+        """Разбирает текст шаблона на блоки: вкладки и подключения других шаблонов
+
+        "@include Файл.txt" подключает все вкладки шаблона, "@include Файл.txt: Вкладка" — одну.
+        Вкладка с тем же именем после подключения заменяет подключенную, "+Вкладка" — дополняет.
+        """
+        blocks = []
+        current_items = None
 
         for line in content.split('\n'):
             line = line.strip()
             if not line:
                 continue
 
-            if not line.startswith('-'):
-                current_tab = line
-                checklists[current_tab] = []
-            else:
-                if current_tab:
-                    item = line[1:].strip()
-                    checklists[current_tab].append(item)
+            if line.startswith('@include'):
+                include_name, _, tab_name = line[len('@include'):].partition(':')
+                include_name = include_name.strip()
+                if not include_name.endswith('.txt'):
+                    include_name += '.txt'
+                blocks.append(["include", include_name, tab_name.strip() or None])
+                current_items = None
+            elif not line.startswith('-'):
+                extend = line.startswith('+')
+                current_items = []
+                blocks.append(["tab", line[1:].strip() if extend else line, extend, current_items])
+            elif current_items is not None:
+                item_id, item = split_item(line[1:].strip())
+                current_items.append([item_id, item])
 
-        return checklists
+        return blocks
+
+    def parse_template(self, content):
+        """Парсит содержимое шаблона в структуру чек-листов
+
+        Каждый пункт — пара (id, текст). Идентификатор задается явно суффиксом "{#id}"
+        либо вычисляется по тексту; повторяющиеся в одной вкладке id получают суффикс "~N".
+        Подключения других шаблонов разрешаются по загруженной библиотеке.
+        """
+        return self._compile_blocks(self.parse_blocks(content))
 
     def get_template_names(self):
         """Возвращает список названий шаблонов"""
@@ -182,13 +421,33 @@ class TemplateManager:
         """Возвращает данные шаблона по имени"""
         return self.available_templates.get(template_name, {})
 
+    def get_item_names(self, template_name):
+        """Возвращает отображение (вкладка, id пункта) -> текст пункта"""
+        return {(tab_name, item_id): text
+                for tab_name, items in self.get_template_data(template_name).items()
+                for item_id, text in items}
+
+    def resolve_item_names(self, items, get_project_template):
+        """Подставляет тексты пунктов из шаблонов вместо идентификаторов
+
+        items — итератор кортежей из ProjectModel.iter_items(),
+        get_project_template — функция, возвращающая имя шаблона проекта.
+        """
+        names_by_template = {}
+        for row in items:
+            template_name = get_project_template(row[0])
+            names = names_by_template.get(template_name)
+            if names is None:
+                names = names_by_template[template_name] = self.get_item_names(template_name)
+            yield row[:4] + (names.get((row[3], row[4]), row[4]),) + row[5:]
+
     def import_template(self, filepath):
         """Импортирует шаблон из файла"""
         try:
             dest_filename = os.path.basename(filepath)
             dest_path = get_template_path(dest_filename)
             shutil.copy2(filepath, dest_path)
-            self.load_templates()
+            self.reload_template(dest_filename)
             return True, dest_filename
         except Exception as e:
             return False, str(e)
@@ -202,7 +461,7 @@ class TemplateManager:
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(content)
-            self.load_templates()
+            self.reload_template(filename)
             return True, filename
         except Exception as e:
             return False, str(e)
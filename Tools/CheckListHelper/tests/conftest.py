@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Файлы данных и журнала во временной папке, резервные копии без интервала"""
+    monkeypatch.setattr(Config, "DATA_FILE", str(tmp_path / "projects_data.json"))
+    monkeypatch.setattr(Config, "HISTORY_FILE", str(tmp_path / "projects_history.jsonl"))
+    monkeypatch.setattr(Config, "DATA_FORMAT", "json")
+    monkeypatch.setattr(Config, "DATA_BACKUP_INTERVAL", 0)
+    return tmp_path
+
+
+@pytest.fixture
+def template_manager(tmp_path, monkeypatch):
+    """Менеджер шаблонов с одним шаблоном t.txt во временной папке (без кэша на диске)"""
+    templates_dir = tmp_path / "checklist_templates"
+    templates_dir.mkdir()
+    (templates_dir / "t.txt").write_text("Настройки\n- Звук\n- Язык {#lang}\n\nГенплан\n- Лифт\n- Окна\n",
+                                         encoding='utf-8')
+    monkeypatch.setattr(Config, "TEMPLATES_DIR", str(templates_dir))
+    monkeypatch.setattr(Config, "TEMPLATES_CACHE_FILE", None)
+    from templates import TemplateManager
+    return TemplateManager()
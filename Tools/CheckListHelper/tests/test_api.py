@@ -0,0 +1,112 @@
+import csv
+
+import pytest
+
+from config import Config
+from api import ChecklistApi, ApiError
+from export import ExportManager
+from models import ProjectModel
+
+
+@pytest.fixture
+def api(data_dir, template_manager, monkeypatch):
+    monkeypatch.setattr(Config, "EXPORTS_DIR", str(data_dir / "exports"))
+    model = ProjectModel()
+    model.add_project("P", "1", "t.txt")
+    model.init_project_checklists("P", template_manager.get_template_data("t.txt"))
+    model.add_object("P", "O")
+    model.init_object_checklists("P", "O", template_manager.get_template_data("t.txt"))
+    return ChecklistApi(model, template_manager, ExportManager())
+
+
+def call(api, method, path, body=None, query=None):
+    return api.route(method, path, query or {}, {} if body is None else body)
+
+
+def error_code(api, method, path, body=None):
+    with pytest.raises(ApiError) as error:
+        call(api, method, path, body)
+    return error.value.code
+
+
+def test_post_by_id_and_text_then_get(api):
+    result = call(api, "POST", "/api/projects/P/statuses", {"changes": [
+        {"tab": "Настройки", "item": "lang", "status": "bug", "comment": "нет перевода"},
+        {"object": "O", "text": "Лифт", "status": 1},
+    ]})
+
+    assert result == {"changed": 2}
+    statuses = {row["item"]: row for row in call(api, "GET", "/api/projects/P/statuses")}
+    assert statuses["lang"]["text"] == "Язык"
+    assert (statuses["lang"]["status"], statuses["lang"]["comment"]) == (2, "нет перевода")
+    objects = call(api, "GET", "/api/projects/P/statuses", query={"object": ["O"]})
+    assert {row["text"]: row["status"] for row in objects} == {"Лифт": 1, "Окна": 0}
+    assert api.take_changes()[0][0] == "P" and api.take_changes() == []
+
+
+def test_get_output_can_be_posted_back(api):
+    call(api, "POST", "/api/projects/P/statuses", {"changes": [{"tab": "Настройки", "text": "Звук", "status": 1}]})
+    rows = call(api, "GET", "/api/projects/P/statuses")
+
+    assert call(api, "POST", "/api/projects/P/statuses", {"changes": rows}) == {"changed": 0}
+
+
+@pytest.mark.parametrize("body, code", [
+    ([], 400),
+    ({"changes": "abc"}, 400),
+    ({"changes": ["abc"]}, 400),
+    ({"changes": [{"tab": "Настройки", "item": "lang", "status": True}]}, 400),
+    ({"changes": [{"tab": "Настройки", "item": "lang", "status": "1"}]}, 400),
+    ({"changes": [{"tab": "Настройки", "item": "lang", "status": 3}]}, 400),
+    ({"changes": [{"tab": "Настройки", "status": 1}]}, 400),
+    ({"changes": [{"tab": 5, "item": "lang", "status": 1}]}, 400),
+    ({"changes": [{"item": "lang", "status": 1}]}, 400),
+    ({"changes": [{"tab": "Настройки", "item": "nope", "status": 1}]}, 404),
+    ({"changes": [{"tab": "Настройки", "text": "Нет такого", "status": 1}]}, 404),
+    ({"changes": [{"object": "X", "text": "Лифт", "status": 1}]}, 404),
+])
+def test_invalid_changes_rejected(api, body, code):
+    assert error_code(api, "POST", "/api/projects/P/statuses", body) == code
+    assert api.take_changes() == []
+
+
+def test_batch_with_error_changes_nothing(api):
+    body = {"changes": [{"tab": "Настройки", "item": "lang", "status": 1},
+                        {"tab": "Настройки", "item": "nope", "status": 1}]}
+
+    assert error_code(api, "POST", "/api/projects/P/statuses", body) == 404
+    assert api.project_model.projects["P"]["checklists"]["Настройки"]["lang"]["status"] == 0
+
+
+def test_routes(api):
+    assert call(api, "GET", "/api/projects") == [{"name": "P", "version": "1", "template": "t.txt", "objects": 1}]
+    assert call(api, "GET", "/api/projects/P/objects") == ["O"]
+    assert error_code(api, "GET", "/api/projects/X/objects") == 404
+    assert error_code(api, "DELETE", "/api/projects/P/statuses") == 405
+    assert error_code(api, "GET", "/other") == 404
+
+
+def test_template_change_needs_invalidation(api, template_manager):
+    body = {"changes": [{"tab": "Настройки", "text": "Громкость", "status": 1}]}
+    assert error_code(api, "POST", "/api/projects/P/statuses", body) == 404
+
+    with open(Config.TEMPLATES_DIR + "/t.txt", 'w', encoding='utf-8') as f:
+        f.write("Настройки\n- Громкость\n")
+    template_manager.reload_template("t.txt")
+    assert error_code(api, "POST", "/api/projects/P/statuses", body) == 404  # кэш API еще прежний
+
+    api.invalidate_templates(["t.txt"])
+    assert call(api, "POST", "/api/projects/P/statuses", body) == {"changed": 1}
+
+
+def test_export_csv(api):
+    call(api, "POST", "/api/projects/P/statuses", {"changes": [{"object": "O", "text": "Окна", "status": 2}]})
+
+    path = call(api, "POST", "/api/export", {"format": "csv", "projects": ["P"]})["path"]
+
+    with open(path, encoding='utf-8-sig') as f:
+        text = f.read()
+    assert "Окна" in text
+    assert error_code(api, "POST", "/api/export", {"format": "xlsx"}) == 400
+    assert error_code(api, "POST", "/api/export", {"projects": "P"}) == 400
+    assert error_code(api, "POST", "/api/export", {"projects": ["X"]}) == 404
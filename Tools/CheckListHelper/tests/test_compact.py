@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from compact import ItemState, compact_projects, encode_state
+
+
+def test_behaves_like_dict():
+    state = ItemState()
+    assert dict(state) == {"status": 0, "comment": None}
+    assert "updated" not in state and len(state) == 2
+
+    state.update({"status": 2, "comment": "bug", "updated": "2024-01-01 10:00:00"})
+    assert state == {"status": 2, "comment": "bug", "updated": "2024-01-01 10:00:00"}
+    assert state["updated"] == "2024-01-01 10:00:00" and len(state) == 3
+    assert state.get("attachments", []) == []
+    with pytest.raises(KeyError):
+        state["attachments"]
+
+    del state["updated"]
+    assert "updated" not in state
+
+
+def test_unknown_field_rejected():
+    with pytest.raises(KeyError):
+        ItemState()["priority"] = 1
+
+
+def test_from_dict_shares_strings():
+    strings = {}
+    first = ItemState.from_dict({"status": 2, "comment": "".join(["сломано"])}, strings)
+    second = ItemState.from_dict({"status": 2, "comment": "".join(["слом", "ано"])}, strings)
+
+    assert first.comment is second.comment
+    assert ItemState.from_dict({"status": 1, "attachments": ["h"]}).to_dict() == {
+        "status": 1, "comment": None, "attachments": ["h"]}
+
+
+def test_compact_projects_serializes_back():
+    projects = {"P": {"version": "1",
+                      "checklists": {"Tab": {"a": {"status": 1, "comment": None}}},
+                      "objects": {"O": {"checklists": {"b": {"status": 2, "comment": "x", "updated": "t"}}}}}}
+    original = json.loads(json.dumps(projects))
+
+    compact_projects(projects)
+
+    assert isinstance(projects["P"]["objects"]["O"]["checklists"]["b"], ItemState)
+    assert json.loads(json.dumps(projects, default=encode_state)) == original
+    with pytest.raises(TypeError):
+        encode_state(object())
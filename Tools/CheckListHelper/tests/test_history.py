@@ -0,0 +1,68 @@
+from history import StatusHistory
+
+
+def make_history(path):
+    history = StatusHistory(str(path))
+    history.record([("P", "O", "Генплан", "a", 0, 1, None), ("P", "", "Tab", "b", 0, 2, "bug")], timestamp=100)
+    history.record([("P", "O", "Генплан", "a", 1, 2, "regress")], timestamp=200)
+    history.record([("P", "O", "Генплан", "a", 2, 1, None), ("Q", "", "Tab", "c", 0, 1, None)], timestamp=300)
+    return history
+
+
+def test_state_as_of(tmp_path):
+    history = make_history(tmp_path / "h.jsonl")
+
+    assert history.state_as_of("P", 50) == {}
+    assert history.state_as_of("P", 150) == {("P", "O", "Генплан", "a"): (1, None), ("P", "", "Tab", "b"): (2, "bug")}
+    assert history.state_as_of("P", 250)[("P", "O", "Генплан", "a")] == (2, "regress")
+
+
+def test_changed_and_flipped_since(tmp_path):
+    history = make_history(tmp_path / "h.jsonl")
+
+    assert history.changed_since(200) == {("P", "O", "Генплан", "a"), ("Q", "", "Tab", "c")}
+    # Пункт a вернулся к прежнему статусу — не считается измененным
+    assert history.flipped_since(200) == {("Q", "", "Tab", "c"): (0, 1)}
+    assert history.flipped_since(100)[("P", "", "Tab", "b")] == (0, 2)
+
+
+def test_reload_from_file_and_first_time(tmp_path):
+    make_history(tmp_path / "h.jsonl")
+    with open(tmp_path / "h.jsonl", 'a', encoding='utf-8') as f:
+        f.write('[400,"P"')  # недописанная строка после сбоя
+    history = StatusHistory(str(tmp_path / "h.jsonl"))
+
+    assert history.first_time("P", "O", "Генплан", "a", 2) == 200
+    assert history.first_time("P", "O", "Генплан", "a", 0) is None
+    assert len(history.get_item_history("P", "O", "Генплан", "a")) == 3
+
+
+def test_rename_moves_history(tmp_path):
+    path = tmp_path / "h.jsonl"
+    history = make_history(path)
+    history.rename("P", "O", "P", "O2")
+    history.rename("P", None, "P2")
+
+    for reloaded in (history, StatusHistory(str(path))):
+        assert reloaded.state_as_of("P", 1000) == {}
+        assert reloaded.state_as_of("P2", 1000)[("P2", "O2", "Генплан", "a")] == (1, None)
+        assert ("P2", "O2", "Генплан", "a") in reloaded.changed_since(300)
+
+
+def test_clock_going_back_keeps_order(tmp_path):
+    history = make_history(tmp_path / "h.jsonl")
+    history.state_as_of("P", 0)  # индексы построены
+    history.record([("P", "", "Tab", "b", 2, 1, None)], timestamp=10)
+
+    assert history.get_item_history("P", "", "Tab", "b")[-1][0] == 300
+    assert history.state_as_of("P", 300)[("P", "", "Tab", "b")] == (1, None)
+
+
+def test_iter_records(tmp_path):
+    history = make_history(tmp_path / "h.jsonl")
+    history.rename("Q", None, "Q2")
+
+    records = list(history.iter_records(since=200))
+
+    assert [record[0] for record in records[:3]] == [200, 300, 300]
+    assert records[-1][0] == "R"
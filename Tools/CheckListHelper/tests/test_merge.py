@@ -0,0 +1,87 @@
+import pytest
+
+from merge import merge_projects, set_conflict_choice
+
+
+def item(status, comment=None, updated="2024-01-01 10:00:00", attachments=None):
+    state = {"status": status, "comment": comment, "updated": updated}
+    if attachments:
+        state["attachments"] = attachments
+    return state
+
+
+def project(checklists=None, objects=None, version="1"):
+    return {"version": version, "template": "t.txt", "checklists": checklists or {},
+            "objects": {name: {"checklists": items} for name, items in (objects or {}).items()}}
+
+
+def test_one_sided_changes_are_combined():
+    base = {"P": project({"Tab": {"a": item(0), "b": item(0)}})}
+    theirs = {"P": project({"Tab": {"a": item(1), "b": item(0)}})}
+    ours = {"P": project({"Tab": {"a": item(0), "b": item(2, "bug")}})}
+
+    merged, conflicts = merge_projects(base, theirs, ours)
+
+    assert conflicts == []
+    assert merged["P"]["checklists"]["Tab"]["a"]["status"] == 1
+    assert merged["P"]["checklists"]["Tab"]["b"]["status"] == 2
+
+
+@pytest.mark.parametrize("rule, expected", [("bug", 2), ("latest", 1)])
+def test_conflict_resolved_by_rule(rule, expected):
+    base = {"P": project(objects={"O": {"a": item(0)}})}
+    theirs = {"P": project(objects={"O": {"a": item(2, "x", updated="2024-01-01 10:00:00")}})}
+    ours = {"P": project(objects={"O": {"a": item(1, updated="2024-01-02 10:00:00")}})}
+
+    merged, conflicts = merge_projects(base, theirs, ours, rule=rule)
+
+    assert [conflict.key for conflict in conflicts] == [("P", "O", "Генплан", "a")]
+    assert merged["P"]["objects"]["O"]["checklists"]["a"]["status"] == expected
+
+
+def test_interactive_resolver_and_choice_change():
+    base = {"P": project({"Tab": {"a": item(0)}})}
+    theirs = {"P": project({"Tab": {"a": item(1)}})}
+    ours = {"P": project({"Tab": {"a": item(2, "bug")}})}
+
+    merged, conflicts = merge_projects(base, theirs, ours, "interactive", lambda *args: "theirs")
+    assert merged["P"]["checklists"]["Tab"]["a"]["status"] == 1
+
+    set_conflict_choice(merged, conflicts[0], "ours")
+    assert merged["P"]["checklists"]["Tab"]["a"] == item(2, "bug")
+
+
+def test_attachment_only_difference_is_united():
+    base = {"P": project({"Tab": {"a": item(2, "bug")}})}
+    theirs = {"P": project({"Tab": {"a": item(2, "bug", attachments=["h1"])}})}
+    ours = {"P": project({"Tab": {"a": item(2, "bug", attachments=["h2"])}})}
+
+    merged, conflicts = merge_projects(base, theirs, ours)
+
+    assert conflicts == []
+    assert merged["P"]["checklists"]["Tab"]["a"]["attachments"] == ["h2", "h1"]
+
+
+def test_deletion_kept_unless_other_copy_changed():
+    base = {"P": project(objects={"O1": {"a": item(0)}, "O2": {"a": item(0)}})}
+    theirs = {"P": project(objects={"O1": {"a": item(0)}, "O2": {"a": item(1)}})}
+    ours = {"P": project(objects={})}
+
+    merged, _ = merge_projects(base, theirs, ours)
+
+    assert list(merged["P"]["objects"]) == ["O2"]
+
+
+def test_scalar_fields_merged_per_field():
+    base = {"P": project(version="1")}
+    theirs = {"P": project(version="2")}
+    ours = {"P": project(version="1")}
+
+    merged, _ = merge_projects(base, theirs, ours)
+
+    assert merged["P"]["version"] == "2"
+
+
+def test_unknown_rule():
+    with pytest.raises(ValueError):
+        merge_projects({}, {}, {}, rule="coin")
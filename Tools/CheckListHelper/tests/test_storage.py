@@ -0,0 +1,121 @@
+import os
+import json
+import stat
+
+import pytest
+
+from config import Config
+from storage import (read_projects, verify_file, save_projects, backup_paths, detect_format,
+                     ChecksumError, FOOTER_MARK)
+from models import ProjectModel, RecoveryError
+
+PROJECTS = {"P": {"version": "1", "checklists": {"Tab": {"a": {"status": 2, "comment": "bug"}}}, "objects": {}}}
+
+
+@pytest.mark.parametrize("data_format", ["json", "json.gz"])
+def test_round_trip_with_footer(tmp_path, data_format):
+    path = str(tmp_path / "data")
+    save_projects(path, PROJECTS, data_format)
+
+    assert detect_format(path) == data_format
+    assert read_projects(path) == PROJECTS
+    assert verify_file(path) is not None
+    with open(path, 'rb') as f:
+        assert FOOTER_MARK in f.read()
+
+
+def test_corruption_detected(tmp_path):
+    path = str(tmp_path / "data.json")
+    save_projects(path, PROJECTS)
+    data = bytearray(open(path, 'rb').read())
+    data[data.index(b"bug")] = ord("B")
+    open(path, 'wb').write(data)
+
+    with pytest.raises(ChecksumError):
+        verify_file(path)
+    with pytest.raises(ChecksumError):
+        read_projects(path)
+
+
+def test_legacy_file_without_footer(tmp_path):
+    path = str(tmp_path / "data.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(PROJECTS, f)
+
+    assert verify_file(path) is None
+    assert read_projects(path) == PROJECTS
+
+
+def test_backups_rotate(tmp_path):
+    path = str(tmp_path / "data.json")
+    for version in range(4):
+        save_projects(path, {"P": {"version": str(version)}}, backups=2)
+
+    assert read_projects(path)["P"]["version"] == "3"
+    assert [read_projects(backup)["P"]["version"] for backup in backup_paths(path, 2)] == ["2", "1"]
+    assert not os.path.exists(path + ".bak3")
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_backup_interval(tmp_path):
+    path = str(tmp_path / "data.json")
+    for version in range(3):
+        save_projects(path, {"P": {"version": str(version)}}, backups=2, backup_interval=3600)
+
+    assert read_projects(path + ".bak1")["P"]["version"] == "0"
+    assert not os.path.exists(path + ".bak2")
+
+
+def test_file_mode_preserved(tmp_path):
+    path = str(tmp_path / "data.json")
+    save_projects(path, PROJECTS)
+    os.chmod(path, 0o664)
+    save_projects(path, PROJECTS)
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o664
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "data.json")
+    save_projects(path, PROJECTS)
+
+    with pytest.raises(TypeError):
+        save_projects(path, {"P": object()})
+
+    assert read_projects(path) == PROJECTS
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_recovery_from_backup_and_history(data_dir):
+    model = ProjectModel()
+    model.add_project("P", "1", "t.txt")
+    model.add_object("P", "O")
+    model.apply_item_statuses("P", [("O", "Генплан", "a", 1, None)])
+    assert model.save_data()
+    assert model.save_data()  # первая версия уходит в .bak1
+
+    # Изменения после последней копии есть только в журнале
+    model.apply_item_statuses("P", [(None, "Tab", "b", 2, "bug")])
+    model.rename_object("P", "O", "O2")
+    with open(Config.DATA_FILE, 'r+b') as f:
+        f.truncate(20)
+
+    recovered = ProjectModel()
+    projects = recovered.load_data()
+
+    assert recovered.recovered
+    assert projects["P"]["objects"]["O2"]["checklists"]["a"]["status"] == 1
+    assert projects["P"]["checklists"]["Tab"]["b"]["status"] == 2
+    assert [name for name in os.listdir(data_dir) if ".corrupt-" in name]
+
+
+def test_recovery_without_valid_backup_touches_nothing(data_dir):
+    for path in [Config.DATA_FILE] + backup_paths(Config.DATA_FILE, Config.DATA_BACKUPS):
+        with open(path, 'wb') as f:
+            f.write(b"{broken")
+    before = sorted(os.listdir(data_dir))
+
+    with pytest.raises(RecoveryError):
+        ProjectModel().load_data()
+
+    assert sorted(os.listdir(data_dir)) == before
@@ -0,0 +1,119 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from sync import SyncServer, SyncClient
+
+KEY = ("P", "", "Tab", "a")
+
+
+class ServerThread:
+    """Сервер синхронизации со своим циклом asyncio в фоновом потоке"""
+
+    def __init__(self, state_path, port=0):
+        self.server = SyncServer("127.0.0.1", port, str(state_path))
+        self.loop = asyncio.new_event_loop()
+        self.port = self.loop.run_until_complete(self.server.start())
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.server.close(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def clients():
+    started = []
+
+    def start(port, **kwargs):
+        received, rejected = [], []
+        client = SyncClient("127.0.0.1", port, received.extend, reconnect_delay=0.05,
+                            on_rejected=rejected.extend, **kwargs)
+        client.received, client.rejected = received, rejected
+        client.start()
+        started.append(client)
+        assert wait_for(lambda: client.connected and client.epoch is not None)
+        return client
+
+    yield start
+    for client in started:
+        client.stop()
+
+
+@pytest.fixture
+def server(tmp_path):
+    servers = [ServerThread(tmp_path / "sync_state.json")]
+    yield servers
+    for running in servers:
+        if running.loop.is_running():
+            running.stop()
+
+
+def test_change_broadcast(server, clients):
+    first, second = clients(server[0].port), clients(server[0].port)
+
+    first.push([(KEY, {"status": 1, "comment": None})])
+
+    assert wait_for(lambda: second.received)
+    assert second.received == [(KEY, {"status": 1, "comment": None})]
+    assert wait_for(lambda: first.versions.get(KEY) == 1)
+    assert first.received == []
+
+
+def test_stale_change_rejected_and_reported(server, clients):
+    first, second = clients(server[0].port), clients(server[0].port)
+    first.push([(KEY, {"status": 1, "comment": None})])
+    assert wait_for(lambda: second.versions.get(KEY) == 1)
+
+    second.versions[KEY] = 0  # изменение сделано до того, как пришла отметка коллеги
+    second.push([(KEY, {"status": 2, "comment": "bug"})])
+
+    assert wait_for(lambda: second.rejected)
+    assert second.rejected == [(KEY, {"status": 2, "comment": "bug"}, {"status": 1, "comment": None})]
+    assert server[0].server.items[KEY] == (1, {"status": 1, "comment": None})
+
+
+def test_versions_survive_restart(tmp_path, server, clients):
+    client = clients(server[0].port)
+    client.push([(KEY, {"status": 1, "comment": None})])
+    assert wait_for(lambda: client.versions.get(KEY) == 1)
+    port = server[0].port
+    server[0].stop()
+
+    server.append(ServerThread(tmp_path / "sync_state.json", port))
+    assert server[1].server.items[KEY][0] == 1
+
+    client.push([(KEY, {"status": 2, "comment": "bug"})])
+    assert wait_for(lambda: client.versions.get(KEY) == 2)
+    assert client.rejected == []
+
+
+def test_lost_state_resets_client_versions(tmp_path, server, clients):
+    client = clients(server[0].port)
+    client.push([(KEY, {"status": 1, "comment": None})])
+    assert wait_for(lambda: client.versions.get(KEY) == 1)
+    port, epoch = server[0].port, client.epoch
+    server[0].stop()
+    (tmp_path / "sync_state.json").unlink()
+
+    server.append(ServerThread(tmp_path / "sync_state.json", port))
+    assert wait_for(lambda: client.connected and client.epoch == server[1].server.epoch)
+    assert client.epoch != epoch and client.versions == {}
+
+    client.push([(KEY, {"status": 2, "comment": "bug"})])
+    assert wait_for(lambda: KEY in server[1].server.items)
+    assert client.rejected == []
@@ -0,0 +1,31 @@
+from templates import split_item, find_renamed_items
+from models import ProjectModel
+
+
+def test_explicit_id_survives_text_edit():
+    assert split_item("Язык {#lang}") == ("lang", "Язык")
+    assert split_item("Язык интерфейса {#lang}")[0] == "lang"
+    assert split_item("Звук")[0] != split_item("Звуки")[0]
+
+
+def test_renamed_items_remapped(data_dir, template_manager):
+    old_data = template_manager.get_template_data("t.txt")
+    with open(template_manager.templates_dir + "/t.txt", 'w', encoding='utf-8') as f:
+        f.write("Настройки\n- Звуки\n- Язык {#lang}\n\nГенплан\n- Лифты\n- Окна\n- Двери\n")
+    template_manager.reload_template("t.txt")
+    renames = find_renamed_items(old_data, template_manager.get_template_data("t.txt"))
+
+    assert [(tab, old_text, new_text) for tab, _, old_text, _, new_text in renames] == [
+        ("Настройки", "Звук", "Звуки"), ("Генплан", "Лифт", "Лифты")]
+
+    model = ProjectModel()
+    model.add_project("P", "1", "t.txt")
+    model.add_object("P", "O")
+    lift = split_item("Лифт")[0]
+    model.apply_item_statuses("P", [("O", "Генплан", lift, 2, "застрял")])
+
+    assert model.count_marked_items("t.txt", renames) == 1
+    assert model.remap_item_ids("t.txt", renames) == 1
+    checklist = model.projects["P"]["objects"]["O"]["checklists"]
+    assert lift not in checklist
+    assert checklist[split_item("Лифты")[0]]["comment"] == "застрял"
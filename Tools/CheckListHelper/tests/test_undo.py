@@ -0,0 +1,44 @@
+from undo import UndoManager
+
+
+def test_undo_redo_round_trip():
+    manager = UndoManager()
+    manager.record("P", "Отметка", [("O", "Генплан", "a", 0, None, 1, None),
+                                    (None, "Tab", "b", 1, None, 2, "bug")])
+
+    assert manager.can_undo() and not manager.can_redo()
+    assert manager.undo() == ("P", "Отметка", [(None, "Tab", "b", 1, None), ("O", "Генплан", "a", 0, None)])
+    assert manager.redo_description() == "Отметка"
+    assert manager.redo() == ("P", "Отметка", [("O", "Генплан", "a", 1, None), (None, "Tab", "b", 2, "bug")])
+    assert manager.undo_description() == "Отметка"
+
+
+def test_new_operation_clears_redo():
+    manager = UndoManager()
+    manager.record("P", "first", [("O", "Генплан", "a", 0, None, 1, None)])
+    manager.undo()
+    manager.record("P", "second", [("O", "Генплан", "a", 0, None, 2, "x")])
+
+    assert not manager.can_redo()
+    assert manager.undo_description() == "second"
+
+
+def test_empty_operation_ignored_and_limit():
+    manager = UndoManager(limit=2)
+    manager.record("P", "empty", [])
+    assert not manager.can_undo()
+
+    for index in range(3):
+        manager.record("P", str(index), [("O", "Генплан", "a", index, None, index + 1, None)])
+    assert [manager.undo()[1] for _ in range(2)] == ["2", "1"]
+    assert manager.undo() is None
+
+
+def test_clear():
+    manager = UndoManager()
+    manager.record("P", "op", [("O", "Генплан", "a", 0, None, 1, None)])
+    manager.undo()
+    manager.clear()
+
+    assert not manager.can_undo() and not manager.can_redo()
+    assert manager.redo() is None
@@ -3,12 +3,30 @@ from tkinter import ttk, messagebox, simpledialog, filedialog
 import os
 import subprocess
 import platform
+import queue
+import threading
+import shutil
+import tempfile
+from concurrent.futures import Future
 from datetime import datetime
-from config import Config, get_exports_dir
+from config import Config, get_exports_dir, get_evidence_dir
 from models import ProjectModel
-from templates import TemplateManager
+from templates import TemplateManager, find_renamed_items
 from checklist_ui import ChecklistTab, BulkOperationsPanel, StatsPanel
 from export import ExportManager
+from template_watcher import TemplateWatcher
+from object_import import parse_object_names, read_object_names
+from analytics_ui import AnalyticsWindow
+from evidence import EvidenceStore
+from undo import UndoManager
+from storage import read_projects
+from compact import compact_projects
+from api import ChecklistApi, ApiServer
+from results_import import import_test_results
+from profiling import instrumentation, LagMonitor, ProfileCapture
+from scheduler import TaskScheduler, PRIORITY_NORMAL
+from excel_import import iter_status_rows, build_import_diff, apply_import_diff
+from merge import MERGE_RULES, merge_projects, set_conflict_choice, describe_state, diff_items
 
 
 class ChecklistApp:
@@ -21,9 +39,11 @@ class ChecklistApp:
         self.project_model = ProjectModel()
         self.template_manager = TemplateManager()
         self.export_manager = ExportManager()
-
-        # Загружаем данные
-        self.project_model.load_data()
+        self.evidence_store = EvidenceStore(get_evidence_dir())
+        self.export_manager.evidence_store = self.evidence_store
+        self.undo_manager = UndoManager(Config.UNDO_LIMIT)
+        # Длительные операции выполняются по частям между событиями Tk
+        self.scheduler = TaskScheduler(self.root)
 
         # UI элементы
         self.projects_tree = None
@@ -42,6 +62,19 @@ class ChecklistApp:
         self.toggle_btn = None
         self.left_header = None
         self.current_item_frame = None
+        self.loading_label = None
+        self.model_buttons = []
+        self.model_ready = False
+        self.load_results = queue.Queue()
+        self.sync_changes = queue.Queue()
+        self.sync_rejected = queue.Queue()
+        self.background_save_job = None
+        self.api = ChecklistApi(self.project_model, self.template_manager, self.export_manager)
+        self.api_calls = queue.Queue()
+        self.api_server = None
+        # Панель разработчика: задержка цикла событий и запись профиля
+        self.lag_monitor = LagMonitor(self.root, instrumentation)
+        self.profile_capture = ProfileCapture()
 
         # Переменная для пути экспорта
         self.exports_dir = tk.StringVar(value=get_exports_dir())
@@ -49,6 +82,307 @@ class ChecklistApp:
         # Создаем интерфейс
         self.setup_ui()
 
+        # Данные загружаются в фоне, окно появляется сразу
+        self.start_loading()
+
+        # Отслеживание изменений шаблонов в общей папке
+        self.template_changes = queue.Queue()
+        self.template_watcher = None
+        if Config.TEMPLATES_WATCH_MODE:
+            self.template_watcher = TemplateWatcher(self.template_manager.templates_dir,
+                                                    self.template_changes.put,
+                                                    mode=Config.TEMPLATES_WATCH_MODE,
+                                                    poll_interval=Config.TEMPLATES_POLL_INTERVAL,
+                                                    backstop_interval=Config.TEMPLATES_BACKSTOP_INTERVAL)
+            self.template_watcher.start()
+
+        self.root.bind_all("<Control-z>", lambda e: self.on_undo_key(e, self.undo))
+        self.root.bind_all("<Control-y>", lambda e: self.on_undo_key(e, self.redo))
+        self.root.bind_all("<Control-Shift-Z>", lambda e: self.on_undo_key(e, self.redo))
+
+        if instrumentation.enabled:
+            self.lag_monitor.start()
+
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def start_loading(self):
+        """Запускает загрузку данных в фоновом потоке"""
+        self.set_model_ready(False)
+        threading.Thread(target=self._load_worker, daemon=True).start()
+        self.root.after(50, self.check_loading)
+
+    def _load_worker(self):
+        """Читает и при необходимости мигрирует файл данных (фоновый поток)"""
+        try:
+            projects = self.project_model.read_data()
+            migrated = self.project_model.migrate_item_ids(self.template_manager.get_template_data, projects)
+            self.load_results.put((projects, migrated, None))
+        except Exception as e:
+            self.load_results.put((None, False, e))
+
+    def check_loading(self):
+        """Ожидает завершения фоновой загрузки и начинает заполнение дерева"""
+        try:
+            projects, migrated, error = self.load_results.get_nowait()
+        except queue.Empty:
+            self.root.after(50, self.check_loading)
+            return
+
+        if error is not None:
+            self.on_loading_failed(error)
+            return
+
+        self.project_model.read_only = False
+        self.project_model.projects = projects
+        self.undo_manager.clear()
+        self.update_undo_buttons()
+        if migrated or self.project_model.recovered:
+            self.project_model.save_data()
+        if self.project_model.recovered:
+            messagebox.showwarning("Восстановление данных", self.project_model.recovered)
+        if self.project_model.migration_orphans:
+            self.show_migration_orphans(self.project_model.migration_orphans)
+
+        self.scheduler.spawn(self.populate_projects_tree(list(projects.keys())), PRIORITY_NORMAL,
+                             name="Дерево проектов", on_done=self.on_projects_tree_ready)
+
+    def show_migration_orphans(self, orphans, limit=10):
+        """Сообщает об отметках пунктов, которых нет в шаблоне после перехода на идентификаторы"""
+        lines = []
+        for project_name, tab_name, text, similar in orphans[:limit]:
+            hint = f" (похож на «{similar}»)" if similar else ""
+            lines.append(f"{project_name} / {tab_name}: «{text}»{hint}")
+        if len(orphans) > limit:
+            lines.append(f"... и еще {len(orphans) - limit}")
+        messagebox.showwarning("Отметки без пунктов шаблона",
+                               "Эти отмеченные пункты не найдены в шаблоне проекта, их отметки сохранены, "
+                               "но не отображаются:\n\n" + "\n".join(lines) +
+                               "\n\nВерните прежний текст пункта в шаблоне, чтобы отметки снова появились.")
+
+    def on_loading_failed(self, error):
+        """Данные не загружены: модель остается пустой и только для чтения, файл данных не перезаписывается"""
+        self.project_model.read_only = True
+        self.project_model.projects = {}
+        if messagebox.askretrycancel(
+                "Ошибка загрузки данных",
+                f"Не удалось загрузить данные:\n{error}\n\n"
+                f"Файл {self.project_model.data_file} не изменен, сохранение отключено.\n"
+                "Повторить загрузку?"):
+            self.start_loading()
+            return
+        if self.loading_label:
+            self.loading_label.config(text="Данные не загружены — сохранение отключено")
+
+    def populate_projects_tree(self, project_names):
+        """Генератор для планировщика: постепенно добавляет проекты в дерево, не блокируя интерфейс"""
+        with instrumentation.span("populate_projects_tree"):
+            for index, project_name in enumerate(project_names, 1):
+                if project_name in self.project_model.projects:
+                    self.insert_project_node(project_name, self.project_model.projects[project_name])
+                if index % 100 == 0:
+                    self.loading_label.config(text=f"Загрузка проектов: {index}/{len(project_names)}")
+                yield
+
+    def on_projects_tree_ready(self, result=None):
+        """Включает работу с моделью и фоновые службы после заполнения дерева"""
+        self.set_model_ready(True)
+        if self.template_watcher:
+            self.root.after(500, self.process_template_changes)
+        if Config.SYNC_SERVER and self.project_model.sync is None:
+            host, _, port = Config.SYNC_SERVER.rpartition(":")
+            self.project_model.start_sync(host, int(port), self.sync_changes.put, self.sync_rejected.put)
+            self.root.after(200, self.process_sync_changes)
+        if Config.API_PORT and self.api_server is None:
+            self.api_server = ApiServer(self.api, self.submit_api_call, port=Config.API_PORT)
+            self.api_server.start()
+            self.root.after(Config.API_POLL_INTERVAL, self.process_api_calls)
+
+    def set_model_ready(self, ready):
+        """Включает или блокирует действия, требующие загруженной модели"""
+        self.model_ready = ready
+        state = "normal" if ready else "disabled"
+        for button in self.model_buttons:
+            button.config(state=state)
+        if self.loading_label:
+            self.loading_label.config(text="" if ready else "Загрузка данных...")
+
+    def on_close(self):
+        """Обработчик закрытия главного окна"""
+        if self.template_watcher:
+            self.template_watcher.stop()
+        self.project_model.stop_sync()
+        if self.api_server:
+            self.api_server.stop()
+        if self.background_save_job:
+            self.project_model.save_data()
+        if self.profile_capture.running:
+            self.profile_capture.stop(self.exports_dir.get())
+        self.root.destroy()
+
+    def process_template_changes(self):
+        """Применяет изменения шаблонов, полученные от наблюдателя"""
+        names = set()
+        while True:
+            try:
+                names |= self.template_changes.get_nowait()
+            except queue.Empty:
+                break
+
+        if names:
+            previous = dict(self.template_manager.available_templates)
+            changed = self.template_manager.apply_changes(names)
+            if changed:
+                self.api.invalidate_templates(changed)
+                self.template_combobox['values'] = self.template_manager.get_template_names()
+
+                current_project = self.project_model.current_project
+                if current_project and self.project_model.get_project_template(current_project) in changed:
+                    self.reload_current_checklists()
+                self.offer_item_remap(previous)
+
+        self.root.after(500, self.process_template_changes)
+
+    def offer_item_remap(self, previous, limit=10):
+        """Предлагает перенести отметки пунктов, текст которых исправили в шаблоне
+
+        previous — данные шаблонов до изменения. Пункты без явного {#id} при правке текста
+        получают новый идентификатор, и без переноса их отметки остались бы без пункта.
+        """
+        if not self.model_ready:
+            return
+        moved = 0
+        for template_name, old_data in previous.items():
+            new_data = self.template_manager.get_template_data(template_name)
+            if new_data is old_data or not new_data:
+                continue
+            renames = find_renamed_items(old_data, new_data)
+            count = self.project_model.count_marked_items(template_name, renames)
+            if not count:
+                continue
+            lines = [f"{tab_name}: «{old_text}» → «{new_text}»" for tab_name, _, old_text, _, new_text in renames[:limit]]
+            if len(renames) > limit:
+                lines.append(f"... и еще {len(renames) - limit}")
+            if messagebox.askyesno(
+                    "Изменены тексты пунктов",
+                    f"В шаблоне {template_name} изменены тексты пунктов, у которых есть отметки ({count}):\n\n"
+                    + "\n".join(lines) +
+                    "\n\nПеренести отметки на исправленные пункты? Иначе они останутся без пункта в шаблоне.\n"
+                    "Чтобы отметки не терялись при правке текста, задайте пунктам {#id}."):
+                moved += self.project_model.remap_item_ids(template_name, renames)
+
+        if moved:
+            # Отмена ссылалась бы на прежние идентификаторы пунктов
+            self.undo_manager.clear()
+            self.update_undo_buttons()
+            self.project_model.save_data()
+            if self.project_model.current_project:
+                self.reload_current_checklists()
+
+    def process_sync_changes(self):
+        """Применяет отметки коллег, полученные от сервера синхронизации"""
+        changes = []
+        while True:
+            try:
+                changes.extend(self.sync_changes.get_nowait())
+            except queue.Empty:
+                break
+
+        applied = self.project_model.apply_remote_changes(changes) if changes else []
+        if applied:
+            current_project = self.project_model.current_project
+            current_object = self.project_model.current_object
+            for project_name, object_name, tab_name, item, status, comment in applied:
+                tab = self.checklist_tabs.get(tab_name)
+                if (project_name == current_project and object_name == current_object
+                        and tab is not None and item in tab.item_texts):
+                    tab.show_item_status(item, status, comment)
+            self.update_progress()
+
+            self.schedule_background_save()
+
+        rejected = []
+        while True:
+            try:
+                rejected.extend(self.sync_rejected.get_nowait())
+            except queue.Empty:
+                break
+        if rejected:
+            self.show_sync_rejected(rejected)
+
+        self.root.after(200, self.process_sync_changes)
+
+    def show_sync_rejected(self, rejected, limit=10):
+        """Сообщает, что собственные отметки отклонены сервером: пункт раньше изменил коллега"""
+        lines = []
+        for (project_name, object_name, tab_name, item), _, theirs in rejected[:limit]:
+            names = self.template_manager.get_item_names(self.project_model.get_project_template(project_name))
+            status = {1: "Done", 2: "BUG"}.get(theirs.get("status", 0), "—")
+            place = " / ".join(part for part in (project_name, object_name, tab_name) if part)
+            lines.append(f"{place}: {names.get((tab_name, item), item)} → {status}")
+        if len(rejected) > limit:
+            lines.append(f"... и еще {len(rejected) - limit}")
+        messagebox.showwarning("Синхронизация",
+                               "Коллеги успели изменить эти пункты раньше, ваши отметки заменены их "
+                               "состоянием:\n\n" + "\n".join(lines))
+
+    def process_api_calls(self):
+        """Выполняет запросы HTTP API пачкой в потоке интерфейса"""
+        while True:
+            try:
+                func, future = self.api_calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                future.set_result(func())
+            except Exception as e:
+                future.set_exception(e)
+
+        changes = self.api.take_changes()
+        if changes:
+            current_project = self.project_model.current_project
+            current_object = self.project_model.current_object
+            # Изменения пачки запросов отменяются одной операцией на проект
+            by_project = {}
+            for project_name, deltas in changes:
+                by_project.setdefault(project_name, []).extend(deltas)
+            for project_name, deltas in by_project.items():
+                self.undo_manager.record(project_name, f"Изменения через API ({len(deltas)})", deltas)
+            self.update_undo_buttons()
+
+            for project_name, deltas in changes:
+                if project_name != current_project:
+                    continue
+                for object_name, tab_name, item, _, _, status, comment in deltas:
+                    tab = self.checklist_tabs.get(tab_name)
+                    if object_name == current_object and tab is not None and item in tab.item_texts:
+                        tab.show_item_status(item, status, comment)
+            self.update_progress()
+            self.schedule_background_save()
+
+        self.root.after(Config.API_POLL_INTERVAL, self.process_api_calls)
+
+    def submit_api_call(self, func):
+        """Передает операцию API в поток интерфейса (вызывается из потока сервера)"""
+        future = Future()
+        self.api_calls.put((func, future))
+        return future
+
+    def schedule_background_save(self):
+        """Сохраняет данные не чаще раза в интервал при потоке фоновых изменений"""
+        if not self.background_save_job:
+            self.background_save_job = self.root.after(Config.BACKGROUND_SAVE_DELAY, self.save_background_changes)
+
+    def save_background_changes(self):
+        """Сохраняет данные после изменений коллег и API"""
+        self.background_save_job = None
+        self.project_model.save_data()
+
+    def reload_current_checklists(self):
+        """Перестраивает вкладки текущего элемента по актуальному шаблону"""
+        template_name = self.project_model.get_project_template(self.project_model.current_project)
+        template_data = self.template_manager.get_template_data(template_name)
+        self.rebuild_checklists(template_data, is_object=bool(self.project_model.current_object))
+
     def setup_ui(self):
         """Создание пользовательского интерфейса"""
         self.main_frame = ttk.Frame(self.root, padding="10")
@@ -66,9 +400,6 @@ class ChecklistApp:
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
 
-        # Обновляем дерево проектов
-        self.update_projects_tree()
-
     def setup_left_panel(self):
         """Создание левой панели с деревом проектов"""
         left_container = ttk.Frame(self.main_frame)
@@ -82,6 +413,10 @@ class ChecklistApp:
 
         ttk.Label(self.left_header, text="Проекты и объекты", font=('Arial', 10, 'bold')).pack(side=tk.LEFT)
 
+        self.loading_label = ttk.Label(self.left_header, text="", font=('Arial', 9, 'italic'),
+                                       foreground="gray")
+        self.loading_label.pack(side=tk.LEFT, padx=10)
+
         self.toggle_btn = ttk.Button(self.left_header, text="◀", width=3,
                                      command=self.toggle_left_panel)
         self.toggle_btn.pack(side=tk.RIGHT)
@@ -96,14 +431,15 @@ class ChecklistApp:
         btn_frame = ttk.Frame(self.left_content)
         btn_frame.grid(row=0, column=0, sticky=tk.EW, pady=5)
 
-        ttk.Button(btn_frame, text="➕ Проект",
-                   command=self.add_project_dialog).pack(side=tk.LEFT, padx=2)
-        ttk.Button(btn_frame, text="➕ Объект",
-                   command=self.add_object_dialog).pack(side=tk.LEFT, padx=2)
-        ttk.Button(btn_frame, text="✏️ Переименовать",
-                   command=self.rename_item).pack(side=tk.LEFT, padx=2)
-        ttk.Button(btn_frame, text="🗑️ Удалить",
-                   command=self.delete_item).pack(side=tk.LEFT, padx=2)
+        # Кнопки недоступны, пока данные загружаются
+        for text, command in [("➕ Проект", self.add_project_dialog),
+                              ("➕ Объект", self.add_object_dialog),
+                              ("📋 Объекты списком", self.bulk_add_objects_dialog),
+                              ("✏️ Переименовать", self.rename_item),
+                              ("🗑️ Удалить", self.delete_item)]:
+            button = ttk.Button(btn_frame, text=text, command=command)
+            button.pack(side=tk.LEFT, padx=2)
+            self.model_buttons.append(button)
 
         # Дерево проектов с прокруткой
         tree_frame = ttk.Frame(self.left_content)
@@ -166,10 +502,29 @@ class ChecklistApp:
         self.current_version_label = ttk.Label(info_block, text="—", font=('Arial', 9))
         self.current_version_label.grid(row=0, column=5, sticky=tk.W, padx=5)
 
+        # Копирование статусов объекта на другие объекты
+        copy_btn = ttk.Button(info_block, text="📑 Копировать статусы",
+                              command=self.copy_statuses_dialog)
+        copy_btn.grid(row=0, column=6, padx=(20, 5))
+
+        # Аналитика по объектам проекта
+        analytics_btn = ttk.Button(info_block, text="📊 Аналитика",
+                                   command=self.show_analytics)
+        analytics_btn.grid(row=0, column=7, padx=(5, 5))
+
+        # Импорт результатов в текущий элемент
+        import_btn = ttk.Menubutton(info_block, text="📥 Импорт")
+        import_menu = tk.Menu(import_btn, tearoff=0)
+        import_menu.add_command(label="Отчет автотестов (JUnit XML / JSON)...",
+                                command=self.import_test_results_dialog)
+        import_menu.add_command(label="Статусы из Excel / CSV...", command=self.import_excel_dialog)
+        import_btn["menu"] = import_menu
+        import_btn.grid(row=0, column=8, padx=(5, 5))
+
         # Кнопка настроек
         settings_btn = ttk.Button(info_block, text="⚙️", width=3,
                                   command=self.show_settings_dialog)
-        settings_btn.grid(row=0, column=6, padx=(20, 5))
+        settings_btn.grid(row=0, column=9, padx=(5, 5))
 
     def setup_checklist_block(self, parent):
         """Создает блок с чек-листами и массовыми операциями"""
@@ -247,6 +602,13 @@ class ChecklistApp:
 
         window.geometry(f"+{x}+{y}")
 
+    def show_analytics(self):
+        """Открывает окно аналитики Генплана по объектам текущего проекта"""
+        if not self.project_model.current_project:
+            messagebox.showwarning("Внимание", "Сначала выберите проект")
+            return
+        AnalyticsWindow(self, self.project_model.current_project)
+
     def show_settings_dialog(self):
         """Показывает диалог настроек"""
         dialog = tk.Toplevel(self.root)
@@ -262,6 +624,8 @@ class ChecklistApp:
 
         self.setup_templates_tab(notebook)
         self.setup_export_tab(notebook)
+        self.setup_merge_tab(notebook)
+        self.setup_developer_tab(notebook)
 
     def setup_templates_tab(self, notebook):
         """Создает вкладку управления шаблонами"""
@@ -354,6 +718,12 @@ class ChecklistApp:
                         value="excel").pack(side=tk.LEFT, padx=10)
         ttk.Radiobutton(format_frame, text="PDF", variable=export_format,
                         value="pdf").pack(side=tk.LEFT, padx=10)
+        ttk.Radiobutton(format_frame, text="CSV", variable=export_format,
+                        value="csv").pack(side=tk.LEFT, padx=10)
+        ttk.Radiobutton(format_frame, text="JSONL", variable=export_format,
+                        value="jsonl").pack(side=tk.LEFT, padx=10)
+        ttk.Radiobutton(format_frame, text="HTML", variable=export_format,
+                        value="html").pack(side=tk.LEFT, padx=10)
 
         # Выбор области экспорта
         scope_frame = ttk.Frame(options_frame)
@@ -365,6 +735,8 @@ class ChecklistApp:
                         value="current").pack(side=tk.LEFT, padx=10)
         ttk.Radiobutton(scope_frame, text="Весь проект", variable=export_scope,
                         value="project").pack(side=tk.LEFT, padx=10)
+        ttk.Radiobutton(scope_frame, text="Все проекты", variable=export_scope,
+                        value="all").pack(side=tk.LEFT, padx=10)
 
         # Настройка папки для отчетов
         folder_frame = ttk.LabelFrame(tab, text="Папка для отчетов", padding="10")
@@ -392,22 +764,40 @@ class ChecklistApp:
         btn_frame.pack(fill=tk.X, padx=10, pady=20)
 
         def do_export():
-            if not self.project_model.current_project:
-                messagebox.showerror("Ошибка", "Сначала выберите проект")
+            if not self.model_ready:
+                messagebox.showwarning("Внимание", "Данные еще загружаются")
                 return
 
             format_type = export_format.get()
             scope_type = export_scope.get()
 
+            if scope_type == "all" and format_type not in ("csv", "jsonl", "html"):
+                messagebox.showerror("Ошибка", "Экспорт всех проектов доступен только в CSV, JSONL и HTML")
+                return
+
+            if scope_type != "all" and not self.project_model.current_project:
+                messagebox.showerror("Ошибка", "Сначала выберите проект")
+                return
+
             # Обновляем путь экспорта в менеджере
             self.export_manager.exports_dir = self.exports_dir.get()
 
-            data = self.collect_export_data(scope_type)
+            with instrumentation.span(f"export_{format_type}"):
+                if format_type in ("csv", "jsonl", "html"):
+                    items = self.collect_export_items(scope_type)
+                    if format_type == "csv":
+                        success, message = self.export_manager.export_to_csv(items)
+                    elif format_type == "jsonl":
+                        success, message = self.export_manager.export_to_jsonl(items)
+                    else:
+                        success, message = self.export_manager.export_to_html(items)
+                else:
+                    data = self.collect_export_data(scope_type)
 
-            if format_type == "excel":
-                success, message = self.export_manager.export_to_excel(data)
-            else:
-                success, message = self.export_manager.export_to_pdf(data)
+                    if format_type == "excel":
+                        success, message = self.export_manager.export_to_excel(data)
+                    else:
+                        success, message = self.export_manager.export_to_pdf(data)
 
             if success:
                 if messagebox.askyesno("Успех", f"Данные экспортированы:\n{message}\n\nОткрыть папку с отчетом?"):
@@ -425,6 +815,236 @@ class ChecklistApp:
                                font=('Arial', 9, 'italic'), foreground="gray")
         info_label.pack(side=tk.BOTTOM, pady=10)
 
+    def setup_merge_tab(self, notebook):
+        """Создает вкладку слияния копий файла данных"""
+        tab = ttk.Frame(notebook)
+        notebook.add(tab, text="Слияние копий")
+
+        files_frame = ttk.LabelFrame(tab, text="Файлы", padding="10")
+        files_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        base_path = tk.StringVar()
+        theirs_path = tk.StringVar()
+
+        def choose(var, title):
+            path = filedialog.askopenfilename(title=title,
+                                              filetypes=[("Файлы данных", "*.json *.gz *.bin"), ("Все файлы", "*.*")])
+            if path:
+                var.set(path)
+
+        for row, (label, var, title) in enumerate((
+                ("Общий исходный (base):", base_path, "Исходный файл, от которого начинали"),
+                ("Копия коллеги (theirs):", theirs_path, "Файл данных другого тестировщика"))):
+            ttk.Label(files_frame, text=label).grid(row=row, column=0, sticky=tk.W, pady=2)
+            ttk.Entry(files_frame, textvariable=var, width=40).grid(row=row, column=1, sticky=tk.EW, padx=5)
+            ttk.Button(files_frame, text="📁", width=3,
+                       command=lambda v=var, t=title: choose(v, t)).grid(row=row, column=2)
+        files_frame.columnconfigure(1, weight=1)
+        ttk.Label(files_frame, text="Своя копия (ours) — текущие данные программы",
+                  font=('Arial', 9, 'italic')).grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=5)
+
+        rule_frame = ttk.LabelFrame(tab, text="Разрешение конфликтов", padding="10")
+        rule_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        rule = tk.StringVar(value="bug")
+        for value, text in zip(MERGE_RULES, ("BUG побеждает", "Более позднее изменение", "Выбрать вручную")):
+            ttk.Radiobutton(rule_frame, text=text, variable=rule, value=value).pack(anchor=tk.W)
+
+        ttk.Button(tab, text="🔀 Слить",
+                   command=lambda: self.merge_data_files(base_path.get(), theirs_path.get(), rule.get())
+                   ).pack(pady=15)
+
+    def setup_developer_tab(self, notebook):
+        """Создает вкладку разработчика: замеры операций, задержка цикла событий и профиль"""
+        tab = ttk.Frame(notebook)
+        notebook.add(tab, text="Разработчику")
+
+        top_frame = ttk.Frame(tab)
+        top_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        enabled = tk.BooleanVar(value=instrumentation.enabled)
+
+        def toggle():
+            instrumentation.enabled = enabled.get()
+            if instrumentation.enabled:
+                self.lag_monitor.start()
+            else:
+                self.lag_monitor.stop()
+
+        ttk.Checkbutton(top_frame, text="Включить замеры", variable=enabled,
+                        command=toggle).pack(side=tk.LEFT)
+        ttk.Button(top_frame, text="Очистить", command=instrumentation.clear).pack(side=tk.RIGHT)
+
+        lag_label = ttk.Label(tab, text="")
+        lag_label.pack(anchor=tk.W, padx=10)
+
+        spans_frame = ttk.LabelFrame(tab, text="Последние операции", padding="5")
+        spans_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        spans_tree = ttk.Treeview(spans_frame, columns=("time", "duration"), height=10)
+        spans_tree.heading("#0", text="Операция")
+        spans_tree.heading("time", text="Время")
+        spans_tree.heading("duration", text="Длительность, мс")
+        spans_tree.column("time", width=80, anchor=tk.CENTER)
+        spans_tree.column("duration", width=120, anchor=tk.E)
+        spans_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar = ttk.Scrollbar(spans_frame, orient=tk.VERTICAL, command=spans_tree.yview)
+        spans_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        summary_label = ttk.Label(tab, text="", justify=tk.LEFT, font=('Consolas', 9))
+        summary_label.pack(anchor=tk.W, padx=10)
+
+        def refresh():
+            if not tab.winfo_exists():
+                return
+            spans_tree.delete(*spans_tree.get_children())
+            for finished, name, duration in reversed(instrumentation.spans):
+                spans_tree.insert("", tk.END, text=name, values=(finished, f"{duration * 1000:.1f}"))
+
+            lags = list(instrumentation.lags)
+            if lags:
+                lag_label.config(text=f"Задержка цикла событий: сейчас {lags[-1] * 1000:.0f} мс, "
+                                      f"макс. {max(lags) * 1000:.0f} мс")
+            else:
+                lag_label.config(text="Задержка цикла событий: нет данных (замеры выключены)")
+
+            lines = [f"{name:<24} {count:>4} × сред. {mean * 1000:7.1f} мс, макс. {maximum * 1000:7.1f} мс"
+                     for name, (count, mean, maximum) in sorted(instrumentation.summary().items())]
+            summary_label.config(text="\n".join(lines))
+            tab.after(1000, refresh)
+
+        profile_frame = ttk.Frame(tab)
+        profile_frame.pack(fill=tk.X, padx=10, pady=10)
+
+        def toggle_profile():
+            if not self.profile_capture.running:
+                self.profile_capture.start()
+                profile_button.config(text="⏹ Остановить и сохранить профиль")
+                return
+            profile_button.config(text="⏺ Записать профиль")
+            success, message = self.profile_capture.stop(self.exports_dir.get())
+            if success:
+                messagebox.showinfo("Профиль сохранен", f"cProfile и tracemalloc сохранены:\n{message}")
+            else:
+                messagebox.showerror("Ошибка", f"Не удалось сохранить профиль:\n{message}")
+
+        profile_button = ttk.Button(profile_frame, command=toggle_profile,
+                                    text="⏹ Остановить и сохранить профиль" if self.profile_capture.running
+                                    else "⏺ Записать профиль")
+        profile_button.pack(side=tk.LEFT)
+        ttk.Label(profile_frame, text="Профиль пишется в папку отчетов",
+                  font=('Arial', 9, 'italic'), foreground="gray").pack(side=tk.LEFT, padx=10)
+
+        refresh()
+
+    def merge_data_files(self, base_path, theirs_path, rule):
+        """Сливает копию коллеги с текущими данными относительно общего исходного файла"""
+        if not self.model_ready:
+            messagebox.showwarning("Внимание", "Данные еще загружаются")
+            return
+        if not base_path or not theirs_path:
+            messagebox.showerror("Ошибка", "Выберите исходный файл и копию коллеги")
+            return
+
+        try:
+            base = read_projects(base_path)
+            theirs = read_projects(theirs_path)
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось прочитать файл:\n{e}")
+            return
+        for projects in (base, theirs):
+            self.project_model.migrate_item_ids(self.template_manager.get_template_data, projects)
+
+        ours = self.project_model.projects
+        merged, conflicts = merge_projects(base, theirs, ours, rule)
+
+        if rule == "interactive" and conflicts:
+            self.show_merge_conflicts(merged, conflicts)
+        elif messagebox.askyesno("Слияние", f"Конфликтов: {len(conflicts)} (разрешены автоматически).\n\n"
+                                            "Применить результат к текущим данным?"):
+            self.apply_merged_projects(merged)
+
+    def show_merge_conflicts(self, merged, conflicts):
+        """Окно ручного разрешения конфликтов слияния"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Конфликты слияния: {len(conflicts)}")
+        dialog.geometry("900x500")
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        self.center_window(dialog)
+
+        tree_frame = ttk.Frame(dialog)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        tree = ttk.Treeview(tree_frame, columns=("theirs", "ours", "choice"), selectmode="extended")
+        tree.heading("#0", text="Пункт")
+        tree.heading("theirs", text="Коллега (theirs)")
+        tree.heading("ours", text="Свои (ours)")
+        tree.heading("choice", text="Берем")
+        tree.column("#0", width=280)
+        tree.column("choice", width=70)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        names = {}
+        for index, conflict in enumerate(conflicts):
+            project_name, object_name, tab_name, item = conflict.key
+            if project_name not in names:
+                template_name = merged.get(project_name, {}).get("template") or "Основной_чеклист.txt"
+                names[project_name] = self.template_manager.get_item_names(template_name)
+            text = names[project_name].get((tab_name, item), item)
+            place = " / ".join(part for part in (project_name, object_name or tab_name) if part)
+            tree.insert("", "end", iid=str(index), text=f"{place}: {text}",
+                        values=(describe_state(conflict.theirs), describe_state(conflict.ours), conflict.choice))
+
+        def choose(choice):
+            for iid in tree.selection() or tree.get_children():
+                set_conflict_choice(merged, conflicts[int(iid)], choice)
+                tree.set(iid, "choice", choice)
+
+        def apply():
+            dialog.destroy()
+            self.apply_merged_projects(merged)
+
+        btn_frame = ttk.Frame(dialog)
+        btn_frame.pack(pady=10)
+        ttk.Label(btn_frame, text="Для выделенных (или всех):").pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Взять у коллеги", command=lambda: choose("theirs")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Оставить свои", command=lambda: choose("ours")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="✅ Применить", command=apply).pack(side=tk.LEFT, padx=20)
+
+    def apply_merged_projects(self, merged):
+        """Заменяет данные модели результатом слияния и обновляет интерфейс"""
+        # Изменения относительно своих данных попадают в историю статусов
+        self.project_model.history.record(diff_items(self.project_model.projects, merged))
+        # Результат слияния собирается из словарей — переводим в то же представление, что и при загрузке
+        self.project_model.projects = compact_projects(merged) if Config.COMPACT_MODEL else merged
+        self.project_model.save_data()
+        self.undo_manager.clear()
+        self.update_undo_buttons()
+        self.update_projects_tree()
+
+        project_name = self.project_model.current_project
+        object_name = self.project_model.current_object
+        if project_name in merged and (not object_name or object_name in merged[project_name]["objects"]):
+            if project_name:
+                self.load_current_data()
+        else:
+            self.project_model.current_project = None
+            self.project_model.current_object = None
+            self.type_label.config(text="—")
+            self.current_name_label.config(text="—")
+            self.current_version_label.config(text="—")
+            for tab in self.notebook.winfo_children():
+                tab.destroy()
+            self.checklist_tabs = {}
+            self.stats_panel.update_stats(0, 0, 0)
+
+        messagebox.showinfo("Успех", "Слияние применено")
+
     def import_template_from_settings(self, listbox):
         """Импортирует шаблон из окна настроек"""
         filename = filedialog.askopenfilename(
@@ -435,6 +1055,7 @@ class ChecklistApp:
         if filename:
             success, result = self.template_manager.import_template(filename)
             if success:
+                self.api.invalidate_templates()
                 listbox.insert(tk.END, result)
                 self.template_combobox['values'] = self.template_manager.get_template_names()
                 messagebox.showinfo("Успех", f"Шаблон {result} успешно загружен")
@@ -494,6 +1115,7 @@ class ChecklistApp:
 
             success, result = self.template_manager.save_template(name, content)
             if success:
+                self.api.invalidate_templates()
                 listbox.insert(tk.END, result)
                 self.template_combobox['values'] = self.template_manager.get_template_names()
                 dialog.destroy()
@@ -545,8 +1167,11 @@ class ChecklistApp:
             try:
                 with open(filepath, 'w', encoding='utf-8') as f:
                     f.write(new_content)
-                self.template_manager.load_templates()
+                previous = dict(self.template_manager.available_templates)
+                self.template_manager.reload_template(template_name)
+                self.api.invalidate_templates()
                 dialog.destroy()
+                self.offer_item_remap(previous)
                 messagebox.showinfo("Успех", f"Шаблон {template_name} обновлен")
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось сохранить шаблон: {e}")
@@ -568,6 +1193,7 @@ class ChecklistApp:
                 os.remove(filepath)
                 listbox.delete(selection[0])
                 self.template_manager.load_templates()
+                self.api.invalidate_templates()
                 self.template_combobox['values'] = self.template_manager.get_template_names()
                 messagebox.showinfo("Успех", f"Шаблон {template_name} удален")
             except Exception as e:
@@ -576,20 +1202,45 @@ class ChecklistApp:
     def update_projects_tree(self):
         """Обновляет дерево проектов и объектов"""
         if self.projects_tree:
-            for item in self.projects_tree.get_children():
-                self.projects_tree.delete(item)
-
-            for project_name, project_data in self.project_model.projects.items():
-                version = project_data.get("version", "—")
-                template = project_data.get("template", "—")
-                project_id = self.projects_tree.insert("", "end", text=project_name,
-                                                       values=(version, template), tags=("project",))
+            with instrumentation.span("update_projects_tree"):
+                for item in self.projects_tree.get_children():
+                    self.projects_tree.delete(item)
+
+                for project_name, project_data in self.project_model.projects.items():
+                    self.insert_project_node(project_name, project_data)
+
+    def insert_project_node(self, project_name, project_data):
+        """Добавляет в дерево проект со всеми его объектами"""
+        version = project_data.get("version", "—")
+        template = project_data.get("template", "—")
+        project_id = self.projects_tree.insert("", "end", text=project_name,
+                                               values=(version, template), tags=("project",))
+
+        for object_name in project_data.get("objects", {}).keys():
+            self.projects_tree.insert(project_id, "end", text=object_name,
+                                      values=("", ""), tags=("object",))
+
+        self.projects_tree.item(project_id, open=True)
+        return project_id
+
+    def find_project_node(self, project_name):
+        """Возвращает узел проекта в дереве"""
+        for node in self.projects_tree.get_children():
+            if self.projects_tree.item(node, "text") == project_name:
+                return node
+        return None
 
-                for object_name in project_data.get("objects", {}).keys():
-                    self.projects_tree.insert(project_id, "end", text=object_name,
-                                              values=("", ""), tags=("object",))
+    def add_objects_to_tree(self, project_name, object_names):
+        """Добавляет в дерево только новые объекты, не перестраивая его целиком"""
+        project_node = self.find_project_node(project_name)
+        if project_node is None:
+            self.update_projects_tree()
+            return
 
-                self.projects_tree.item(project_id, open=True)
+        for object_name in object_names:
+            self.projects_tree.insert(project_node, "end", text=object_name,
+                                      values=("", ""), tags=("object",))
+        self.projects_tree.item(project_node, open=True)
 
     def on_tree_select(self, event):
         """Обработчик выбора в дереве"""
@@ -639,23 +1290,30 @@ class ChecklistApp:
 
     def rebuild_checklists(self, template_data, is_object=False):
         """Перестраивает чек-листы"""
-        # Очищаем текущие вкладки
-        for tab in self.notebook.winfo_children():
-            tab.destroy()
-
-        self.checklist_tabs = {}
-
-        # Определяем, какие вкладки показывать
-        tabs_to_show = template_data.keys()
-        if is_object:
-            tabs_to_show = ["Генплан"] if "Генплан" in template_data else []
-
-        # Создаем новые вкладки
-        for tab_name in tabs_to_show:
-            items = template_data.get(tab_name, [])
-            tab = ChecklistTab(self.notebook, tab_name, items, self)
-            self.notebook.add(tab.frame, text=tab_name)
-            self.checklist_tabs[tab_name] = tab
+        with instrumentation.span("rebuild_checklists"):
+            # Очищаем текущие вкладки и останавливаем их построение
+            for tab in self.checklist_tabs.values():
+                self.scheduler.cancel_owner(tab)
+            for tab in self.notebook.winfo_children():
+                tab.destroy()
+
+            self.checklist_tabs = {}
+
+            # Определяем, какие вкладки показывать
+            tabs_to_show = template_data.keys()
+            if is_object:
+                tabs_to_show = ["Генплан"] if "Генплан" in template_data else []
+
+            # Создаем новые вкладки
+            for tab_name in tabs_to_show:
+                items = template_data.get(tab_name, [])
+                tab = ChecklistTab(self.notebook, tab_name, items, self)
+                self.notebook.add(tab.frame, text=tab_name)
+                self.checklist_tabs[tab_name] = tab
+
+            current_tab = self.get_current_tab()
+            if current_tab:
+                current_tab.set_visible(True)
 
         # Загружаем данные
         self.load_current_data()
@@ -665,39 +1323,347 @@ class ChecklistApp:
         if not self.project_model.current_project:
             return
 
-        if not self.project_model.current_object:  # Проект
-            for tab_name, tab in self.checklist_tabs.items():
-                if tab_name != "Генплан":
-                    for item in tab.items:
-                        status, comment = self.project_model.get_project_item_status(
-                            self.project_model.current_project, tab_name, item)
-                        tab.set_item_status(item, status, comment)
-        else:  # Объект
-            if "Генплан" in self.checklist_tabs:
-                for item in self.checklist_tabs["Генплан"].items:
-                    status, comment = self.project_model.get_object_item_status(
-                        self.project_model.current_project,
-                        self.project_model.current_object, item)
-                    self.checklist_tabs["Генплан"].set_item_status(item, status, comment)
+        with instrumentation.span("load_current_data"):
+            if not self.project_model.current_object:  # Проект
+                for tab_name, tab in self.checklist_tabs.items():
+                    if tab_name != "Генплан":
+                        for item in tab.items:
+                            status, comment = self.project_model.get_project_item_status(
+                                self.project_model.current_project, tab_name, item)
+                            tab.show_item_status(item, status, comment)
+            else:  # Объект
+                if "Генплан" in self.checklist_tabs:
+                    for item in self.checklist_tabs["Генплан"].items:
+                        status, comment = self.project_model.get_object_item_status(
+                            self.project_model.current_project,
+                            self.project_model.current_object, item)
+                        self.checklist_tabs["Генплан"].show_item_status(item, status, comment)
+
+            self.update_progress()
+
+    def save_item_statuses(self, tab_name, changes, description):
+        """Сохраняет статусы пунктов вкладки одной операцией и записывает ее в журнал отмены"""
+        project_name = self.project_model.current_project
+        if not project_name:
+            return
+
+        # Пункты проекта хранятся без объекта, пункты Генплана — в текущем объекте
+        object_name = self.project_model.current_object
+        deltas = self.project_model.apply_item_statuses(
+            project_name, [(object_name, tab_name, item, status, comment) for item, status, comment in changes])
+        if not deltas:
+            return
 
+        self.undo_manager.record(project_name, description, deltas)
+        self.project_model.save_data()
         self.update_progress()
+        self.update_undo_buttons()
 
-    def save_item_status(self, tab_name, item, status, comment):
-        """Сохраняет статус пункта"""
-        if not self.project_model.current_project:
+    def on_undo_key(self, event, action):
+        """Горячие клавиши отмены не перехватывают редактирование текста в полях ввода"""
+        if isinstance(event.widget, (tk.Text, tk.Entry)):
             return
+        action()
+
+    def undo(self):
+        """Отменяет последнюю операцию со статусами"""
+        if self.model_ready:
+            self.apply_undo_step(self.undo_manager.undo())
+
+    def redo(self):
+        """Повторяет отмененную операцию со статусами"""
+        if self.model_ready:
+            self.apply_undo_step(self.undo_manager.redo())
+
+    def update_undo_buttons(self):
+        """Обновляет кнопки отмены и повтора"""
+        if self.bulk_panel:
+            self.bulk_panel.update_undo_buttons(self.undo_manager.undo_description(),
+                                                self.undo_manager.redo_description())
+
+    def apply_undo_step(self, step):
+        """Применяет шаг отмены/повтора одним пакетом и одним сохранением"""
+        if step is None:
+            return
+        project_name, description, changes = step
+        self.project_model.apply_item_statuses(project_name, changes)
+        self.project_model.save_data()
 
-        if not self.project_model.current_object:  # Проект
-            self.project_model.save_project_item_status(
-                self.project_model.current_project, tab_name, item, status, comment)
-        else:  # Объект
-            self.project_model.save_object_item_status(
-                self.project_model.current_project,
-                self.project_model.current_object, item, status, comment)
+        self.refresh_visible_items(project_name, changes)
+        self.update_undo_buttons()
 
-        self.project_model.save_data()
+    def refresh_visible_items(self, project_name, changes):
+        """Обновляет пункты, видимые в текущем проекте/объекте: changes — (объект, вкладка, пункт, статус, комментарий)"""
+        if project_name != self.project_model.current_project:
+            return
+        current_object = self.project_model.current_object
+        for object_name, tab_name, item, status, comment in changes:
+            tab = self.checklist_tabs.get(tab_name)
+            if tab is not None and object_name == current_object and item in tab.item_texts:
+                tab.show_item_status(item, status, comment)
         self.update_progress()
 
+    def finish_import(self, results, description):
+        """Сохраняет импортированные статусы одним файлом и обновляет вкладки
+
+        results — список (проект, изменения apply_item_statuses); каждый проект — отдельный шаг отмены.
+        """
+        results = [(project_name, deltas) for project_name, deltas in results if deltas]
+        if not results:
+            return
+        for project_name, deltas in results:
+            self.undo_manager.record(project_name, description, deltas)
+            self.refresh_visible_items(project_name, [(object_name, tab_name, item, status, comment)
+                                                      for object_name, tab_name, item, _, _, status, comment in deltas])
+        self.project_model.save_data()
+        self.update_undo_buttons()
+
+    def import_excel_dialog(self):
+        """Импортирует статусы и комментарии из заполненного отчета Excel или длинной таблицы"""
+        if not self.model_ready:
+            messagebox.showwarning("Внимание", "Данные еще загружаются")
+            return
+        filepath = filedialog.askopenfilename(
+            title="Заполненный отчет",
+            filetypes=[("Excel / CSV", "*.xlsx *.csv"), ("Все файлы", "*.*")])
+        if not filepath:
+            return
+
+        self.root.config(cursor="watch")
+        self.root.update_idletasks()
+        try:
+            rows = iter_status_rows(filepath, default_project=self.project_model.current_project)
+            changes, stats = build_import_diff(self.project_model, self.template_manager, rows)
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось прочитать файл:\n{e}")
+            return
+        finally:
+            self.root.config(cursor="")
+
+        summary = (f"Строк: {stats['rows']}, не сопоставлено: {stats['unmatched']}, "
+                   f"неизвестный статус: {stats['bad_status']}, изменений: {len(changes)}")
+        if not changes:
+            messagebox.showinfo("Импорт", f"Нет отличий от текущих данных.\n{summary}")
+            return
+        self.show_import_preview(changes, summary)
+
+    def show_import_preview(self, changes, summary):
+        """Показывает отличия импортируемого файла и применяет их по подтверждению"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Импорт: предпросмотр изменений")
+        dialog.geometry("900x500")
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        self.center_window(dialog)
+
+        ttk.Label(dialog, text=summary).pack(anchor=tk.W, padx=10, pady=5)
+
+        tree_frame = ttk.Frame(dialog)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        tree = ttk.Treeview(tree_frame, columns=("old", "new", "comment"))
+        tree.heading("#0", text="Пункт")
+        tree.heading("old", text="Было")
+        tree.heading("new", text="Станет")
+        tree.heading("comment", text="Комментарий")
+        tree.column("#0", width=380)
+        tree.column("old", width=60)
+        tree.column("new", width=60)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        status_texts = {0: "—", 1: "Done", 2: "BUG"}
+        # Большие различия показываем частично — применяются все
+        for change in changes[:Config.IMPORT_PREVIEW_LIMIT]:
+            place = " / ".join(part for part in (change.project, change.object_name, change.tab) if part)
+            tree.insert("", "end", text=f"{place}: {change.text}",
+                        values=(status_texts[change.old_status], status_texts[change.status], change.comment or ""))
+        if len(changes) > Config.IMPORT_PREVIEW_LIMIT:
+            ttk.Label(dialog, text=f"Показаны первые {Config.IMPORT_PREVIEW_LIMIT} из {len(changes)} изменений",
+                      font=('Arial', 9, 'italic')).pack(anchor=tk.W, padx=10)
+
+        def apply():
+            dialog.destroy()
+            self.finish_import(apply_import_diff(self.project_model, changes), "Импорт из Excel")
+            messagebox.showinfo("Успех", f"Применено изменений: {len(changes)}")
+
+        btn_frame = ttk.Frame(dialog)
+        btn_frame.pack(pady=10)
+        ttk.Button(btn_frame, text="✅ Применить", command=apply).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Отмена", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+
+    def import_test_results_dialog(self):
+        """Импортирует отчет автотестов в текущий проект или объект"""
+        project_name = self.project_model.current_project
+        object_name = self.project_model.current_object
+        if not self.model_ready or not project_name:
+            messagebox.showwarning("Внимание", "Сначала выберите проект или объект")
+            return
+
+        report_path = filedialog.askopenfilename(
+            title="Отчет автотестов",
+            filetypes=[("JUnit XML / JSON", "*.xml *.json *.jsonl"), ("Все файлы", "*.*")])
+        if not report_path:
+            return
+        mapping_path = filedialog.askopenfilename(
+            title="Файл сопоставления тестов и пунктов",
+            filetypes=[("Текстовые файлы", "*.txt"), ("Все файлы", "*.*")])
+        if not mapping_path:
+            return
+
+        template_name = self.project_model.get_project_template(project_name)
+        template_data = self.template_manager.get_template_data(template_name)
+        try:
+            deltas, stats = import_test_results(self.project_model, project_name, object_name,
+                                                template_data, report_path, mapping_path)
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось импортировать отчет:\n{e}")
+            return
+
+        self.finish_import([(project_name, deltas)], "Импорт автотестов")
+        message = (f"Тестов: {stats['cases']}, без сопоставления: {stats['unmapped']}, "
+                   f"пропущено: {stats['skipped']}\nПунктов в отчете: {stats['items']}, изменено: {len(deltas)}")
+        if stats["unknown_items"]:
+            message += f"\nНе найдено в шаблоне: {len(stats['unknown_items'])}"
+        messagebox.showinfo("Импорт автотестов", message)
+
+    def show_item_history(self, tab_name, item):
+        """Показывает историю изменений статуса пункта"""
+        project_name = self.project_model.current_project
+        if not project_name:
+            return
+        object_name = self.project_model.current_object or ""
+        history = self.project_model.history.get_item_history(project_name, object_name, tab_name, item)
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("История пункта")
+        dialog.geometry("600x300")
+        dialog.transient(self.root)
+
+        self.center_window(dialog)
+
+        tab = self.checklist_tabs.get(tab_name)
+        ttk.Label(dialog, text=tab.item_texts.get(item, item) if tab else item,
+                  wraplength=580).pack(pady=5)
+
+        tree = ttk.Treeview(dialog, columns=("time", "change", "comment"), show="headings")
+        tree.heading("time", text="Время")
+        tree.heading("change", text="Изменение")
+        tree.heading("comment", text="Комментарий")
+        tree.column("time", width=140)
+        tree.column("change", width=120)
+        tree.column("comment", width=300)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        names = {0: "—", 1: "Done", 2: "BUG"}
+        for timestamp, old, new, comment in reversed(history):
+            tree.insert("", "end", values=(datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S"),
+                                           f"{names.get(old, old)} → {names.get(new, new)}", comment or ""))
+        if not history:
+            tree.insert("", "end", values=("", "Нет изменений", ""))
+
+    def get_item_attachments(self, tab_name, item):
+        """Возвращает хэши вложений пункта текущего элемента"""
+        if not self.project_model.current_project:
+            return []
+        return self.project_model.get_item_attachments(
+            self.project_model.current_project, self.project_model.current_object, tab_name, item)
+
+    def attach_files(self, tab_name, item, parent=None):
+        """Прикрепляет файлы к пункту текущего элемента"""
+        if not self.project_model.current_project:
+            return
+
+        filenames = filedialog.askopenfilenames(
+            title="Выберите скриншоты или логи",
+            filetypes=[("Изображения", "*.png *.jpg *.jpeg *.gif *.bmp"), ("Логи", "*.log *.txt"),
+                       ("All files", "*.*")],
+            parent=parent or self.root
+        )
+        if not filenames:
+            return
+
+        try:
+            digests = self.evidence_store.add_files(filenames)
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить вложения: {e}", parent=parent or self.root)
+            return
+
+        if self.project_model.add_item_attachments(self.project_model.current_project,
+                                                   self.project_model.current_object,
+                                                   tab_name, item, digests):
+            self.project_model.save_data()
+        if tab_name in self.checklist_tabs:
+            self.checklist_tabs[tab_name].update_attachments_label(item)
+
+    def open_attachment(self, digest):
+        """Открывает вложение во внешнем приложении (копия с исходным именем во временной папке)"""
+        try:
+            target_dir = tempfile.mkdtemp(prefix="checklist_")
+            target = os.path.join(target_dir, self.evidence_store.get_name(digest))
+            shutil.copyfile(self.evidence_store.blob_path(digest), target)
+
+            if platform.system() == 'Windows':
+                os.startfile(target)
+            elif platform.system() == 'Darwin':  # macOS
+                subprocess.run(['open', target])
+            else:  # Linux
+                subprocess.run(['xdg-open', target])
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось открыть вложение: {e}")
+
+    def show_attachments(self, tab_name, item):
+        """Показывает вложения пункта с миниатюрами"""
+        digests = self.get_item_attachments(tab_name, item)
+        if not digests:
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Вложения")
+        dialog.geometry("500x400")
+        dialog.transient(self.root)
+
+        self.center_window(dialog)
+
+        canvas = tk.Canvas(dialog, highlightthickness=0)
+        scrollbar = ttk.Scrollbar(dialog, orient=tk.VERTICAL, command=canvas.yview)
+        content = ttk.Frame(canvas)
+        content.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=content, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Ссылки на изображения, чтобы их не удалил сборщик мусора
+        dialog.images = []
+
+        def remove(digest, row_frame):
+            if self.project_model.remove_item_attachment(self.project_model.current_project,
+                                                         self.project_model.current_object,
+                                                         tab_name, item, digest):
+                self.project_model.save_data()
+                row_frame.destroy()
+                if tab_name in self.checklist_tabs:
+                    self.checklist_tabs[tab_name].update_attachments_label(item)
+
+        for digest in digests:
+            row_frame = ttk.Frame(content, padding="5")
+            row_frame.pack(fill=tk.X)
+
+            thumb_path = self.evidence_store.thumbnail(digest)
+            if thumb_path:
+                image = tk.PhotoImage(file=thumb_path)
+                dialog.images.append(image)
+                ttk.Label(row_frame, image=image).pack(side=tk.LEFT, padx=5)
+
+            ttk.Label(row_frame, text=self.evidence_store.get_name(digest)).pack(side=tk.LEFT, padx=5)
+            ttk.Button(row_frame, text="🗑️", width=3,
+                       command=lambda d=digest, f=row_frame: remove(d, f)).pack(side=tk.RIGHT, padx=2)
+            ttk.Button(row_frame, text="Открыть",
+                       command=lambda d=digest: self.open_attachment(d)).pack(side=tk.RIGHT, padx=2)
+
     def update_progress(self):
         """Обновляет прогресс и статистику"""
         if not self.project_model.current_project or self.is_loading:
@@ -735,9 +1701,21 @@ class ChecklistApp:
             return
 
         current_tab = self.get_current_tab()
-        if current_tab:
-            has_selection = len(current_tab.get_selected_items()) > 0
-            self.bulk_panel.update_buttons(has_selection)
+        self.bulk_panel.update_buttons(len(current_tab.selected) if current_tab else 0)
+
+    def select_items(self, kind):
+        """Выделяет пункты текущей вкладки: все, BUG, без отметки или снимает выделение"""
+        current_tab = self.get_current_tab()
+        if not current_tab:
+            return
+        if kind == "all":
+            current_tab.select_all()
+        elif kind == "bug":
+            current_tab.select_by_status(2)
+        elif kind == "none":
+            current_tab.select_by_status(0)
+        else:
+            current_tab.clear_selection()
 
     def get_current_tab(self):
         """Возвращает текущую вкладку"""
@@ -749,6 +1727,9 @@ class ChecklistApp:
 
     def on_tab_changed(self, event):
         """Обработчик смены вкладки"""
+        current_tab = self.get_current_tab()
+        for tab in self.checklist_tabs.values():
+            tab.set_visible(tab is current_tab)
         self.update_bulk_buttons()
 
     def mark_all_done(self):
@@ -868,6 +1849,139 @@ class ChecklistApp:
 
         ttk.Button(dialog, text="Сохранить", command=save).pack(pady=10)
 
+    def bulk_add_objects_dialog(self):
+        """Диалог массового добавления объектов (из текста или CSV/XLSX файла)"""
+        if not self.project_model.current_project:
+            messagebox.showwarning("Внимание", "Сначала выберите проект")
+            return
+
+        project_name = self.project_model.current_project
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Добавить объекты списком")
+        dialog.geometry("450x450")
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        self.center_window(dialog)
+
+        ttk.Label(dialog, text=f"Проект: {project_name}").pack(pady=5)
+        ttk.Label(dialog, text="Названия объектов (по одному в строке):").pack(pady=5)
+
+        text_frame = ttk.Frame(dialog)
+        text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        text_widget = tk.Text(text_frame, wrap=tk.NONE, width=50, height=15)
+        scrollbar = ttk.Scrollbar(text_frame, orient=tk.VERTICAL, command=text_widget.yview)
+        text_widget.configure(yscrollcommand=scrollbar.set)
+
+        text_widget.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        def load_file():
+            filename = filedialog.askopenfilename(
+                title="Выберите файл со списком объектов",
+                filetypes=[("Excel/CSV", "*.xlsx *.csv"), ("Text files", "*.txt"), ("All files", "*.*")]
+            )
+            if filename:
+                success, result = read_object_names(filename)
+                if success:
+                    text_widget.delete(1.0, tk.END)
+                    text_widget.insert(1.0, "\n".join(result))
+                else:
+                    messagebox.showerror("Ошибка", f"Не удалось прочитать файл: {result}")
+
+        def save():
+            names = parse_object_names(text_widget.get(1.0, tk.END))
+            if not names:
+                messagebox.showerror("Ошибка", "Введите названия объектов")
+                return
+
+            template_name = self.project_model.get_project_template(project_name)
+            template_data = self.template_manager.get_template_data(template_name)
+            added = self.project_model.add_objects(project_name, names, template_data)
+
+            if added:
+                self.project_model.save_data()
+                self.add_objects_to_tree(project_name, added)
+            dialog.destroy()
+
+            skipped = len(names) - len(added)
+            message = f"Добавлено объектов: {len(added)}"
+            if skipped:
+                message += f"\nПропущено (уже существуют): {skipped}"
+            messagebox.showinfo("Успех", message)
+
+        btn_frame = ttk.Frame(dialog)
+        btn_frame.pack(pady=10)
+
+        ttk.Button(btn_frame, text="📁 Загрузить из файла", command=load_file).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Сохранить", command=save).pack(side=tk.LEFT, padx=5)
+
+    def copy_statuses_dialog(self):
+        """Диалог копирования статусов текущего объекта на выбранные объекты"""
+        project_name = self.project_model.current_project
+        source_object = self.project_model.current_object
+        if not project_name or not source_object:
+            messagebox.showwarning("Внимание", "Сначала выберите объект-источник")
+            return
+
+        other_objects = [name for name in self.project_model.projects[project_name].get("objects", {})
+                         if name != source_object]
+        if not other_objects:
+            messagebox.showwarning("Внимание", "В проекте нет других объектов")
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Копировать статусы")
+        dialog.geometry("400x450")
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        self.center_window(dialog)
+
+        ttk.Label(dialog, text=f"Источник: {source_object}").pack(pady=5)
+        ttk.Label(dialog, text="Выберите объекты (Ctrl/Shift для нескольких):").pack(pady=5)
+
+        list_frame = ttk.Frame(dialog)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        objects_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED, height=15)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=objects_listbox.yview)
+        objects_listbox.configure(yscrollcommand=scrollbar.set)
+        objects_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        objects_listbox.insert(tk.END, *other_objects)
+
+        only_unchecked = tk.BooleanVar(value=False)
+        ttk.Checkbutton(dialog, text="Только непроверенные пункты целевых объектов",
+                        variable=only_unchecked).pack(pady=5)
+
+        def select_all():
+            objects_listbox.selection_set(0, tk.END)
+
+        def apply():
+            targets = [other_objects[i] for i in objects_listbox.curselection()]
+            if not targets:
+                messagebox.showerror("Ошибка", "Выберите хотя бы один объект")
+                return
+
+            deltas = self.project_model.copy_object_statuses(
+                project_name, source_object, targets, only_unchecked.get())
+            if deltas:
+                self.undo_manager.record(project_name, "Копирование статусов", deltas)
+                self.project_model.save_data()
+                self.update_undo_buttons()
+            dialog.destroy()
+            messagebox.showinfo("Успех", f"Обновлено пунктов: {len(deltas)} в {len(targets)} объектах")
+
+        btn_frame = ttk.Frame(dialog)
+        btn_frame.pack(pady=10)
+
+        ttk.Button(btn_frame, text="Выделить все", command=select_all).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Копировать", command=apply).pack(side=tk.LEFT, padx=5)
+
     def rename_item(self):
         """Переименовывает выбранный элемент"""
         selection = self.projects_tree.selection()
@@ -887,6 +2001,8 @@ class ChecklistApp:
                 if self.project_model.rename_project(old_name, new_name):
                     if self.project_model.current_project == old_name:
                         self.project_model.current_project = new_name
+                    self.undo_manager.clear()
+                    self.update_undo_buttons()
                     self.project_model.save_data()
                     self.update_projects_tree()
                 else:
@@ -901,6 +2017,8 @@ class ChecklistApp:
                 if self.project_model.rename_object(project_name, old_name, new_name):
                     if self.project_model.current_object == old_name:
                         self.project_model.current_object = new_name
+                    self.undo_manager.clear()
+                    self.update_undo_buttons()
                     self.project_model.save_data()
                     self.update_projects_tree()
                 else:
@@ -933,6 +2051,8 @@ class ChecklistApp:
                         self.checklist_tabs = {}
                         self.stats_panel.update_stats(0, 0, 0)
 
+                    self.undo_manager.clear()
+                    self.update_undo_buttons()
                     self.project_model.save_data()
                     self.update_projects_tree()
 
@@ -951,11 +2071,17 @@ class ChecklistApp:
                         self.type_label.config(text="Проект")
                         self.current_name_label.config(text=project_name)
 
+                    self.undo_manager.clear()
+                    self.update_undo_buttons()
                     self.project_model.save_data()
                     self.update_projects_tree()
 
     def apply_template_to_project(self):
         """Применяет шаблон к проекту"""
+        if not self.model_ready:
+            messagebox.showwarning("Внимание", "Данные еще загружаются")
+            return
+
         if not self.project_model.current_project:
             messagebox.showwarning("Внимание", "Сначала выберите проект")
             return
@@ -967,20 +2093,39 @@ class ChecklistApp:
         template_name = self.template_combobox.get()
         template_data = self.template_manager.get_template_data(template_name)
 
-        self.project_model.update_project_template(self.project_model.current_project, template_name)
-        self.project_model.init_project_checklists(self.project_model.current_project, template_data)
-
-        for object_name in self.project_model.projects[self.project_model.current_project].get("objects", {}):
-            self.project_model.init_object_checklists(
-                self.project_model.current_project, object_name, template_data)
-
+        # Объектов может быть много: чек-листы инициализируются планировщиком, действия с моделью
+        # на это время заблокированы
+        self.set_model_ready(False)
+        project_name = self.project_model.current_project
+        self.scheduler.spawn(self.init_template_checklists(project_name, template_name, template_data),
+                             PRIORITY_NORMAL, name="Применение шаблона",
+                             on_done=lambda result: self.finish_template_application(project_name, template_name,
+                                                                                    template_data))
+
+    def init_template_checklists(self, project_name, template_name, template_data):
+        """Генератор для планировщика: заново создает чек-листы проекта и его объектов по шаблону"""
+        self.project_model.update_project_template(project_name, template_name)
+        self.project_model.init_project_checklists(project_name, template_data)
+        yield
+
+        object_names = list(self.project_model.projects[project_name].get("objects", {}))
+        for index, object_name in enumerate(object_names, 1):
+            self.project_model.init_object_checklists(project_name, object_name, template_data)
+            if index % 50 == 0:
+                self.loading_label.config(text=f"Применение шаблона: {index}/{len(object_names)}")
+            yield
+
+    def finish_template_application(self, project_name, template_name, template_data):
+        """Сохраняет проект и обновляет интерфейс после применения шаблона"""
         self.project_model.save_data()
-
-        if self.project_model.current_object:
-            self.rebuild_checklists(template_data, is_object=True)
-            self.load_current_data()
-        else:
-            self.rebuild_checklists(template_data, is_object=False)
+        # Чек-листы пересозданы: обратные изменения ссылались бы на удаленные пункты
+        self.undo_manager.clear()
+        self.update_undo_buttons()
+        self.set_model_ready(True)
+
+        # Пока шаблон применялся, пользователь мог выбрать другой проект
+        if self.project_model.current_project == project_name:
+            self.rebuild_checklists(template_data, is_object=bool(self.project_model.current_object))
             self.load_current_data()
 
         self.update_projects_tree()
@@ -1023,6 +2168,27 @@ class ChecklistApp:
 
         return data
 
+    def collect_export_items(self, scope):
+        """Возвращает итератор пунктов модели для построчного экспорта"""
+        if scope == "all":
+            return self.resolve_item_names(self.project_model.iter_items())
+
+        project_names = [self.project_model.current_project]
+
+        if scope == "current" and self.project_model.current_object:
+            items = self.project_model.iter_items(project_names, object_name=self.project_model.current_object,
+                                                  common=False)
+        elif scope == "current":
+            items = self.project_model.iter_items(project_names, objects=False)
+        else:
+            items = self.project_model.iter_items(project_names)
+
+        return self.resolve_item_names(items)
+
+    def resolve_item_names(self, items):
+        """Подставляет тексты пунктов из шаблонов вместо идентификаторов"""
+        return self.template_manager.resolve_item_names(items, self.project_model.get_project_template)
+
     def collect_project_common_data(self, project_name):
         """Собирает данные общих чек-листов проекта"""
         if not self.checklist_tabs:
@@ -1041,12 +2207,13 @@ class ChecklistApp:
                 }
                 for item in tab.items:
                     status = tab.get_item_status(item)
-                    comment = tab.checklist_items[item]["comment"]
+                    comment = tab.get_item_comment(item)
                     tab_data["items"].append({
-                        "name": item,
+                        "name": tab.item_texts[item],
                         "status": status,
                         "status_text": "Done" if status == 1 else "BUG" if status == 2 else "—",
-                        "comment": comment or ""
+                        "comment": comment or "",
+                        "attachments": self.project_model.get_item_attachments(project_name, None, tab_name, item)
                     })
                 section["tabs"].append(tab_data)
 
@@ -1068,12 +2235,13 @@ class ChecklistApp:
 
         for item in tab.items:
             status = tab.get_item_status(item)
-            comment = tab.checklist_items[item]["comment"]
+            comment = tab.get_item_comment(item)
             section["tabs"][0]["items"].append({
-                "name": item,
+                "name": tab.item_texts[item],
                 "status": status,
                 "status_text": "Done" if status == 1 else "BUG" if status == 2 else "—",
-                "comment": comment or ""
+                "comment": comment or "",
+                "attachments": self.project_model.get_item_attachments(project_name, object_name, "Генплан", item)
             })
 
         return section
\ No newline at end of file
@@ -0,0 +1,61 @@
+from collections import deque
+
+
+class UndoManager:
+    """Журнал операций для отмены и повтора изменений статусов
+
+    Операция хранит только обратимые изменения пунктов (старое и новое значение),
+    а не снимок модели, поэтому память пропорциональна числу измененных пунктов.
+    Каждое изменение — кортеж (объект или None, вкладка, пункт, старый статус,
+    старый комментарий, статус, комментарий), как его возвращает ProjectModel.apply_item_statuses.
+    """
+
+    def __init__(self, limit=100):
+        self._undo = deque(maxlen=limit)
+        self._redo = []
+
+    def record(self, project_name, description, deltas):
+        """Добавляет выполненную операцию; новая операция очищает стек повтора"""
+        if not deltas:
+            return
+        self._undo.append((project_name, description, tuple(deltas)))
+        self._redo.clear()
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo_description(self):
+        """Возвращает описание операции, которая будет отменена"""
+        return self._undo[-1][1] if self._undo else None
+
+    def redo_description(self):
+        """Возвращает описание операции, которая будет повторена"""
+        return self._redo[-1][1] if self._redo else None
+
+    def undo(self):
+        """Возвращает (проект, описание, изменения) для отмены: статусы к применению — старые"""
+        if not self._undo:
+            return None
+        project_name, description, deltas = self._undo.pop()
+        self._redo.append((project_name, description, deltas))
+        changes = [(object_name, tab, item, old_status, old_comment)
+                   for object_name, tab, item, old_status, old_comment, _, _ in reversed(deltas)]
+        return project_name, description, changes
+
+    def redo(self):
+        """Возвращает (проект, описание, изменения) для повтора операции"""
+        if not self._redo:
+            return None
+        project_name, description, deltas = self._redo.pop()
+        self._undo.append((project_name, description, deltas))
+        changes = [(object_name, tab, item, status, comment)
+                   for object_name, tab, item, _, _, status, comment in deltas]
+        return project_name, description, changes
+
+    def clear(self):
+        """Очищает журнал (после переименования или удаления проектов и объектов)"""
+        self._undo.clear()
+        self._redo.clear()